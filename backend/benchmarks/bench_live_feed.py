@@ -0,0 +1,119 @@
+"""
+Live feed fan-out: publish cost and delivery time to many connected screens.
+
+Compares LiveFeed (frame encoded once per event, appended to each screen's
+buffer, screens drain everything buffered per wake-up) with a naive fan-out
+that encodes the event for every screen and hands it over through one
+asyncio.Queue item per event.
+
+Run with: python backend/benchmarks/bench_live_feed.py
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.live_feed import LiveFeed
+
+SCREENS = [10, 100, 500, 1000]
+EVENTS = 500
+BURST = 10  # events published between yields to the loop, like a busy lunch rush
+REPEAT = 3
+
+ORDER = {
+    "order_id": "9f1c2d3e-0000-4000-8000-000000000000", "restaurant_id": "r1", "call_id": "call-123",
+    "status": "draft", "fulfillment": "pickup", "customer_name": "Ann", "phone": "555-0100", "notes": None,
+    "items": [{"item_id": f"i{n}", "name": f"Item {n}", "quantity": 1, "price": 9.5, "modifiers": []} for n in range(4)],
+    "subtotal": 38.0, "tax": 3.37, "total": 41.37,
+}
+
+
+class NaiveFeed:
+    def __init__(self):
+        self.queues = []
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        self.queues.append(queue)
+        return queue
+
+    def publish(self, event_type, data):
+        for queue in self.queues:
+            queue.put_nowait(f"event: {event_type}\ndata: {json.dumps(data)}\n\n")
+
+
+async def run_live_feed(screens: int):
+    feed = LiveFeed(queue_size=10_000, replay_size=500)
+    received = [0] * screens
+    done = asyncio.Event()
+
+    async def screen(index, subscription):
+        while received[index] < EVENTS:
+            received[index] += len(await subscription.next_frames(1.0))
+        if all(r >= EVENTS for r in received):
+            done.set()
+
+    tasks = [asyncio.ensure_future(screen(i, feed.subscribe("r1"))) for i in range(screens)]
+    await asyncio.sleep(0)
+    publish_s = 0.0
+    start = time.perf_counter()
+    for n in range(EVENTS):
+        t = time.perf_counter()
+        feed.publish("r1", "order.updated", {"order": ORDER})
+        publish_s += time.perf_counter() - t
+        if n % BURST == BURST - 1:
+            await asyncio.sleep(0)
+    await done.wait()
+    total_s = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    return publish_s / EVENTS * 1e6, total_s * 1000
+
+
+async def run_naive(screens: int):
+    feed = NaiveFeed()
+    received = [0] * screens
+    done = asyncio.Event()
+
+    async def screen(index, queue):
+        while received[index] < EVENTS:
+            await queue.get()
+            received[index] += 1
+        if all(r >= EVENTS for r in received):
+            done.set()
+
+    tasks = [asyncio.ensure_future(screen(i, feed.subscribe())) for i in range(screens)]
+    await asyncio.sleep(0)
+    publish_s = 0.0
+    start = time.perf_counter()
+    for n in range(EVENTS):
+        t = time.perf_counter()
+        feed.publish("order.updated", {"order": ORDER})
+        publish_s += time.perf_counter() - t
+        if n % BURST == BURST - 1:
+            await asyncio.sleep(0)
+    await done.wait()
+    total_s = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    return publish_s / EVENTS * 1e6, total_s * 1000
+
+
+def _median(run, screens):
+    results = [asyncio.run(run(screens)) for _ in range(REPEAT)]
+    return statistics.median(r[0] for r in results), statistics.median(r[1] for r in results)
+
+
+def main():
+    print(f"{EVENTS} order events, published in bursts of {BURST}\n")
+    print(f"{'screens':>8} {'naive publish':>14} {'feed publish':>13} {'naive all-delivered':>20} {'feed all-delivered':>19}")
+    for screens in SCREENS:
+        naive_pub, naive_total = _median(run_naive, screens)
+        feed_pub, feed_total = _median(run_live_feed, screens)
+        print(f"{screens:>8} {naive_pub:>12.1f}us {feed_pub:>11.1f}us {naive_total:>18.1f}ms {feed_total:>17.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
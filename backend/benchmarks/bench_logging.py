@@ -0,0 +1,94 @@
+"""
+Logging overhead per traced tool call: print-per-line vs. the buffered sink.
+
+Each traced call emits two records (tool_invoked, tool_success). stdout is
+redirected to a temporary file so every flush is a real write syscall. The
+second table makes each flush block for 0.2 ms, like a pipe into a busy log
+collector, which is where the per-line path hurts request latency.
+
+Run with: python backend/benchmarks/bench_logging.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import observability
+from backend.config import settings
+
+CALLS = 20_000
+REPEAT = 3
+SLOW_FLUSH_SECONDS = 0.0002
+
+
+class SlowFlushFile:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+        time.sleep(SLOW_FLUSH_SECONDS)
+
+
+@observability.trace_tool("bench_tool")
+def tool():
+    return None
+
+
+def run(sink: str, sample_rate: float = 1.0, calls: int = CALLS):
+    settings.LOG_SINK = sink
+    observability._SAMPLE_RATES["tool_invoked"] = sample_rate
+    best_call_us, best_total_us = float("inf"), float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(calls):
+            tool()
+        calls_done = time.perf_counter()
+        observability.flush_logs()
+        drained = time.perf_counter()
+        best_call_us = min(best_call_us, (calls_done - start) / calls * 1e6)
+        best_total_us = min(best_total_us, (drained - start) / calls * 1e6)
+    return best_call_us, best_total_us
+
+
+def scenarios(calls: int):
+    return [
+        ("print per line (sync)", run("sync", calls=calls)),
+        ("buffered", run("buffered", calls=calls)),
+        ("buffered, tool_invoked 10%", run("buffered", 0.1, calls=calls)),
+    ]
+
+
+def report(title: str, results) -> None:
+    print(title)
+    print(f"  {'sink':<28} {'on request path':>16} {'incl. drain':>14}")
+    for label, (call_us, total_us) in results:
+        print(f"  {label:<28} {call_us:>13.1f} us {total_us:>11.1f} us")
+
+
+def main():
+    real_stdout = sys.stdout
+    with tempfile.TemporaryFile("w") as sink_file:
+        try:
+            sys.stdout = sink_file
+            fast = scenarios(CALLS)
+            sys.stdout = SlowFlushFile(sink_file)
+            slow = scenarios(CALLS // 10)
+            dropped = observability.get_sink(
+                settings.LOG_BUFFER_SIZE, settings.LOG_BATCH_SIZE, settings.LOG_FLUSH_INTERVAL_SECONDS
+            ).dropped
+        finally:
+            sys.stdout = real_stdout
+
+    report(f"{CALLS} traced calls per run, best of {REPEAT}, stdout to a file:", fast)
+    report(f"{CALLS // 10} traced calls per run, stdout flush blocking {SLOW_FLUSH_SECONDS * 1000:.1f} ms:", slow)
+    print(f"records dropped (buffer {settings.LOG_BUFFER_SIZE} full): {dropped}")
+
+
+if __name__ == "__main__":
+    main()
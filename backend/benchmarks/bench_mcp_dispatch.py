@@ -0,0 +1,92 @@
+"""
+MCP per-call dispatch overhead: the previous if/elif chain vs. the handler registry.
+
+Services are replaced with coroutines that return a canned response, so only
+the dispatcher's own work is measured: imports, validation, the call and
+serialization.
+
+Run with: python backend/benchmarks/bench_mcp_dispatch.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import mcp_server
+from backend.config import settings
+from backend.models import MenuItem, MenuResponse, OrderResponse
+from backend.services.menu_service import MenuService
+from backend.services.order_service import OrderService
+
+CALLS = 20_000
+REPEAT = 5
+
+MENU = MenuResponse(matches=[
+    MenuItem(item_id=f"i{i}", name=f"Burger {i}", category="Burgers", price=9.5, availability=True)
+    for i in range(10)
+], notes="Found 10 items")
+ORDER = OrderResponse(order_id="o1", status="draft", subtotal=19.0, tax=1.69, total=20.69,
+                      missing_fields=[], validation_errors=[])
+ORDER_ARGS = {"restaurant_id": "r1", "call_id": "c1", "items": [{"item_id": "i1", "quantity": 2}]}
+
+
+async def fake_search_menu(restaurant_id, query=None, limit=20):
+    return MENU
+
+
+async def fake_create_or_update_order(req):
+    return ORDER
+
+
+async def legacy_dispatch(name: str, arguments: dict) -> str:
+    """The dispatcher as it was: imports, if/elif, .dict() and json.dumps on every call."""
+    from backend.services.menu_service import MenuService
+    from backend.services.order_service import OrderService
+    from backend.models import OrderCreateRequest, EtaRequest, OrderConfirmRequest, HandoffRequest
+
+    if name == "menu_search":
+        result = await MenuService.search_menu(
+            restaurant_id=arguments.get("restaurant_id", settings.DEFAULT_RESTAURANT_ID),
+            query=arguments.get("query"),
+            limit=arguments.get("limit", 20),
+        )
+        return json.dumps(result.dict() if hasattr(result, "dict") else result)
+    elif name == "order_create_or_update":
+        req = OrderCreateRequest(**arguments)
+        result = await OrderService.create_or_update_order(req)
+        return json.dumps(result.dict() if hasattr(result, "dict") else result)
+    raise ValueError(f"Unknown tool: {name}")
+
+
+def us_per_call(dispatch, name: str, arguments: dict) -> float:
+    async def loop():
+        for _ in range(CALLS):
+            await dispatch(name, arguments)
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        asyncio.run(loop())
+        best = min(best, (time.perf_counter() - start) / CALLS * 1e6)
+    return best
+
+
+def main():
+    # The legacy path's .dict() warns on pydantic v2; that noise is not the point here.
+    warnings.simplefilter("ignore", DeprecationWarning)
+    MenuService.search_menu = staticmethod(fake_search_menu)
+    OrderService.create_or_update_order = staticmethod(fake_create_or_update_order)
+
+    print(f"{CALLS} calls, best of {REPEAT}")
+    for tool, arguments in (("menu_search", {"query": "burger"}), ("order_create_or_update", ORDER_ARGS)):
+        legacy = us_per_call(legacy_dispatch, tool, arguments)
+        registry = us_per_call(mcp_server.dispatch_tool_async, tool, arguments)
+        print(f"  {tool:<24} if/elif {legacy:>6.1f} us   registry {registry:>6.1f} us   ({legacy / registry:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
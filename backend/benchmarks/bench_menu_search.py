@@ -0,0 +1,90 @@
+"""
+Menu search latency: legacy substring scan vs. the prebuilt search index.
+
+Run with: python backend/benchmarks/bench_menu_search.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models import MenuItem
+from backend.services.menu_search import MenuSearchIndex
+
+SIZES = [10, 1_000, 50_000]
+QUERIES = ["cheese burger", "bbq bacon", "fries", "chocolat milkshake", "spicy chicken wrap", "drinks"]
+REPEAT = 50
+
+ADJECTIVES = ["Classic", "Spicy", "Smoked", "Crispy", "Grilled", "Double", "Loaded", "Garlic", "Honey", "Truffle"]
+BASES = ["Cheeseburger", "Bacon BBQ Burger", "Chicken Wrap", "Sweet Potato Fries", "Onion Rings",
+         "Chocolate Milkshake", "Caesar Salad", "Fish Tacos", "Veggie Bowl", "Fountain Soda"]
+CATEGORIES = ["Burgers", "Sides", "Drinks", "Salads", "Wraps", "Specials"]
+
+
+def make_menu(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    items = []
+    for i in range(size):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(BASES)}"
+        if size > 100:
+            name += f" No {i}"
+        items.append(MenuItem(
+            item_id=f"item{i}",
+            name=name,
+            category=rng.choice(CATEGORIES),
+            price=round(rng.uniform(2, 25), 2),
+            availability=True,
+        ))
+    return items
+
+
+def legacy_search(items, query, limit=20):
+    matches = []
+    q = query.lower()
+    for item in items:
+        if q in item.name.lower() or q in item.category.lower():
+            matches.append(item)
+    return matches[:limit]
+
+
+def _time_ms(fn, repeat=REPEAT):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    print(f"{'items':>7} {'build ms':>9} {'legacy p50':>11} {'index p50':>10} {'index p95':>10}")
+    for size in SIZES:
+        items = make_menu(size)
+
+        start = time.perf_counter()
+        index = MenuSearchIndex(items)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_p50 = []
+        index_p50 = []
+        index_p95 = []
+        for query in QUERIES:
+            p50, _ = _time_ms(lambda: legacy_search(items, query))
+            legacy_p50.append(p50)
+            index.search(query)  # first call fills the term expansion cache
+            p50, p95 = _time_ms(lambda: index.search(query))
+            index_p50.append(p50)
+            index_p95.append(p95)
+
+        print(
+            f"{size:>7} {build_ms:>9.1f} {statistics.mean(legacy_p50):>10.3f}ms "
+            f"{statistics.mean(index_p50):>8.3f}ms {statistics.mean(index_p95):>8.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
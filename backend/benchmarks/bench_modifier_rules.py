@@ -0,0 +1,125 @@
+"""
+Modifier validation and pricing: scanning each item's modifier lists per
+selection vs. the rules compiled when the menu loads.
+
+Orders have many lines, each with several modifier selections, against
+items with many modifier groups and options.
+
+Run with: python backend/benchmarks/bench_modifier_rules.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models import MenuItem, ModifierOption, ModifierSelection, OrderItem
+from backend.services.modifier_rules import compile_rules
+
+MENU_SIZE = 200
+GROUPS_PER_ITEM = 8
+OPTIONS_PER_GROUP = 12
+ORDER_SHAPES = [(10, 3), (100, 6), (500, 8)]  # (lines, selections per line)
+REPEAT = 30
+
+
+def make_menu(seed: int = 7):
+    rng = random.Random(seed)
+    items = []
+    for i in range(MENU_SIZE):
+        modifiers = []
+        for g in range(GROUPS_PER_ITEM):
+            options = [f"Option {g}-{o}" for o in range(OPTIONS_PER_GROUP)]
+            modifiers.append(ModifierOption(
+                name=f"Group {g}",
+                options=options,
+                required=g == 0,
+                max_selections=1 if g < 2 else 3,
+                price_adjustments={o: round(rng.uniform(0, 2), 2) for o in rng.sample(options, 4)},
+            ))
+        items.append(MenuItem(
+            item_id=f"item{i}", name=f"Item {i}", category="Mains",
+            price=round(rng.uniform(5, 25), 2), availability=True, modifiers=modifiers,
+        ))
+    return items
+
+
+def make_order(items, lines: int, selections: int, seed: int = 11):
+    rng = random.Random(seed)
+    order = []
+    for _ in range(lines):
+        item = rng.choice(items)
+        # Always pick the required group, then distinct groups after it.
+        groups = [item.modifiers[0]] + rng.sample(item.modifiers[1:], selections - 1)
+        order.append(OrderItem(
+            item_id=item.item_id,
+            quantity=rng.randint(1, 4),
+            modifier_selections=[ModifierSelection(modifier_name=g.name, option=rng.choice(g.options)) for g in groups],
+        ))
+    return order
+
+
+def scan_price(menu_map, order):
+    """Validation and pricing by walking the item's modifier lists."""
+    subtotal, errors = 0.0, []
+    for line in order:
+        item = menu_map[line.item_id]
+        unit = item.price
+        counts = {}
+        for selection in line.modifier_selections:
+            group = next((m for m in item.modifiers if m.name == selection.modifier_name), None)
+            if group is None or selection.option not in group.options:
+                errors.append(selection.option)
+                continue
+            unit += group.price_adjustments.get(selection.option, 0.0)
+            counts[group.name] = counts.get(group.name, 0) + 1
+        for group in item.modifiers:
+            count = counts.get(group.name, 0)
+            if (group.required and count < 1) or (group.max_selections is not None and count > group.max_selections):
+                errors.append(group.name)
+        subtotal += unit * line.quantity
+    return round(subtotal, 2), errors
+
+
+def compiled_price(rules, order):
+    subtotal_cents, errors = 0, []
+    for line in order:
+        item_rules = rules[line.item_id]
+        adjustment, line_errors = item_rules.price(line.modifier_selections)
+        errors.extend(line_errors)
+        subtotal_cents += (int(round(item_rules.item.price * 100)) + adjustment) * line.quantity
+    return subtotal_cents / 100, errors
+
+
+def _time_ms(fn, repeat=REPEAT):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    items = make_menu()
+    menu_map = {item.item_id: item for item in items}
+
+    start = time.perf_counter()
+    rules = compile_rules(items)
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"compiled rules for {MENU_SIZE} items x {GROUPS_PER_ITEM} groups in {compile_ms:.1f}ms\n")
+
+    print(f"{'lines':>6} {'mods/line':>9} {'scan p50':>10} {'compiled p50':>13} {'compiled p95':>13}")
+    for lines, selections in ORDER_SHAPES:
+        order = make_order(items, lines, selections)
+        assert scan_price(menu_map, order) == compiled_price(rules, order)
+        scan_p50, _ = _time_ms(lambda: scan_price(menu_map, order))
+        compiled_p50, compiled_p95 = _time_ms(lambda: compiled_price(rules, order))
+        print(f"{lines:>6} {selections:>9} {scan_p50:>8.3f}ms {compiled_p50:>11.3f}ms {compiled_p95:>11.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Query latency on the embedded SQLite backend, through database.execute
+(metrics and tracing included), against a seeded local database.
+
+Run with: python backend/benchmarks/bench_sqlite_store.py
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.database import execute
+from backend.services.pagination import apply_keyset
+from backend.sqlite_store import SQLiteClient
+
+RESTAURANTS = 20
+MENU_ITEMS = 150
+ORDERS = 20_000
+REPEAT = 2_000
+
+
+def seed(client: SQLiteClient, rng: random.Random) -> None:
+    menu = [
+        {"item_id": f"r{r}-i{i}", "restaurant_id": f"r{r}", "name": f"Item {i}", "category": "Mains",
+         "price": round(rng.uniform(3, 25), 2),
+         "modifiers": [{"name": "Size", "options": ["Regular", "Large"], "price_adjustments": {"Large": 1.5}}]}
+        for r in range(RESTAURANTS) for i in range(MENU_ITEMS)
+    ]
+    orders = [
+        {"order_id": f"o{n}", "restaurant_id": f"r{n % RESTAURANTS}", "call_id": f"c{n}",
+         "status": rng.choice(["draft", "confirmed"]), "total": round(rng.uniform(10, 80), 2),
+         "items": [{"item_id": f"r{n % RESTAURANTS}-i{rng.randrange(MENU_ITEMS)}", "quantity": 1, "price": 9.0}],
+         "created_at": f"2024-03-{1 + n % 28:02d}T{n % 24:02d}:{n % 60:02d}:00+00:00"}
+        for n in range(ORDERS)
+    ]
+    asyncio.run(client.table("menu_items").insert(menu).execute())
+    asyncio.run(client.table("orders").insert(orders).execute())
+
+
+def _time_ms(loop, make_query, repeat=REPEAT):
+    samples = []
+    for _ in range(repeat):
+        query = make_query()
+        start = time.perf_counter()
+        loop.run_until_complete(execute(query))
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        client = SQLiteClient(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        seed(client, rng)
+        print(f"seeded {RESTAURANTS * MENU_ITEMS} menu items and {ORDERS} orders "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms\n")
+
+        loop = asyncio.new_event_loop()
+        cases = [
+            ("menu for one restaurant", lambda: client.table("menu_items").select("*")
+                .eq("restaurant_id", f"r{rng.randrange(RESTAURANTS)}")),
+            ("order by id", lambda: client.table("orders").select("*").eq("order_id", f"o{rng.randrange(ORDERS)}")),
+            ("orders page (50)", lambda: apply_keyset(
+                client.table("orders").select("order_id, status, total, created_at")
+                .eq("restaurant_id", f"r{rng.randrange(RESTAURANTS)}"), None, "order_id").limit(51)),
+            ("draft upsert", lambda: client.table("orders").upsert({
+                "order_id": f"o{rng.randrange(ORDERS)}", "restaurant_id": "r0", "call_id": "c",
+                "items": [{"item_id": "r0-i1", "quantity": 2, "price": 9.0}], "subtotal": 18.0, "total": 19.6})),
+        ]
+        print(f"{'query':<24} {'p50':>9} {'p95':>9}")
+        for name, make_query in cases:
+            p50, p95 = _time_ms(loop, make_query)
+            print(f"{name:<24} {p50:>7.3f}ms {p95:>7.3f}ms")
+        loop.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold start: import time of the modules each process type loads, against a
+budget, and the time from spawning the API server to its first successful
+/tool/menu_search.
+
+The server runs on the embedded SQLite backend with a seeded menu, so the
+numbers cover interpreter start, imports, the lifespan pre-warm and one
+request, without network variance from a remote database.
+
+Run with: python backend/benchmarks/bench_startup.py
+"""
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from backend.sqlite_store import SQLiteClient
+
+# Cumulative import time budget per module, in milliseconds. backend.database
+# is what every service pulls in; backend.mcp_server is the whole import cost
+# of an MCP stdio session before its first tool call.
+IMPORT_BUDGET_MS = {
+    "backend.database": 100,
+    "backend.mcp_server": 350,
+    "backend.main": 900,
+}
+IMPORT_RUNS = 5
+START_RUNS = 5
+START_TIMEOUT_SECONDS = 30
+RESTAURANT_ID = "demo_restaurant"
+MENU_ITEMS = 150
+
+
+def import_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def seed(path: str) -> None:
+    import asyncio
+
+    client = SQLiteClient(path)
+    asyncio.run(client.table("menu_items").insert([
+        {"item_id": f"i{i}", "restaurant_id": RESTAURANT_ID, "name": f"Item {i}", "category": "Mains",
+         "price": 5 + i % 20, "description": f"House special number {i}"}
+        for i in range(MENU_ITEMS)
+    ]).execute())
+    client.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start_ms(db_path: str) -> Tuple[float, float]:
+    """Spawn uvicorn and poll until /tool/menu_search answers 200.
+
+    Returns the time to that answer, and how long the answering request took.
+    """
+    port = free_port()
+    env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=db_path, DRAFT_JOURNAL_DIR="")
+    url = f"http://127.0.0.1:{port}/tool/menu_search?restaurant_id={RESTAURANT_ID}&query=special&limit=5"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < START_TIMEOUT_SECONDS:
+            sent = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        done = time.perf_counter()
+                        return (done - start) * 1000, (done - sent) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("server did not answer /tool/menu_search in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    print(f"{'module':<22} {'import p50':>11} {'budget':>8}")
+    over = []
+    for module, budget in IMPORT_BUDGET_MS.items():
+        p50 = statistics.median(import_ms(module) for _ in range(IMPORT_RUNS))
+        flag = "" if p50 <= budget else "  OVER"
+        if flag:
+            over.append(module)
+        print(f"{module:<22} {p50:>9.0f}ms {budget:>6}ms{flag}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path)
+        runs = [cold_start_ms(db_path) for _ in range(START_RUNS)]
+    ready = sorted(total for total, _ in runs)
+    first = sorted(request for _, request in runs)
+    print(f"\ncold start to first /tool/menu_search: p50 {statistics.median(ready):.0f}ms, "
+          f"max {ready[-1]:.0f}ms over {START_RUNS} runs")
+    print(f"first /tool/menu_search request: p50 {statistics.median(first):.1f}ms, max {first[-1]:.1f}ms")
+    if over:
+        sys.exit(f"import budget exceeded: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Load test: async data layer vs. the previous sync handler path.
+
+Starts a stand-in PostgREST server with a fixed per-query latency, then drives
+the same dashboard/tool endpoints on two apps at a fixed concurrency:
+
+  - async: the real backend.main app (async endpoints, pooled client)
+  - sync:  the previous shape, plain `def` endpoints calling the blocking
+           supabase client sequentially from Starlette's threadpool
+
+Run with: python backend/benchmarks/load_async_vs_sync.py [--concurrency 200] [--latency-ms 40]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+FAKE_DB_PORT = 54329
+ASYNC_PORT = 54330
+SYNC_PORT = 54331
+
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{FAKE_DB_PORT}"
+os.environ["SUPABASE_KEY"] = "load-test-key"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+def make_fake_postgrest(latency_s: float) -> FastAPI:
+    fake = FastAPI()
+
+    @fake.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE", "HEAD"])
+    async def table(table: str, request: Request):
+        await asyncio.sleep(latency_s)
+        headers = {"Content-Range": "0-0/0"}
+        return Response(content="[]", media_type="application/json", headers=headers)
+
+    return fake
+
+
+def make_sync_app() -> FastAPI:
+    from datetime import datetime
+    from supabase import create_client
+
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    legacy = FastAPI()
+
+    @legacy.get("/stats")
+    def get_stats(restaurant_id: str = "demo_restaurant"):
+        start_iso = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        orders = client.table("orders").select("*").gte("created_at", start_iso) \
+            .eq("restaurant_id", restaurant_id).execute().data
+        calls = client.table("call_logs").select("*", count="exact").gte("created_at", start_iso) \
+            .eq("restaurant_id", restaurant_id).execute()
+        return {"ordersToday": len(orders), "callsToday": calls.count or 0}
+
+    return legacy
+
+
+def _serve_forever(kind: str, port: int, latency_s: float) -> None:
+    if kind == "fake_db":
+        app = make_fake_postgrest(latency_s)
+    elif kind == "sync":
+        app = make_sync_app()
+    else:
+        # Silence the per-request JSON log lines; only the summary matters here.
+        sys.stdout = open(os.devnull, "w")
+        from backend.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def serve(kind: str, port: int, latency_s: float = 0.0) -> multiprocessing.Process:
+    """Run one server in its own process so the apps do not share a GIL with the load generator."""
+    process = multiprocessing.Process(target=_serve_forever, args=(kind, port, latency_s), daemon=True)
+    process.start()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+async def drive(base_url: str, path: str, concurrency: int, duration_s: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration_s
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+
+    servers = [
+        serve("fake_db", FAKE_DB_PORT, args.latency_ms / 1000),
+        serve("async", ASYNC_PORT),
+        serve("sync", SYNC_PORT),
+    ]
+
+    path = "/stats?restaurant_id=demo_restaurant"
+    print(f"GET {path}  concurrency={args.concurrency}  db latency={args.latency_ms}ms  duration={args.duration}s")
+    for label, port in (("sync", SYNC_PORT), ("async", ASYNC_PORT)):
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", path, args.concurrency, args.duration))
+        print(
+            f"  {label:<6} {result['rps']:>8.1f} req/s   p50 {result['p50_ms']:>7.1f}ms   "
+            f"p95 {result['p95_ms']:>7.1f}ms   errors {result['errors']}"
+        )
+
+    for process in servers:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
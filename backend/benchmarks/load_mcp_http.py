@@ -0,0 +1,157 @@
+"""
+Load test: MCP over HTTP (/mcp on one warm process) as concurrent sessions grow.
+
+Starts a stand-in PostgREST server that serves a menu with a fixed latency,
+and the real backend.main app. Each simulated voice session opens an MCP
+session (initialize) and then makes menu_search calls back to back, like an
+agent turn loop. All sessions share one client pool with fewer connections
+than sessions, so sessions multiplex on keep-alive connections.
+
+For contrast it also times opening stdio sessions, which need one
+`python backend/mcp_server.py` process each, with a cold import and an empty
+menu cache.
+
+Run with: python backend/benchmarks/load_mcp_http.py [--sessions 1,10,50,200] [--latency-ms 40]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+FAKE_DB_PORT = 54339
+APP_PORT = 54340
+
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{FAKE_DB_PORT}"
+os.environ["SUPABASE_KEY"] = "load-test-key"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+MENU_ROWS = [
+    {"item_id": f"i{i}", "restaurant_id": "demo_restaurant", "name": name, "category": "Burgers",
+     "price": 9.5, "availability": True, "description": None, "modifiers": []}
+    for i, name in enumerate(["Classic Cheeseburger", "Bacon BBQ Burger", "Veggie Burger", "Fries", "Milkshake"])
+]
+
+
+def make_fake_postgrest(latency_s: float) -> FastAPI:
+    fake = FastAPI()
+
+    @fake.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE", "HEAD"])
+    async def table(table: str, request: Request):
+        await asyncio.sleep(latency_s)
+        body = json.dumps(MENU_ROWS if table == "menu_items" else [])
+        return Response(content=body, media_type="application/json", headers={"Content-Range": "0-0/0"})
+
+    return fake
+
+
+def _serve_forever(kind: str, port: int, latency_s: float) -> None:
+    if kind == "fake_db":
+        app = make_fake_postgrest(latency_s)
+    else:
+        os.environ["LOG_SINK"] = "buffered"
+        sys.stdout = open(os.devnull, "w")
+        from backend.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def serve(kind: str, port: int, latency_s: float = 0.0) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=_serve_forever, args=(kind, port, latency_s), daemon=True)
+    process.start()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def _call(req_id: int, query: str) -> dict:
+    return {"jsonrpc": "2.0", "id": req_id, "method": "tools/call",
+            "params": {"name": "menu_search", "arguments": {"query": query}}}
+
+
+async def run_sessions(sessions: int, calls_per_session: int, max_connections: int):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=30) as client:
+        async def session():
+            nonlocal errors
+            init = await client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"})
+            headers = {"Mcp-Session-Id": init.headers["mcp-session-id"]}
+            for i in range(calls_per_session):
+                start = time.perf_counter()
+                response = await client.post("/mcp", json=_call(i + 1, "burger"), headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200 or response.json()["result"]["isError"]:
+                    errors += 1
+            await client.delete("/mcp", headers=headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session() for _ in range(sessions)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+        "errors": errors,
+    }
+
+
+def stdio_session_setup_ms() -> float:
+    """Spawn a stdio MCP server, initialize, make one menu_search and exit."""
+    requests = "\n".join(json.dumps(m) for m in (
+        {"jsonrpc": "2.0", "id": 0, "method": "initialize"},
+        _call(1, "burger"),
+    )) + "\n"
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "backend", "mcp_server.py")],
+        input=requests.encode(), capture_output=True, check=True, env=os.environ.copy(),
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,10,50,200")
+    parser.add_argument("--calls", type=int, default=10, help="menu_search calls per session")
+    parser.add_argument("--connections", type=int, default=20, help="client pool size shared by all sessions")
+    parser.add_argument("--latency-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    servers = [serve("fake_db", FAKE_DB_PORT, args.latency_ms / 1000), serve("app", APP_PORT)]
+
+    print(f"MCP over HTTP: {args.calls} menu_search calls per session, "
+          f"{args.connections} shared connections, db latency {args.latency_ms}ms")
+    for sessions in (int(s) for s in args.sessions.split(",")):
+        result = asyncio.run(run_sessions(sessions, args.calls, args.connections))
+        print(f"  {sessions:>4} sessions  {result['calls_per_s']:>8.1f} calls/s   p50 {result['p50_ms']:>7.1f}ms   "
+              f"p95 {result['p95_ms']:>7.1f}ms   errors {result['errors']}")
+
+    setups = [stdio_session_setup_ms() for _ in range(3)]
+    print(f"stdio: opening one session (process start, imports, first call) takes "
+          f"{statistics.median(setups):.0f}ms and holds a process per session")
+
+    for process in servers:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
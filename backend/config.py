@@ -1,17 +1,147 @@
 import os
-from dotenv import load_dotenv
+from typing import Callable, List
+
+# Relative data paths are resolved against the project root, not the
+# working directory, so every process started from anywhere agrees on them
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _data_path(value: str) -> str:
+    return os.path.join(PROJECT_ROOT, value) if value else ""
 
-load_dotenv()
 
 class Settings:
-    SUPABASE_URL: str = os.environ.get("SUPABASE_URL", "")
-    # Prefer Service Key for backend operations
-    SUPABASE_KEY: str = os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_KEY", "")
-    
-    DEFAULT_RESTAURANT_ID: str = "demo_restaurant"
-    TAX_RATE: float = 0.08875
-    
-    # Defaults for calculations
-    BASE_ETA_MINUTES: int = 30
-    
+    def __init__(self) -> None:
+        self.reload()
+
+    def reload(self) -> None:
+        """Read every setting from the environment."""
+        self.SUPABASE_URL: str = os.environ.get("SUPABASE_URL", "")
+        # Prefer Service Key for backend operations
+        self.SUPABASE_KEY: str = os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_KEY", "")
+
+        # Storage backend: "postgrest" (Supabase) or "sqlite", an embedded
+        # WAL-mode database file with the same schema
+        self.DB_BACKEND: str = os.environ.get("DB_BACKEND", "postgrest")
+        self.SQLITE_PATH: str = os.environ.get("SQLITE_PATH", "voicehub.db")
+
+        # Async PostgREST connection pool
+        self.DB_POOL_MAX_CONNECTIONS: int = int(os.environ.get("DB_POOL_MAX_CONNECTIONS", "50"))
+        self.DB_POOL_MAX_KEEPALIVE: int = int(os.environ.get("DB_POOL_MAX_KEEPALIVE", "20"))
+        self.DB_POOL_KEEPALIVE_SECONDS: float = float(os.environ.get("DB_POOL_KEEPALIVE_SECONDS", "30"))
+        self.DB_TIMEOUT_SECONDS: float = float(os.environ.get("DB_TIMEOUT_SECONDS", "10"))
+
+        self.DEFAULT_RESTAURANT_ID: str = os.environ.get("DEFAULT_RESTAURANT_ID", "demo_restaurant")
+        # Restaurants whose menus and settings are loaded at startup
+        # (comma-separated), so the first call after a cold start does not wait
+        # on those queries
+        self.PREWARM_RESTAURANT_IDS: str = os.environ.get("PREWARM_RESTAURANT_IDS", self.DEFAULT_RESTAURANT_ID)
+
+        # Defaults for restaurants without a `restaurants` row, or with the
+        # column unset. Per-restaurant values are read through a cache that
+        # keeps them this long (see backend/services/restaurant_service.py).
+        self.TAX_RATE: float = float(os.environ.get("TAX_RATE", "0.08875"))
+        self.BASE_ETA_MINUTES: int = int(os.environ.get("BASE_ETA_MINUTES", "30"))
+        self.ETA_MAX_LOAD_MINUTES: int = int(os.environ.get("ETA_MAX_LOAD_MINUTES", "30"))
+        # IANA zone whose midnight starts the dashboards' "today"
+        self.DEFAULT_TIMEZONE: str = os.environ.get("DEFAULT_TIMEZONE", "UTC")
+        self.RESTAURANT_CONFIG_TTL_SECONDS: float = float(os.environ.get("RESTAURANT_CONFIG_TTL_SECONDS", "300"))
+        self.RESTAURANT_CONFIG_MAX_RESTAURANTS: int = int(os.environ.get("RESTAURANT_CONFIG_MAX_RESTAURANTS", "1024"))
+
+        # Kitchen load: sliding window of confirmed orders feeding the ETA, and
+        # how each order is weighted ("orders" or "items")
+        self.KITCHEN_LOAD_WINDOW_SECONDS: float = float(os.environ.get("KITCHEN_LOAD_WINDOW_SECONDS", "3600"))
+        self.KITCHEN_LOAD_MODEL: str = os.environ.get("KITCHEN_LOAD_MODEL", "orders")
+
+        # Dashboard list endpoints: default and server-enforced maximum page size
+        self.PAGE_SIZE_DEFAULT: int = 50
+        self.PAGE_SIZE_MAX: int = int(os.environ.get("PAGE_SIZE_MAX", "200"))
+        # Rows fetched per round trip by the streaming exports
+        self.EXPORT_CHUNK_SIZE: int = int(os.environ.get("EXPORT_CHUNK_SIZE", "1000"))
+
+        # Menu cache: how long a restaurant's menu is served from memory, and how
+        # many restaurants are kept before least-recently-used ones are evicted
+        self.MENU_CACHE_TTL_SECONDS: float = float(os.environ.get("MENU_CACHE_TTL_SECONDS", "60"))
+        self.MENU_CACHE_MAX_RESTAURANTS: int = int(os.environ.get("MENU_CACHE_MAX_RESTAURANTS", "256"))
+        # Menus with at least this many items are parsed and indexed in a
+        # worker thread, so the event loop keeps serving other calls meanwhile
+        self.MENU_BUILD_THREAD_MIN_ITEMS: int = int(os.environ.get("MENU_BUILD_THREAD_MIN_ITEMS", "2000"))
+        # menu_resolve_batch only puts matches at least this confident in order_items
+        self.MENU_RESOLVE_MIN_CONFIDENCE: float = float(os.environ.get("MENU_RESOLVE_MIN_CONFIDENCE", "0.5"))
+        # Rows per upsert/delete statement when applying a menu CSV import
+        self.MENU_IMPORT_BATCH_SIZE: int = 500
+
+        # Retried order writes (same call_id + payload) are answered from a
+        # response cache for this long
+        self.IDEMPOTENCY_TTL_SECONDS: float = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "120"))
+        self.IDEMPOTENCY_MAX_ENTRIES: int = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+        # Draft orders: in-memory per call, written to `orders` this long after the
+        # last change (and at once on confirm/handoff). Each process journals its
+        # drafts to its own file in DRAFT_JOURNAL_DIR, so open drafts survive a
+        # restart; set DRAFT_JOURNAL_DIR="" to disable it. A journal is compacted
+        # once it grows past DRAFT_JOURNAL_COMPACT_BYTES.
+        self.DRAFT_FLUSH_DELAY_SECONDS: float = float(os.environ.get("DRAFT_FLUSH_DELAY_SECONDS", "2"))
+        self.DRAFT_IDLE_SECONDS: float = float(os.environ.get("DRAFT_IDLE_SECONDS", "1800"))
+        self.DRAFT_JOURNAL_DIR: str = _data_path(os.environ.get("DRAFT_JOURNAL_DIR", "data/draft_journals"))
+        self.DRAFT_JOURNAL_COMPACT_BYTES: int = int(os.environ.get("DRAFT_JOURNAL_COMPACT_BYTES", str(1 << 20)))
+
+        # Structured logs: "buffered" hands records to a background writer thread,
+        # "sync" writes each line on the request thread. The buffer is bounded and
+        # drops (and counts) records when full. tool_invoked events can be sampled
+        # (0.0-1.0); tool_success/tool_error are always written.
+        self.LOG_SINK: str = os.environ.get("LOG_SINK", "buffered")
+        self.LOG_BUFFER_SIZE: int = int(os.environ.get("LOG_BUFFER_SIZE", "10000"))
+        self.LOG_BATCH_SIZE: int = int(os.environ.get("LOG_BATCH_SIZE", "256"))
+        self.LOG_FLUSH_INTERVAL_SECONDS: float = float(os.environ.get("LOG_FLUSH_INTERVAL_SECONDS", "0.05"))
+        self.LOG_TOOL_INVOKED_SAMPLE_RATE: float = float(os.environ.get("LOG_TOOL_INVOKED_SAMPLE_RATE", "1.0"))
+
+        # Span export: "none", "otlp" (OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT)
+        # or "file" (NDJSON appended to TRACE_FILE_PATH)
+        self.TRACE_EXPORTER: str = os.environ.get("TRACE_EXPORTER", "none")
+        self.OTLP_ENDPOINT: str = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+        self.TRACE_FILE_PATH: str = os.environ.get("TRACE_FILE_PATH", "traces.ndjson")
+        self.TRACE_SERVICE_NAME: str = os.environ.get("OTEL_SERVICE_NAME", "restaurant-voice-hub")
+
+        # MCP: tool calls handled concurrently per session (stdio or HTTP)
+        self.MCP_MAX_CONCURRENCY: int = int(os.environ.get("MCP_MAX_CONCURRENCY", "16"))
+        # MCP over HTTP (/mcp): idle sessions expire, and the oldest are evicted
+        # past the cap
+        self.MCP_SESSION_TTL_SECONDS: float = float(os.environ.get("MCP_SESSION_TTL_SECONDS", "1800"))
+        self.MCP_MAX_SESSIONS: int = int(os.environ.get("MCP_MAX_SESSIONS", "10000"))
+
+        # Dashboard live feed (/events): frames buffered per connected screen
+        # before it is sent a resync instead, recent events kept per restaurant
+        # for screens that reconnect, and the keep-alive comment interval
+        self.LIVE_FEED_QUEUE_SIZE: int = int(os.environ.get("LIVE_FEED_QUEUE_SIZE", "1000"))
+        self.LIVE_FEED_REPLAY_SIZE: int = int(os.environ.get("LIVE_FEED_REPLAY_SIZE", "500"))
+        self.LIVE_FEED_HEARTBEAT_SECONDS: float = float(os.environ.get("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+
+
 settings = Settings()
+
+
+# Functions that re-apply settings to objects built from them at import time
+_reload_hooks: List[Callable[[], None]] = []
+
+
+def on_reload(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register `hook` to run whenever load_env() changes the settings."""
+    _reload_hooks.append(hook)
+    return hook
+
+
+def load_env() -> bool:
+    """Load a .env file into the environment, if there is one, and re-read
+    the settings. Called by the entry points at startup rather than on
+    import, before anything is served. Objects already built from the
+    settings (caches, the draft journal, the live feed) are brought up to
+    date by the hooks registered with on_reload()."""
+    from dotenv import load_dotenv
+
+    if not load_dotenv():
+        return False
+    settings.reload()
+    for hook in _reload_hooks:
+        hook()
+    return True
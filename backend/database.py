@@ -1,8 +1,120 @@
-from supabase import create_client, Client
+import time
+from typing import Tuple
+
 from backend.config import settings
+from backend.metrics import DB_QUERY_ERRORS, DB_QUERY_LATENCY
+from backend.observability import record_round_trip
+from backend.tracing import start_span
+
+# Storage backend: the remote PostgREST API, or an embedded SQLite file
+# exposing the same query-builder calls (see backend/sqlite_store.py).
+# The client is built on first use rather than at import, so processes that
+# never query (the MCP stdio server before its first tool call, tests, CLI
+# scripts) skip importing postgrest/httpx and opening the pool.
+http_client = None
+
+
+def _build_client():
+    global http_client
+    if settings.DB_BACKEND == "sqlite":
+        from backend.sqlite_store import SQLiteClient
+
+        return SQLiteClient(settings.SQLITE_PATH)
+
+    import httpx
+    from postgrest import AsyncPostgrestClient
+
+    # Fallback for local dev if not set
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        print("Warning: SUPABASE_URL or SUPABASE_API_KEY not found in environment variables.")
+
+    # One pooled HTTP/2 client for every PostgREST call: concurrent requests
+    # multiplex over a few warm keep-alive connections instead of each tool call
+    # borrowing a threadpool worker and opening its own connection.
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=settings.DB_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.DB_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DB_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.DB_POOL_KEEPALIVE_SECONDS,
+        ),
+        follow_redirects=True,
+    )
+
+    return AsyncPostgrestClient(
+        f"{settings.SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": settings.SUPABASE_KEY,
+            "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+        },
+        http_client=http_client,
+    )
+
+
+class LazyClient:
+    """Stands in for the storage client and builds it on first attribute access."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+
+    @property
+    def built(self) -> bool:
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+db = LazyClient(_build_client)
+
+
+async def close_db() -> None:
+    if not db.built:
+        return
+    if http_client is not None:
+        await http_client.aclose()
+    else:
+        db.close()
+
+
+# PostgREST verb -> operation label for metrics
+_OPERATIONS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+def query_labels(query) -> Tuple[str, str]:
+    """(table, operation) for a built query, for metrics and tracing."""
+    if hasattr(query, "table_name"):
+        # SQLite builders carry their labels.
+        return query.table_name, query.operation
+    request = query.request
+    table = str(request.path).rstrip("/").rsplit("/", 1)[-1]
+    operation = _OPERATIONS.get(request.http_method, request.http_method.lower())
+    if "/rpc/" in str(request.path):
+        table, operation = f"rpc:{table}", "rpc"
+    elif operation == "insert" and "merge-duplicates" in request.headers.get("Prefer", ""):
+        operation = "upsert"
+    return table, operation
 
-# Fallback for local dev if not set
-if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
-    print("Warning: SUPABASE_URL or SUPABASE_API_KEY not found in environment variables.")
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+async def execute(query):
+    """Run a built PostgREST query. Every service round trip goes through here."""
+    record_round_trip()
+    table, operation = query_labels(query)
+    start = time.perf_counter()
+    with start_span(f"db {operation} {table}", kind="client", require_parent=True,
+                    **{"db.system": getattr(query, "db_system", "postgrest"), "db.table": table,
+                       "db.operation": operation}):
+        try:
+            return await query.execute()
+        except Exception:
+            DB_QUERY_ERRORS.labels(table, operation).inc()
+            raise
+        finally:
+            DB_QUERY_LATENCY.labels(table, operation).observe(time.perf_counter() - start)
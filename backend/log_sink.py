@@ -0,0 +1,143 @@
+"""
+Buffered, non-blocking sink for the structured JSON log lines.
+
+Request threads only append the raw record to a bounded in-memory buffer. A
+background writer thread formats the timestamp, serializes the records and
+writes them to stdout in batches: one write and one flush per batch instead
+of per line. If the writer falls behind and the buffer fills, new records are
+dropped and counted, so the request path never blocks on logging.
+
+The stream is looked up as sys.stdout on every batch. The stdio MCP server
+points sys.stdout at stderr, so log lines stay off its JSON-RPC channel.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from backend.metrics import registry
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "voicehub_log_records_dropped_total", "Log records dropped because the log buffer was full.",
+)
+
+
+def serialize(record: Dict[str, Any]) -> str:
+    """One JSON line. `ts` arrives as epoch seconds and is written as ISO 8601 UTC."""
+    ts = record.get("ts")
+    if isinstance(ts, float):
+        record["ts"] = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+    return json.dumps(record, default=str)
+
+
+def write_sync(record: Dict[str, Any]) -> None:
+    """The unbuffered path: serialize and write one line on the caller's thread."""
+    print(serialize(record), flush=True)
+
+
+class BufferedLogSink:
+    def __init__(self, max_buffer: int = 10_000, batch_size: int = 256, flush_interval: float = 0.05):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        # deque.append/popleft are atomic, so producers never take a lock;
+        # the event only wakes an idle writer.
+        self._buffer: Deque[Any] = deque()
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_writer(self) -> None:
+        # Started lazily, and again in a forked worker, which inherits the
+        # buffer but not the thread.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._buffer.clear()
+            self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._writer.start()
+            self._pid = os.getpid()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Queue a record for writing; drop it if the buffer is full."""
+        self._ensure_writer()
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self._buffer.append(record)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(serialize(record))
+            except Exception as exc:
+                lines.append(json.dumps({"level": "ERROR", "event": "log_serialize_failed", "error": str(exc)}))
+        # Looked up per batch so a redirected stdout (tests, benchmarks) is honoured.
+        stream = sys.stdout
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+    def _drain(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        while True:
+            try:
+                item = self._buffer.popleft()
+            except IndexError:
+                break
+            if isinstance(item, threading.Event):
+                # A flush() marker: everything queued before it goes out first.
+                if batch:
+                    self._write_safely(batch)
+                    batch = []
+                item.set()
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_safely(batch)
+                batch = []
+        if batch:
+            self._write_safely(batch)
+
+    def _write_safely(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self._write(batch)
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every record queued so far has been written."""
+        if self._pid != os.getpid():
+            return
+        marker = threading.Event()
+        self._buffer.append(marker)
+        self._wake.set()
+        marker.wait(timeout)
+
+
+_sink: Optional[BufferedLogSink] = None
+
+
+def get_sink(max_buffer: int, batch_size: int, flush_interval: float) -> BufferedLogSink:
+    global _sink
+    if _sink is None:
+        _sink = BufferedLogSink(max_buffer, batch_size, flush_interval)
+        atexit.register(_sink.flush)
+    return _sink
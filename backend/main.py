@@ -1,9 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routers import tools, dashboard
+from backend.routers import tools, dashboard, events, mcp
+from backend.config import load_env, settings
+from backend.database import close_db, db
+from backend.metrics import CONTENT_TYPE, registry
+from backend.observability import flush_logs, log_error
+from backend.tracing import TraceContextMiddleware, flush_spans
+from backend.services.draft_orders import draft_orders
+from backend.services.menu_service import MenuService
+from backend.services.order_service import OrderService
+from backend.services.restaurant_service import RestaurantService
 
-app = FastAPI(title="Restaurant Voice Hub API")
+
+async def prewarm() -> None:
+    """Open the database client and load what the first calls will need.
+
+    Only draft recovery has to succeed: a failed cache warm-up is logged and
+    that cache fills on first use instead.
+    """
+    db.get()
+    restaurant_ids = [r.strip() for r in settings.PREWARM_RESTAURANT_IDS.split(",") if r.strip()]
+    warmups = {"kitchen_load": OrderService.seed_kitchen_load()}
+    for restaurant_id in restaurant_ids:
+        warmups[f"menu:{restaurant_id}"] = MenuService.get_menu_snapshot(restaurant_id)
+        warmups[f"settings:{restaurant_id}"] = RestaurantService.get_settings(restaurant_id)
+    # The first of these queries also opens the pooled connection.
+    recovered, *results = await asyncio.gather(
+        draft_orders.recover(), *warmups.values(), return_exceptions=True,
+    )
+    for step, result in zip(warmups, results):
+        if isinstance(result, Exception):
+            log_error("prewarm_failed", step=step, error=str(result))
+        elif isinstance(result, BaseException):
+            raise result
+    # Journalled drafts that were not replayed would be lost.
+    if isinstance(recovered, BaseException):
+        raise recovered
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_env()
+    await prewarm()
+    yield
+    await draft_orders.flush_all()
+    draft_orders.release_journal()
+    await close_db()
+    flush_spans()
+    flush_logs()
+
+
+app = FastAPI(title="Restaurant Voice Hub API", lifespan=lifespan)
 
 # Configuration
 app.add_middleware(
@@ -12,16 +62,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "Mcp-Session-Id"],
 )
+app.add_middleware(TraceContextMiddleware)
 
 # Include Routers
 app.include_router(tools.router)
 app.include_router(dashboard.router)
+app.include_router(events.router)
+app.include_router(mcp.router)
 
 @app.get("/health")
 def health_check():
     return {"ok": True, "time": datetime.now().isoformat()}
 
+@app.get("/metrics")
+def metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 @app.get("/")
 def root():
     return {"message": "Restaurant Voice Hub API is running"}
@@ -12,202 +12,205 @@ Run with:  python backend/mcp_server.py
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
 import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
 
 # ── Inline MCP transport (stdio) ─────────────────────────────────────────────
 # We implement a minimal JSON-RPC 2.0 / MCP stdio server without requiring
 # the `mcp` SDK so no new install is needed.  The server reads one JSON line
-# per request from stdin and writes one JSON line per response to stdout.
+# per request (or batch) from stdin and writes one JSON line per response to
+# stdout as soon as that request completes; see StdioSession.
 
 # ── Import existing services ──────────────────────────────────────────────────
 # Add project root to path so imports resolve from any working directory
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Services and models are imported lazily inside dispatch_tool so that importing
-# this module (e.g. in tests) does not require a live Supabase connection.
-from backend.config import settings
+# Services are imported lazily on first dispatch so that importing this module
+# (e.g. in tests) does not require a live Supabase connection.
+from backend.config import load_env, settings
 
 
 # ── Tool registry ─────────────────────────────────────────────────────────────
 
+# Input schemas are generated from the request models in backend/models.py,
+# so the MCP contract cannot drift from the HTTP one.
+from backend.models import (
+    EtaRequest,
+    HandoffRequest,
+    MenuResolveBatchRequest,
+    MenuSearchRequest,
+    OrderConfirmRequest,
+    OrderCreateRequest,
+    OrderEditRequest,
+)
+
+_TOOL_DEFINITIONS = [
+    ("menu_search", MenuSearchRequest,
+     "Search the restaurant menu by keyword. Returns matching items with name, category, price, and description."),
+    ("menu_resolve_batch", MenuResolveBatchRequest,
+     "Match every item the caller listed (e.g. 'two cheeseburgers', 'a large fries') to menu items in one call. "
+     "Returns each match with a confidence score, and order_items ready for order_create_or_update."),
+    ("order_create_or_update", OrderCreateRequest,
+     "Create a new order or update an existing pending order with additional items."),
+    ("order_edit", OrderEditRequest,
+     "Change an existing pending order line by line (add_item, remove_item, set_quantity, set_modifier) "
+     "without resending the whole cart. Pass the version from the last order response as base_version. "
+     "Returns the updated totals."),
+    ("get_eta", EtaRequest,
+     "Get the estimated preparation time for a restaurant order."),
+    ("order_confirm", OrderConfirmRequest,
+     "Confirm a pending order and mark it as accepted."),
+    ("handoff_to_human", HandoffRequest,
+     "Escalate the call to a human agent when the AI cannot handle the request."),
+]
+
+
+def _inline_schema(node: Any, defs: Dict[str, Any]) -> Any:
+    """Resolve $refs and drop pydantic's titles and null branches, for hosts
+    that expect a plain, self-contained JSON schema."""
+    if isinstance(node, list):
+        return [_inline_schema(n, defs) for n in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        return _inline_schema(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+    branches = [b for b in node.get("anyOf", []) if b.get("type") != "null"]
+    if len(branches) == 1:
+        rest = {k: v for k, v in node.items() if k != "anyOf" and not (k == "default" and v is None)}
+        return _inline_schema({**branches[0], **rest}, defs)
+    return {k: _inline_schema(v, defs) for k, v in node.items() if k not in ("title", "$defs")}
+
+
+def input_schema(model) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    inlined = _inline_schema(schema, schema.get("$defs", {}))
+    inlined.setdefault("required", [])
+    return inlined
+
+
 TOOLS = {
-    "menu_search": {
-        "name": "menu_search",
-        "description": "Search the restaurant menu by keyword. Returns matching items with name, category, price, and description.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "restaurant_id": {
-                    "type": "string",
-                    "description": "The restaurant identifier (defaults to the configured default).",
-                },
-                "query": {
-                    "type": "string",
-                    "description": "Optional keyword to filter menu items.",
-                },
-                "limit": {
-                    "type": "integer",
-                    "description": "Maximum number of items to return (default 20).",
-                    "default": 20,
-                },
-            },
-            "required": [],
-        },
-    },
-    "order_create_or_update": {
-        "name": "order_create_or_update",
-        "description": "Create a new order or update an existing pending order with additional items.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "restaurant_id": {"type": "string"},
-                "call_id": {
-                    "type": "string",
-                    "description": "ElevenLabs call identifier for the current session.",
-                },
-                "customer_name": {"type": "string"},
-                "phone": {"type": "string"},
-                "fulfillment": {
-                    "type": "string",
-                    "enum": ["pickup", "delivery"],
-                    "description": "Fulfillment type (default: pickup).",
-                },
-                "items": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "item_id": {"type": "string"},
-                            "quantity": {"type": "integer"},
-                            "modifier_selections": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "modifier_name": {"type": "string"},
-                                        "option": {"type": "string"},
-                                    },
-                                    "required": ["modifier_name", "option"],
-                                },
-                            },
-                            "special_instructions": {"type": "string"},
-                        },
-                        "required": ["item_id", "quantity"],
-                    },
-                },
-                "order_id": {
-                    "type": "string",
-                    "description": "Existing order ID to update (omit to create new).",
-                },
-                "notes": {"type": "string"},
-            },
-            "required": ["restaurant_id", "call_id"],
-        },
-    },
-    "get_eta": {
-        "name": "get_eta",
-        "description": "Get the estimated preparation time for a restaurant order.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "restaurant_id": {"type": "string"},
-                "order_id": {"type": "string"},
-            },
-            "required": ["restaurant_id", "order_id"],
-        },
-    },
-    "order_confirm": {
-        "name": "order_confirm",
-        "description": "Confirm a pending order and mark it as accepted.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "restaurant_id": {"type": "string"},
-                "order_id": {"type": "string"},
-                "payment_mode": {
-                    "type": "string",
-                    "enum": ["pay_at_pickup", "payment_link"],
-                    "description": "Payment mode (default: pay_at_pickup).",
-                },
-            },
-            "required": ["restaurant_id", "order_id"],
-        },
-    },
-    "handoff_to_human": {
-        "name": "handoff_to_human",
-        "description": "Escalate the call to a human agent when the AI cannot handle the request.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "restaurant_id": {"type": "string"},
-                "call_id": {"type": "string"},
-                "reason": {"type": "string", "description": "Reason for escalation."},
-                "order_id": {"type": "string"},
-                "summary_for_human": {"type": "string"},
-            },
-            "required": ["restaurant_id", "call_id", "reason"],
-        },
-    },
+    name: {"name": name, "description": description, "inputSchema": input_schema(model)}
+    for name, model, description in _TOOL_DEFINITIONS
 }
 
 
 # ── Tool dispatcher ───────────────────────────────────────────────────────────
 
-def dispatch_tool(name: str, arguments: dict) -> str:
-    """Call the underlying service and return the result as a JSON string."""
-    # Lazy imports so that loading this module does not require a live DB connection.
+# Services are async. The stdio server and the sync helpers below share one
+# long-lived event loop, so the pooled database client stays bound to it.
+_loop = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def _run(coro):
+    return _get_loop().run_until_complete(coro)
+
+
+class ToolHandler:
+    """A tool's request model and the coroutine function that serves it."""
+    __slots__ = ("name", "request_model", "call")
+
+    def __init__(self, name: str, request_model, call: Callable[[Any], Awaitable[Any]]):
+        self.name = name
+        self.request_model = request_model
+        self.call = call
+
+
+_handlers: Optional[Dict[str, ToolHandler]] = None
+
+
+def _build_handlers() -> Dict[str, ToolHandler]:
+    # Imported on first dispatch, not at module load, so that loading this
+    # module (e.g. in tests) does not set up the database client.
+    from backend.observability import trace_tool
     from backend.services.menu_service import MenuService
     from backend.services.order_service import OrderService
-    from backend.models import (
-        OrderCreateRequest,
-        EtaRequest,
-        OrderConfirmRequest,
-        HandoffRequest,
-    )
-
-    if name == "menu_search":
-        result = MenuService.search_menu(
-            restaurant_id=arguments.get("restaurant_id", settings.DEFAULT_RESTAURANT_ID),
-            query=arguments.get("query"),
-            limit=arguments.get("limit", 20),
-        )
-        return json.dumps(result.dict() if hasattr(result, "dict") else result)
-
-    elif name == "order_create_or_update":
-        req = OrderCreateRequest(**arguments)
-        result = OrderService.create_or_update_order(req)
-        return json.dumps(result.dict() if hasattr(result, "dict") else result)
-
-    elif name == "get_eta":
-        req = EtaRequest(**arguments)
+
+    calls = {
+        "menu_search": lambda req: MenuService.search_menu(
+            restaurant_id=req.restaurant_id or settings.DEFAULT_RESTAURANT_ID,
+            query=req.query,
+            limit=req.limit,
+        ),
+        "menu_resolve_batch": lambda req: MenuService.resolve_items(
+            req.restaurant_id or settings.DEFAULT_RESTAURANT_ID, req.items,
+        ),
+        "order_create_or_update": OrderService.create_or_update_order,
+        "order_edit": OrderService.edit_order,
         # OrderService.get_eta computes ETA from kitchen load; order_id is
         # validated by EtaRequest but the underlying service only needs restaurant_id.
-        result = OrderService.get_eta(req.restaurant_id)
-        return json.dumps(result.dict() if hasattr(result, "dict") else result)
+        "get_eta": lambda req: OrderService.get_eta(req.restaurant_id),
+        "order_confirm": OrderService.confirm_order,
+        "handoff_to_human": OrderService.handoff_to_human,
+    }
+    return {
+        name: ToolHandler(name, model, trace_tool(name)(_as_coroutine_function(calls[name])))
+        for name, model, _ in _TOOL_DEFINITIONS
+    }
+
 
-    elif name == "order_confirm":
-        req = OrderConfirmRequest(**arguments)
-        result = OrderService.confirm_order(req)
-        return json.dumps(result.dict() if hasattr(result, "dict") else result)
+def _as_coroutine_function(call: Callable[[Any], Awaitable[Any]]) -> Callable[[Any], Awaitable[Any]]:
+    # trace_tool times the awaited call only for `async def` functions, and
+    # the lambdas above just return a coroutine.
+    async def run(req):
+        return await call(req)
+    return run
 
-    elif name == "handoff_to_human":
-        req = HandoffRequest(**arguments)
-        result = OrderService.handoff_to_human(req)
-        return json.dumps(result.dict() if hasattr(result, "dict") else result)
 
-    else:
+def get_handler(name: str) -> ToolHandler:
+    global _handlers
+    if _handlers is None:
+        _handlers = _build_handlers()
+    handler = _handlers.get(name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {name}")
+    return handler
+
+
+def _serialize(result: Any) -> str:
+    # pydantic's JSON dump runs in its compiled core, with no intermediate dict.
+    if hasattr(result, "model_dump_json"):
+        return result.model_dump_json()
+    return json.dumps(result)
+
+
+async def dispatch_tool_async(name: str, arguments: dict) -> str:
+    """Call the underlying service and return the result as a JSON string."""
+    handler = get_handler(name)
+    result = await handler.call(handler.request_model.model_validate(arguments))
+    return _serialize(result)
+
+
+def dispatch_tool(name: str, arguments: dict) -> str:
+    """Blocking wrapper around dispatch_tool_async."""
+    return _run(dispatch_tool_async(name, arguments))
 
 
 # ── JSON-RPC / MCP handler ────────────────────────────────────────────────────
 
-def handle_request(request: dict) -> dict:
+def jsonrpc_error(req_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+
+async def handle_request_async(request: dict) -> Optional[dict]:
+    """Handle one JSON-RPC message. Returns None for notifications (no `id`)."""
     method = request.get("method", "")
     req_id = request.get("id")
     params = request.get("params", {})
 
+    # Notifications (e.g. notifications/initialized) never get a response
+    if "id" not in request:
+        return None
+
     # MCP initialize handshake
     if method == "initialize":
         return {
@@ -233,7 +236,7 @@ def handle_request(request: dict) -> dict:
         tool_name = params.get("name", "")
         arguments = params.get("arguments", {})
         try:
-            content = dispatch_tool(tool_name, arguments)
+            content = await dispatch_tool_async(tool_name, arguments)
             return {
                 "jsonrpc": "2.0",
                 "id": req_id,
@@ -253,33 +256,199 @@ def handle_request(request: dict) -> dict:
             }
 
     # Unknown method
-    return {
-        "jsonrpc": "2.0",
-        "id": req_id,
-        "error": {"code": -32601, "message": f"Method not found: {method}"},
-    }
+    return jsonrpc_error(req_id, -32601, f"Method not found: {method}")
 
 
-# ── stdio transport loop ──────────────────────────────────────────────────────
+def handle_request(request: dict) -> Optional[dict]:
+    """Blocking wrapper around handle_request_async."""
+    return _run(handle_request_async(request))
 
-def run_stdio():
-    """Read JSON-RPC requests from stdin, write responses to stdout."""
-    print("[mcp_server] Restaurant Voice Hub MCP server started (stdio)", file=sys.stderr, flush=True)
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+
+# ── Sessions ──────────────────────────────────────────────────────────────────
+
+class McpSession:
+    """Per-client state shared by the transports: a limit on concurrent tool
+    calls and the in-flight calls by request id, for cancellation."""
+
+    def __init__(self, max_concurrency: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+
+    async def _handle(self, request: dict) -> Optional[dict]:
+        if request.get("method") == "tools/call":
+            async with self._semaphore:
+                return await handle_request_async(request)
+        return await handle_request_async(request)
+
+    def spawn(self, request: dict) -> asyncio.Task:
+        """Start handling one message as its own task."""
+        task = asyncio.ensure_future(self._handle(request))
+        req_id = request.get("id")
+        if req_id is not None:
+            self._in_flight[req_id] = task
+
+            def _forget(done: asyncio.Task) -> None:
+                if self._in_flight.get(req_id) is done:
+                    del self._in_flight[req_id]
+            task.add_done_callback(_forget)
+        return task
+
+    def cancel(self, params: dict) -> None:
+        """Handle notifications/cancelled: cancel the named call if still running."""
+        task = self._in_flight.get(params.get("requestId"))
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self) -> None:
+        for task in list(self._in_flight.values()):
+            task.cancel()
+
+
+# ── stdio transport ───────────────────────────────────────────────────────────
+
+class StdioSession(McpSession):
+    """Dispatches JSON-RPC messages concurrently and writes each response when ready.
+
+    Tool calls run as separate tasks, at most `max_concurrency` at once, so a
+    slow order_confirm does not hold up a menu_search sent after it. Responses
+    carry the request `id` and may arrive out of order. A batch (JSON array)
+    gets a single array response once all its calls finish. A
+    notifications/cancelled message cancels the named in-flight call, and no
+    response is sent for it.
+    """
+
+    def __init__(self, write_line: Callable[[str], None], max_concurrency: int):
+        super().__init__(max_concurrency)
+        self._write_line = write_line
+        self._pending: Set[asyncio.Task] = set()
+
+    def _write(self, response) -> None:
+        self._write_line(json.dumps(response))
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _write_result(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            print(f"[mcp_server] request failed: {exc!r}", file=sys.stderr, flush=True)
+            return
+        if task.result() is not None:
+            self._write(task.result())
+
+    async def _batch(self, messages: list) -> None:
+        responses = []
+        tasks = []
+        for message in messages:
+            if not isinstance(message, dict):
+                responses.append(jsonrpc_error(None, -32600, "Invalid Request"))
+            elif message.get("method") == "notifications/cancelled":
+                self.cancel(message.get("params") or {})
+            else:
+                tasks.append(self.spawn(message))
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, dict):
+                responses.append(result)
+        if responses:
+            self._write(responses)
+
+    def submit(self, line: str) -> None:
+        """Parse one input line and start handling it without waiting for the result."""
         try:
-            request = json.loads(line)
+            message = json.loads(line)
         except json.JSONDecodeError as exc:
-            response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {"code": -32700, "message": f"Parse error: {exc}"},
-            }
+            self._write(jsonrpc_error(None, -32700, f"Parse error: {exc}"))
+            return
+
+        if isinstance(message, list):
+            if not message:
+                self._write(jsonrpc_error(None, -32600, "Invalid Request: empty batch"))
+                return
+            self._track(asyncio.ensure_future(self._batch(message)))
+        elif not isinstance(message, dict):
+            self._write(jsonrpc_error(None, -32600, "Invalid Request"))
+        elif message.get("method") == "notifications/cancelled":
+            self.cancel(message.get("params") or {})
         else:
-            response = handle_request(request)
-        print(json.dumps(response), flush=True)
+            task = self.spawn(message)
+            task.add_done_callback(self._write_result)
+            self._track(task)
+
+    async def drain(self) -> None:
+        """Wait for every request started so far (used at end of input)."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+
+async def serve(
+    read_line: Callable[[], Awaitable[bytes]],
+    write_line: Callable[[str], None],
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """Read messages until EOF, handling them concurrently."""
+    session = StdioSession(write_line, max_concurrency or settings.MCP_MAX_CONCURRENCY)
+    while True:
+        line = await read_line()
+        if not line:
+            break
+        line = line.strip()
+        if line:
+            session.submit(line.decode("utf-8") if isinstance(line, bytes) else line)
+    await session.drain()
+
+
+async def serve_process(
+    read_line: Callable[[], Awaitable[bytes]],
+    write_line: Callable[[str], None],
+) -> None:
+    """serve() between the startup and shutdown steps the HTTP app runs in
+    its lifespan: open drafts are recovered first, and written out at the
+    end, since their write-behind timers die with the loop."""
+    from backend.database import close_db
+    from backend.observability import flush_logs
+    from backend.services.draft_orders import draft_orders
+    from backend.tracing import flush_spans
+
+    await draft_orders.recover()
+    try:
+        await serve(read_line, write_line)
+    finally:
+        await draft_orders.flush_all()
+        draft_orders.release_journal()
+        await close_db()
+        flush_spans()
+        flush_logs()
+
+
+def run_stdio():
+    """Read JSON-RPC requests from stdin, write responses to stdout."""
+    # stdout is the JSON-RPC channel. Everything else that writes to it,
+    # the structured log sink and stray prints, is sent to stderr instead.
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+    load_env()
+    print("[mcp_server] Restaurant Voice Hub MCP server started (stdio)", file=sys.stderr, flush=True)
+    loop = _get_loop()
+
+    async def read_line() -> bytes:
+        # A blocking readline in a worker thread works for pipes, files and
+        # terminals alike, and keeps the loop free to run tool calls.
+        return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+    def write_line(text: str) -> None:
+        protocol.write(text + "\n")
+        protocol.flush()
+
+    task = loop.create_task(serve_process(read_line, write_line))
+    try:
+        loop.run_until_complete(task)
+    except KeyboardInterrupt:
+        # Cancelling the task still runs its shutdown steps.
+        task.cancel()
+        loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
-from pydantic import BaseModel
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Literal
 
 class ModifierOption(BaseModel):
     name: str
     options: List[str]
+    required: bool = False
+    min_selections: int = 0
+    max_selections: Optional[int] = None
+    # option -> price added per unit, e.g. {"Large": 1.5}
+    price_adjustments: Dict[str, float] = {}
 
 class MenuItem(BaseModel):
     item_id: str
@@ -11,12 +16,18 @@ class MenuItem(BaseModel):
     category: str
     price: float
     availability: bool
+    description: Optional[str] = None
     modifiers: List[ModifierOption] = []
 
 class MenuResponse(BaseModel):
     matches: List[MenuItem]
     notes: Optional[str] = None
 
+class MenuSearchRequest(BaseModel):
+    restaurant_id: Optional[str] = Field(None, description="The restaurant identifier (defaults to the configured default).")
+    query: Optional[str] = Field(None, description="Optional keyword to filter menu items.")
+    limit: int = Field(20, description="Maximum number of items to return (default 20).")
+
 class ModifierSelection(BaseModel):
     modifier_name: str
     option: str
@@ -27,19 +38,59 @@ class OrderItem(BaseModel):
     modifier_selections: List[ModifierSelection] = []
     special_instructions: Optional[str] = None
 
+class SpokenItem(BaseModel):
+    phrase: str = Field(..., description="One item as the caller said it, e.g. 'two large fries'.")
+    quantity: Optional[int] = Field(None, description="Quantity, if known separately. Otherwise read from the phrase (default 1).")
+
+class MenuResolveBatchRequest(BaseModel):
+    restaurant_id: Optional[str] = Field(None, description="The restaurant identifier (defaults to the configured default).")
+    items: List[SpokenItem] = Field(..., description="Every item the caller listed, in the order they said them.")
+
+class ResolvedItem(BaseModel):
+    phrase: str
+    item_id: Optional[str] = None
+    name: Optional[str] = None
+    quantity: int
+    modifier_selections: List[ModifierSelection] = []
+    available: bool = False
+    confidence: float = Field(..., description="0 to 1. Low values mean the phrase should be confirmed with the caller.")
+    alternatives: List[str] = []
+
+class MenuResolveBatchResponse(BaseModel):
+    matches: List[ResolvedItem]
+    order_items: List[OrderItem] = Field(..., description="Confident, available matches, ready for order_create_or_update.")
+    unresolved: List[str] = Field(..., description="Phrases to confirm with the caller.")
+
 class OrderCreateRequest(BaseModel):
     restaurant_id: str
-    call_id: str
-    order_id: Optional[str] = None
-    fulfillment: Literal["pickup", "delivery"] = "pickup"
+    call_id: str = Field(..., description="ElevenLabs call identifier for the current session.")
+    order_id: Optional[str] = Field(None, description="Existing order ID to update (omit to create new).")
+    fulfillment: Literal["pickup", "delivery"] = Field("pickup", description="Fulfillment type (default: pickup).")
     customer_name: Optional[str] = None
     phone: Optional[str] = None
     items: List[OrderItem] = []
     notes: Optional[str] = None
 
+class OrderEditOperation(BaseModel):
+    op: Literal["add_item", "remove_item", "set_quantity", "set_modifier"] = Field(..., description="The change to make to the order.")
+    item_id: str = Field(..., description="Menu item of the line to add or change.")
+    quantity: Optional[int] = Field(None, description="add_item: how many to add (default 1). set_quantity: the new quantity; 0 removes the line.")
+    modifier_selections: List[ModifierSelection] = Field([], description="add_item: the new line's modifiers. Otherwise picks the line when the item is in the order more than once.")
+    special_instructions: Optional[str] = None
+    modifier_name: Optional[str] = Field(None, description="set_modifier: the modifier to set, e.g. 'Size'.")
+    option: Optional[str] = Field(None, description="set_modifier: the chosen option.")
+
+class OrderEditRequest(BaseModel):
+    restaurant_id: str
+    call_id: str = Field(..., description="ElevenLabs call identifier for the current session.")
+    order_id: str = Field(..., description="The order to change, as returned by order_create_or_update.")
+    operations: List[OrderEditOperation] = Field(..., description="Changes applied in order. Only the lines they touch are validated.")
+    base_version: int = Field(..., description="The version from the last order response. A retry with the same version is applied once; send the new version with each new change.")
+
 class OrderResponse(BaseModel):
     order_id: str
     status: Literal["draft", "confirmed", "cancelled"]
+    version: int = Field(0, description="Changes whenever the order does; pass it as base_version to order_edit.")
     subtotal: float
     tax: float
     total: float
@@ -58,7 +109,7 @@ class EtaResponse(BaseModel):
 class OrderConfirmRequest(BaseModel):
     restaurant_id: str
     order_id: str
-    payment_mode: Literal["pay_at_pickup", "payment_link"] = "pay_at_pickup"
+    payment_mode: Literal["pay_at_pickup", "payment_link"] = Field("pay_at_pickup", description="Payment mode (default: pay_at_pickup).")
 
 class OrderConfirmResponse(BaseModel):
     confirmed: bool
@@ -72,7 +123,7 @@ class OrderConfirmResponse(BaseModel):
 class HandoffRequest(BaseModel):
     restaurant_id: str
     call_id: str
-    reason: str
+    reason: str = Field(..., description="Reason for escalation.")
     order_id: Optional[str] = None
     summary_for_human: Optional[str] = None
 
@@ -87,3 +138,19 @@ class FAQItem(BaseModel):
     id: Optional[str] = None
     question: str
     answer: str
+
+class RestaurantSettings(BaseModel):
+    restaurant_id: str
+    name: Optional[str] = None
+    tax_rate: float
+    base_eta_minutes: int
+    eta_max_load_minutes: int
+    timezone: str
+
+class RestaurantSettingsUpdate(BaseModel):
+    # Omitted fields are left as they are; null resets one to the global default
+    name: Optional[str] = None
+    tax_rate: Optional[float] = Field(None, ge=0, le=1)
+    base_eta_minutes: Optional[int] = Field(None, ge=0)
+    eta_max_load_minutes: Optional[int] = Field(None, ge=0)
+    timezone: Optional[str] = Field(None, description="IANA zone, e.g. America/New_York.")
@@ -1,24 +1,64 @@
 """
 Structured observability for restaurant-voice-hub.
 Emits JSON log lines for every tool invocation, error, and pipeline event.
+Lines are written by a background thread (see log_sink) unless LOG_SINK=sync.
 """
-import json
+import inspect
+import random
 import time
-import uuid
-from datetime import datetime, timezone
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, List, Optional
+
+from backend.config import on_reload, settings
+from backend.log_sink import get_sink, write_sync
+from backend.metrics import TOOL_ERRORS, TOOL_IN_FLIGHT, TOOL_LATENCY
+from backend.tracing import Span, start_span
+
+# Per-tool-call database round-trip counter. A one-element list so tasks
+# spawned by asyncio.gather (which copy the context) share the same count.
+_db_round_trips: ContextVar[Optional[List[int]]] = ContextVar("db_round_trips", default=None)
+
+
+# INFO events written only for a fraction of calls. Errors are never sampled.
+_SAMPLE_RATES = {"tool_invoked": settings.LOG_TOOL_INVOKED_SAMPLE_RATE}
+
+
+@on_reload
+def _apply_settings() -> None:
+    _SAMPLE_RATES["tool_invoked"] = settings.LOG_TOOL_INVOKED_SAMPLE_RATE
+
+
+def _write(record: dict) -> None:
+    if settings.LOG_SINK == "sync":
+        write_sync(record)
+    else:
+        get_sink(settings.LOG_BUFFER_SIZE, settings.LOG_BATCH_SIZE, settings.LOG_FLUSH_INTERVAL_SECONDS).submit(record)
 
 
 def _emit(level: str, event: str, **fields: Any) -> None:
-    """Emit a structured JSON log line."""
+    """Emit a structured JSON log line.
+
+    The record is serialized by the log writer thread, so fields should not
+    be mutated after they are logged.
+    """
+    if level == "INFO":
+        rate = _SAMPLE_RATES.get(event)
+        if rate is not None and rate < 1.0 and random.random() >= rate:
+            return
     record = {
-        "ts": datetime.now(timezone.utc).isoformat(),
+        "ts": time.time(),
         "level": level,
         "event": event,
         **fields,
     }
-    print(json.dumps(record), flush=True)
+    _write(record)
+
+
+def flush_logs() -> None:
+    """Wait for buffered log lines to be written (tests, shutdown)."""
+    if settings.LOG_SINK != "sync":
+        get_sink(settings.LOG_BUFFER_SIZE, settings.LOG_BATCH_SIZE, settings.LOG_FLUSH_INTERVAL_SECONDS).flush()
 
 
 def log_info(event: str, **fields: Any) -> None:
@@ -33,41 +73,110 @@ def log_warn(event: str, **fields: Any) -> None:
     _emit("WARN", event, **fields)
 
 
+def record_round_trip() -> None:
+    """Count one database round trip against the current tool call, if any."""
+    counter = _db_round_trips.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def _call_id(args: tuple, kwargs: dict) -> Optional[str]:
+    """The voice call this tool invocation belongs to, if its request carries one."""
+    for value in list(kwargs.values()) + list(args):
+        call_id = getattr(value, "call_id", None)
+        if isinstance(call_id, str):
+            return call_id
+    return None
+
+
 def trace_tool(tool_name: str) -> Callable:
     """
     Decorator that wraps a tool endpoint function with structured logging.
     Logs: tool name, request payload, response, latency_ms, and any errors.
+    Opens the parent span for the call; trace_id in the logs is the span's
+    trace id, and call_id (when the request has one) is on both.
+    Works on both plain and `async def` endpoints.
     """
     def decorator(fn: Callable) -> Callable:
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            trace_id = str(uuid.uuid4())[:8]
-            start = time.perf_counter()
+        latency_metric = TOOL_LATENCY.labels(tool_name)
+        in_flight_metric = TOOL_IN_FLIGHT.labels(tool_name)
+
+        def _start(span: Span, call_id: Optional[str]) -> tuple:
+            span.set_attribute("call_id", call_id)
             log_info(
                 "tool_invoked",
                 tool=tool_name,
-                trace_id=trace_id,
+                trace_id=span.trace_id,
+                call_id=call_id,
+            )
+            counter = [0]
+            token = _db_round_trips.set(counter)
+            in_flight_metric.inc()
+            return time.perf_counter(), counter, token
+
+        def _success(span: Span, call_id: Optional[str], start: float, counter: List[int]) -> None:
+            elapsed = time.perf_counter() - start
+            latency_metric.observe(elapsed)
+            latency_ms = round(elapsed * 1000, 2)
+            span.set_attribute("db_round_trips", counter[0])
+            log_info(
+                "tool_success",
+                tool=tool_name,
+                trace_id=span.trace_id,
+                call_id=call_id,
+                latency_ms=latency_ms,
+                db_round_trips=counter[0],
             )
-            try:
-                result = fn(*args, **kwargs)
-                latency_ms = round((time.perf_counter() - start) * 1000, 2)
-                log_info(
-                    "tool_success",
-                    tool=tool_name,
-                    trace_id=trace_id,
-                    latency_ms=latency_ms,
-                )
+
+        def _failure(span: Span, call_id: Optional[str], start: float, counter: List[int], exc: Exception) -> None:
+            elapsed = time.perf_counter() - start
+            latency_metric.observe(elapsed)
+            TOOL_ERRORS.labels(tool_name, type(exc).__name__).inc()
+            latency_ms = round(elapsed * 1000, 2)
+            span.set_attribute("db_round_trips", counter[0])
+            log_error(
+                "tool_error",
+                tool=tool_name,
+                trace_id=span.trace_id,
+                call_id=call_id,
+                latency_ms=latency_ms,
+                db_round_trips=counter[0],
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                call_id = _call_id(args, kwargs)
+                with start_span(f"tool {tool_name}", kind="server", tool=tool_name) as span:
+                    start, counter, token = _start(span, call_id)
+                    try:
+                        result = await fn(*args, **kwargs)
+                    except Exception as exc:
+                        _failure(span, call_id, start, counter, exc)
+                        raise
+                    finally:
+                        _db_round_trips.reset(token)
+                        in_flight_metric.dec()
+                    _success(span, call_id, start, counter)
+                    return result
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_id = _call_id(args, kwargs)
+            with start_span(f"tool {tool_name}", kind="server", tool=tool_name) as span:
+                start, counter, token = _start(span, call_id)
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as exc:
+                    _failure(span, call_id, start, counter, exc)
+                    raise
+                finally:
+                    _db_round_trips.reset(token)
+                    in_flight_metric.dec()
+                _success(span, call_id, start, counter)
                 return result
-            except Exception as exc:
-                latency_ms = round((time.perf_counter() - start) * 1000, 2)
-                log_error(
-                    "tool_error",
-                    tool=tool_name,
-                    trace_id=trace_id,
-                    latency_ms=latency_ms,
-                    error=str(exc),
-                    error_type=type(exc).__name__,
-                )
-                raise
         return wrapper
     return decorator
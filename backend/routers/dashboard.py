@@ -1,71 +1,135 @@
 from typing import List, Optional
 from fastapi import APIRouter, UploadFile, File, Query, Form
-from backend.models import AvailabilityUpdate, FAQItem
+from backend.models import AvailabilityUpdate, FAQItem, RestaurantSettingsUpdate
 from backend.services.menu_service import MenuService
-from backend.services.order_service import OrderService
-from backend.services.stats_service import StatsService
+from backend.services.order_service import ORDER_COLUMNS, OrderService
+from backend.services.restaurant_service import RestaurantService
+from backend.services.stats_service import CALL_LOG_EXPORT_COLUMNS, StatsService
+from backend.services.export import export_response
 from backend.config import settings
 
 router = APIRouter(tags=["Dashboard"])
 
 
 @router.get("/menu")
-def get_menu(restaurant_id: str = settings.DEFAULT_RESTAURANT_ID):
-    return MenuService.get_menu(restaurant_id)
+async def get_menu(restaurant_id: Optional[str] = None):
+    return await MenuService.get_menu(restaurant_id or settings.DEFAULT_RESTAURANT_ID)
+
+
+@router.get("/menu/cache/stats")
+def get_menu_cache_stats():
+    return MenuService.get_cache_stats()
 
 
 @router.put("/menu/{item_id}/availability")
-def update_item_availability(item_id: str, update: AvailabilityUpdate):
-    return MenuService.update_availability(item_id, update.available)
+async def update_item_availability(item_id: str, update: AvailabilityUpdate):
+    return await MenuService.update_availability(item_id, update.available)
 
 
 @router.post("/menu/upload")
 async def upload_menu(
     file: UploadFile = File(...),
-    restaurant_id: str = Form(settings.DEFAULT_RESTAURANT_ID),
+    restaurant_id: Optional[str] = Form(None),
 ):
-    return await MenuService.upload_menu_csv(file, restaurant_id)
+    return await MenuService.upload_menu_csv(file, restaurant_id or settings.DEFAULT_RESTAURANT_ID)
 
 
 @router.get("/orders")
-def get_orders_dashboard(
-    restaurant_id: str = settings.DEFAULT_RESTAURANT_ID,
+async def get_orders_dashboard(
+    restaurant_id: Optional[str] = None,
+    range: str = Query("today"),
+    status: Optional[str] = Query(None),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    return await OrderService.get_orders(
+        restaurant_id or settings.DEFAULT_RESTAURANT_ID, range, status, start_date, end_date, cursor, limit, fields
+    )
+
+
+@router.get("/orders/export")
+async def export_orders(
+    restaurant_id: Optional[str] = None,
     range: str = Query("today"),
     status: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    format: str = Query("ndjson"),
 ):
-    return OrderService.get_orders(restaurant_id, range, status, start_date, end_date)
+    rows = OrderService.iter_orders(restaurant_id or settings.DEFAULT_RESTAURANT_ID, range, status, start_date, end_date)
+    return export_response(rows, format, ORDER_COLUMNS, "orders")
 
 
 @router.get("/calls")
-def get_calls_dashboard(
-    restaurant_id: str = settings.DEFAULT_RESTAURANT_ID,
+async def get_calls_dashboard(
+    restaurant_id: Optional[str] = None,
     range: str = Query("today"),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
 ):
-    return StatsService.get_call_logs(restaurant_id, range, start_date, end_date)
+    return await StatsService.get_call_logs(
+        restaurant_id or settings.DEFAULT_RESTAURANT_ID, range, start_date, end_date, cursor, limit, fields
+    )
+
+
+@router.get("/calls/export")
+async def export_calls(
+    restaurant_id: Optional[str] = None,
+    range: str = Query("today"),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    format: str = Query("ndjson"),
+):
+    rows = StatsService.iter_call_logs(restaurant_id or settings.DEFAULT_RESTAURANT_ID, range, start_date, end_date)
+    return export_response(rows, format, CALL_LOG_EXPORT_COLUMNS, "calls")
 
 
 @router.get("/calls/{call_id}")
-def get_call_detail(call_id: str, restaurant_id: str = settings.DEFAULT_RESTAURANT_ID):
-    return StatsService.get_call_detail(call_id, restaurant_id)
+async def get_call_detail(call_id: str, restaurant_id: Optional[str] = None):
+    return await StatsService.get_call_detail(call_id, restaurant_id or settings.DEFAULT_RESTAURANT_ID)
 
 
 @router.get("/faqs")
-def get_faqs(restaurant_id: str = settings.DEFAULT_RESTAURANT_ID):
-    return StatsService.get_faqs_list(restaurant_id)
+async def get_faqs(restaurant_id: Optional[str] = None):
+    return await StatsService.get_faqs_list(restaurant_id or settings.DEFAULT_RESTAURANT_ID)
 
 
 @router.put("/faqs/bulk")
-def bulk_update_faqs(
+async def bulk_update_faqs(
     faqs: List[FAQItem],
-    restaurant_id: str = settings.DEFAULT_RESTAURANT_ID,
+    restaurant_id: Optional[str] = None,
 ):
-    return StatsService.bulk_replace_faqs(restaurant_id, [f.dict() for f in faqs])
+    return await StatsService.bulk_replace_faqs(restaurant_id or settings.DEFAULT_RESTAURANT_ID, [f.dict() for f in faqs])
 
 
 @router.get("/stats")
-def get_stats(restaurant_id: str = settings.DEFAULT_RESTAURANT_ID):
-    return StatsService.get_stats(restaurant_id)
+async def get_stats(restaurant_id: Optional[str] = None):
+    return await StatsService.get_stats(restaurant_id or settings.DEFAULT_RESTAURANT_ID)
+
+
+@router.get("/restaurants/settings/cache/stats")
+def get_restaurant_settings_cache_stats():
+    return RestaurantService.get_cache_stats()
+
+
+@router.get("/restaurants/{restaurant_id}/settings")
+async def get_restaurant_settings(restaurant_id: str):
+    return await RestaurantService.get_settings(restaurant_id)
+
+
+@router.put("/restaurants/{restaurant_id}/settings")
+async def update_restaurant_settings(restaurant_id: str, update: RestaurantSettingsUpdate):
+    return await RestaurantService.update_settings(restaurant_id, update)
+
+
+@router.post("/restaurants/{restaurant_id}/settings/changed")
+def restaurant_settings_changed(restaurant_id: str):
+    # Called by a database webhook on `restaurants` when a row is edited directly
+    RestaurantService.settings_changed(restaurant_id)
+    return {"status": "invalidated", "restaurant_id": restaurant_id}
@@ -0,0 +1,56 @@
+"""
+Live dashboard feed as server-sent events.
+
+  GET /events?restaurant_id=...   order and call-log deltas for one restaurant
+  GET /events/stats               connected screens and events published
+
+Browsers connect with `new EventSource(url)` and reconnect on their own,
+sending Last-Event-ID so missed events are replayed (see
+backend/services/live_feed.py). A comment line is sent when the feed is
+idle so proxies keep the connection open.
+"""
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from backend.config import settings
+from backend.services.live_feed import live_feed
+
+router = APIRouter(tags=["Dashboard"])
+
+_KEEPALIVE = ": keepalive\n\n"
+
+
+async def stream_events(
+    restaurant_id: str, last_event_id: Optional[str], heartbeat_seconds: float,
+) -> AsyncIterator[str]:
+    """Send buffered frames as one chunk per wake-up; unsubscribe when the client goes away."""
+    # Subscribed here rather than in the route, so the finally below always runs.
+    subscription = live_feed.subscribe(restaurant_id, last_event_id)
+    try:
+        # Opens the stream at once, so the client sees the connection is live.
+        yield _KEEPALIVE
+        while True:
+            frames = await subscription.next_frames(heartbeat_seconds)
+            yield "".join(frames) if frames else _KEEPALIVE
+    finally:
+        live_feed.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def events(
+    restaurant_id: Optional[str] = None,
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    return StreamingResponse(
+        stream_events(restaurant_id or settings.DEFAULT_RESTAURANT_ID, last_event_id_header or last_event_id, settings.LIVE_FEED_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/stats")
+def events_stats():
+    return live_feed.stats()
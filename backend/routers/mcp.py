@@ -0,0 +1,177 @@
+"""
+MCP over Streamable HTTP, mounted on the main app at /mcp.
+
+Every voice session talks to the same warm process, so they share the menu
+cache, the kitchen-load tracker and the database connection pool. The stdio
+server instead needs one cold process per agent. Sessions are keyed by the
+Mcp-Session-Id header rather than by connection. Many sessions can therefore
+share one keep-alive or HTTP/2 connection, and a single POST can carry a
+batch whose responses stream back as server-sent events as each call
+finishes.
+
+  POST   /mcp   JSON-RPC message or batch. An initialize opens a session.
+  DELETE /mcp   end the session and cancel its in-flight calls
+  GET    /mcp   405: this server has no server-initiated messages
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, List, Optional
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backend.config import on_reload, settings
+from backend.mcp_server import McpSession, jsonrpc_error
+
+SESSION_HEADER = "Mcp-Session-Id"
+
+router = APIRouter(tags=["MCP"])
+
+
+class McpSessionStore:
+    """Live sessions by id, with idle expiry and LRU eviction past a cap."""
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions: "OrderedDict[str, McpSession]" = OrderedDict()
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> str:
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = McpSession(settings.MCP_MAX_CONCURRENCY)
+            self._last_seen[session_id] = self._clock()
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, evicted = self._sessions.popitem(last=False)
+                self._last_seen.pop(evicted_id, None)
+                evicted.cancel_all()
+        return session_id
+
+    def get(self, session_id: str) -> Optional[McpSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = self._clock()
+            if now - self._last_seen[session_id] >= self.ttl_seconds:
+                del self._sessions[session_id]
+                del self._last_seen[session_id]
+                session.cancel_all()
+                return None
+            self._last_seen[session_id] = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            self._last_seen.pop(session_id, None)
+        if session is None:
+            return False
+        session.cancel_all()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = McpSessionStore(settings.MCP_SESSION_TTL_SECONDS, settings.MCP_MAX_SESSIONS)
+
+
+@on_reload
+def _apply_settings() -> None:
+    sessions.ttl_seconds = settings.MCP_SESSION_TTL_SECONDS
+    sessions.max_sessions = settings.MCP_MAX_SESSIONS
+
+
+def _sse_event(payload) -> str:
+    return f"event: message\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _stream_responses(tasks: List[asyncio.Task], errors: List[dict]) -> AsyncIterator[str]:
+    """Emit each response as its call finishes. If the client goes away,
+    cancel whatever is still running."""
+    try:
+        for error in errors:
+            yield _sse_event(error)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result() is not None:
+                    yield _sse_event(task.result())
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/mcp")
+async def mcp_post(request: Request):
+    try:
+        body = json.loads(await request.body())
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        return JSONResponse(jsonrpc_error(None, -32700, f"Parse error: {exc}"), status_code=400)
+
+    is_batch = isinstance(body, list)
+    messages = body if is_batch else [body]
+    if not messages:
+        return JSONResponse(jsonrpc_error(None, -32600, "Invalid Request: empty batch"), status_code=400)
+
+    headers = {}
+    if any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages):
+        session_id = sessions.create()
+        headers[SESSION_HEADER] = session_id
+    else:
+        session_id = request.headers.get(SESSION_HEADER)
+        if not session_id:
+            return JSONResponse(jsonrpc_error(None, -32600, f"Missing {SESSION_HEADER} header"), status_code=400)
+    session = sessions.get(session_id)
+    if session is None:
+        return JSONResponse(jsonrpc_error(None, -32001, "Session not found"), status_code=404)
+
+    errors, tasks = [], []
+    for message in messages:
+        if not isinstance(message, dict):
+            errors.append(jsonrpc_error(None, -32600, "Invalid Request"))
+        elif message.get("method") == "notifications/cancelled":
+            session.cancel(message.get("params") or {})
+        elif "id" not in message:
+            # Other notifications (e.g. notifications/initialized) need no reply.
+            continue
+        else:
+            tasks.append(session.spawn(message))
+
+    if not tasks and not errors:
+        return Response(status_code=202, headers=headers)
+
+    if len(tasks) > 1 and "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(_stream_responses(tasks, errors), media_type="text/event-stream", headers=headers)
+
+    responses = list(errors)
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, dict):
+            responses.append(result)
+    if not responses:
+        # Every call was cancelled.
+        return Response(status_code=202, headers=headers)
+    return JSONResponse(responses if is_batch else responses[0], headers=headers)
+
+
+@router.delete("/mcp")
+async def mcp_delete(request: Request):
+    session_id = request.headers.get(SESSION_HEADER, "")
+    if not sessions.close(session_id):
+        return Response(status_code=404)
+    return Response(status_code=204)
+
+
+@router.get("/mcp")
+async def mcp_get():
+    return Response(status_code=405, headers={"Allow": "POST, DELETE"})
@@ -1,6 +1,8 @@
+from typing import Optional
 from fastapi import APIRouter
 from backend.models import (
-    MenuResponse, OrderCreateRequest, OrderResponse, 
+    MenuResponse, MenuResolveBatchRequest, MenuResolveBatchResponse,
+    OrderCreateRequest, OrderEditRequest, OrderResponse,
     EtaRequest, EtaResponse, OrderConfirmRequest, OrderConfirmResponse,
     HandoffRequest, HandoffResponse
 )
@@ -13,25 +15,35 @@ router = APIRouter(prefix="/tool", tags=["Tools"])
 
 @router.get("/menu_search", response_model=MenuResponse)
 @trace_tool("menu_search")
-def menu_search(restaurant_id: str = settings.DEFAULT_RESTAURANT_ID, query: str = None, limit: int = 20):
-    return MenuService.search_menu(restaurant_id, query, limit)
+async def menu_search(restaurant_id: Optional[str] = None, query: str = None, limit: int = 20):
+    return await MenuService.search_menu(restaurant_id or settings.DEFAULT_RESTAURANT_ID, query, limit)
+
+@router.post("/menu_resolve_batch", response_model=MenuResolveBatchResponse)
+@trace_tool("menu_resolve_batch")
+async def menu_resolve_batch(req: MenuResolveBatchRequest):
+    return await MenuService.resolve_items(req.restaurant_id or settings.DEFAULT_RESTAURANT_ID, req.items)
 
 @router.post("/order_create_or_update", response_model=OrderResponse)
 @trace_tool("order_create_or_update")
-def order_create_or_update(req: OrderCreateRequest):
-    return OrderService.create_or_update_order(req)
+async def order_create_or_update(req: OrderCreateRequest):
+    return await OrderService.create_or_update_order(req)
+
+@router.post("/order_edit", response_model=OrderResponse)
+@trace_tool("order_edit")
+async def order_edit(req: OrderEditRequest):
+    return await OrderService.edit_order(req)
 
 @router.post("/get_eta", response_model=EtaResponse)
 @trace_tool("get_eta")
-def get_eta(req: EtaRequest):
-    return OrderService.get_eta(req.restaurant_id)
+async def get_eta(req: EtaRequest):
+    return await OrderService.get_eta(req.restaurant_id)
 
 @router.post("/order_confirm", response_model=OrderConfirmResponse)
 @trace_tool("order_confirm")
-def order_confirm(req: OrderConfirmRequest):
-    return OrderService.confirm_order(req)
+async def order_confirm(req: OrderConfirmRequest):
+    return await OrderService.confirm_order(req)
 
 @router.post("/handoff_to_human", response_model=HandoffResponse)
 @trace_tool("handoff_to_human")
-def handoff_to_human(req: HandoffRequest):
-    return OrderService.handoff_to_human(req)
+async def handoff_to_human(req: HandoffRequest):
+    return await OrderService.handoff_to_human(req)
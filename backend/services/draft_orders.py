@@ -0,0 +1,591 @@
+"""
+In-memory draft order sessions with write-behind persistence.
+
+During a call the agent updates the order on nearly every turn. Each call's
+draft lives in memory as priced lines, and an update turns into line-level
+deltas: add a line, drop a line, or change a quantity. Only new lines are
+looked up on the menu, and the subtotal is adjusted by each delta instead
+of recomputed.
+
+The `orders` row is written behind: a change schedules an upsert
+DRAFT_FLUSH_DELAY_SECONDS later, and further changes push it back, so a
+burst of turns costs one write. order_confirm and handoff_to_human flush
+synchronously before they act on the row.
+
+Every delta is also appended to a journal file of this process's own in
+DRAFT_JOURNAL_DIR, which it holds an exclusive lock on while it runs. The
+journal is compacted down to the open drafts once it passes
+DRAFT_JOURNAL_COMPACT_BYTES, and whenever the last open draft closes. At
+startup, recover() adopts the journals of processes that are gone: it
+replays them, rebuilds the drafts that were still open, and writes out any
+that had not reached the database.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import on_reload, settings
+from backend.database import db, execute
+from backend.models import ModifierSelection, OrderEditOperation, OrderItem
+from backend.services.modifier_rules import ItemRules, to_cents
+from backend.observability import log_error
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks (Windows): every other journal is taken as orphaned.
+    fcntl = None
+
+# Order fields set on every update, alongside the lines
+DRAFT_FIELDS = ("fulfillment", "customer_name", "phone", "notes")
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def _lock_journal(journal) -> bool:
+    """Take a journal's exclusive lock; held for as long as its writer runs."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def line_signature(item: OrderItem) -> str:
+    """Identifies a cart line: the same item with the same modifiers and instructions."""
+    modifiers = sorted([m.modifier_name, m.option] for m in item.modifier_selections)
+    return json.dumps([item.item_id, modifiers, item.special_instructions or None], separators=(",", ":"))
+
+
+class DraftOrder:
+    def __init__(self, order_id: str, call_id: str, restaurant_id: str):
+        self.order_id = order_id
+        self.call_id = call_id
+        self.restaurant_id = restaurant_id
+        self.status = "draft"
+        self.fields: Dict[str, Any] = {"fulfillment": "pickup", "customer_name": None, "phone": None, "notes": None}
+        # signature -> stored line (item_id, quantity, modifiers, name, price, modifier_price)
+        self.lines: Dict[str, Dict[str, Any]] = {}
+        # Integer cents, so adding and removing lines never drifts
+        self.subtotal_cents = 0
+        # The restaurant's rate, set through a "tax_rate" delta when it differs
+        self.tax_rate = settings.TAX_RATE
+        self.version = 0
+        self.flushed_version = 0
+        self.touched = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created on first use so it belongs to the loop that flushes the draft.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def dirty(self) -> bool:
+        return self.version > self.flushed_version
+
+    @property
+    def subtotal(self) -> float:
+        return self.subtotal_cents / 100
+
+    def _line_cents(self, line: Optional[Dict[str, Any]]) -> int:
+        if not line:
+            return 0
+        return (to_cents(line["price"]) + to_cents(line.get("modifier_price", 0.0))) * line["quantity"]
+
+    def apply(self, op: Dict[str, Any]) -> None:
+        """Apply one delta. Used for live updates and for journal replay."""
+        kind = op["op"]
+        if kind == "set_line":
+            self.subtotal_cents += self._line_cents(op["line"]) - self._line_cents(self.lines.get(op["sig"]))
+            self.lines[op["sig"]] = op["line"]
+        elif kind == "remove_line":
+            self.subtotal_cents -= self._line_cents(self.lines.pop(op["sig"], None))
+        elif kind == "fields":
+            self.fields.update(op["fields"])
+        elif kind == "tax_rate":
+            self.tax_rate = op["tax_rate"]
+        self.version += 1
+
+    def row(self) -> Dict[str, Any]:
+        """The `orders` row for this draft. `status` is left to the database."""
+        subtotal = self.subtotal
+        tax = subtotal * self.tax_rate
+        return {
+            "order_id": self.order_id,
+            "restaurant_id": self.restaurant_id,
+            "call_id": self.call_id,
+            **self.fields,
+            "items": list(self.lines.values()),
+            "subtotal": subtotal,
+            "tax": tax,
+            "total": subtotal + tax,
+        }
+
+
+def _priced_line(item: OrderItem, rules: Dict[str, ItemRules]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """The stored form of a line new to the draft, or why it cannot be added."""
+    item_rules = rules.get(item.item_id)
+    if item_rules is None:
+        return None, [f"Item {item.item_id} not found"]
+    menu_item = item_rules.item
+    if not menu_item.availability:
+        return None, [f"Item {menu_item.name} is unavailable"]
+    adjustment, errors = item_rules.price(item.modifier_selections)
+    if errors:
+        return None, errors
+    line = item.model_dump()
+    line.update(name=menu_item.name, price=menu_item.price, modifier_price=adjustment / 100)
+    return line, []
+
+
+def line_changes(
+    draft: DraftOrder, items: Iterable[OrderItem], rules: Dict[str, ItemRules],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Deltas that turn the draft's lines into `items` (the full cart), plus validation errors.
+
+    Lines the draft already has keep their stored price; only new lines are
+    checked against the menu and its modifier rules.
+    """
+    desired: Dict[str, Tuple[OrderItem, int]] = {}
+    for item in items:
+        sig = line_signature(item)
+        previous = desired.get(sig)
+        desired[sig] = (item, item.quantity + (previous[1] if previous else 0))
+
+    ops: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    for sig, (item, quantity) in desired.items():
+        existing = draft.lines.get(sig)
+        if existing is not None:
+            if existing["quantity"] != quantity:
+                ops.append({"op": "set_line", "sig": sig, "line": {**existing, "quantity": quantity}})
+            continue
+        line, line_errors = _priced_line(item, rules)
+        if line_errors:
+            errors.extend(line_errors)
+            continue
+        line["quantity"] = quantity
+        ops.append({"op": "set_line", "sig": sig, "line": line})
+
+    for sig in draft.lines:
+        if sig not in desired:
+            ops.append({"op": "remove_line", "sig": sig})
+    return ops, errors
+
+
+def _find_line(lines: Dict[str, Dict[str, Any]], edit: OrderEditOperation) -> Tuple[Optional[str], Optional[str]]:
+    """The signature of the line an edit refers to, or why there is no single one."""
+    if edit.modifier_selections or edit.special_instructions:
+        sig = line_signature(OrderItem(
+            item_id=edit.item_id, quantity=1,
+            modifier_selections=edit.modifier_selections, special_instructions=edit.special_instructions,
+        ))
+        matches = [sig] if sig in lines else []
+    else:
+        matches = [sig for sig, line in lines.items() if line["item_id"] == edit.item_id]
+        plain = line_signature(OrderItem(item_id=edit.item_id, quantity=1))
+        if len(matches) > 1 and plain in matches:
+            # No modifiers given: the line without any.
+            matches = [plain]
+    if not matches:
+        return None, f"Item {edit.item_id} is not in the order"
+    if len(matches) > 1:
+        return None, f"Item {edit.item_id} is in the order more than once; give its modifier_selections"
+    return matches[0], None
+
+
+def edit_changes(
+    draft: DraftOrder, edits: Iterable[OrderEditOperation], rules: Dict[str, ItemRules],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Deltas for a list of line edits, plus validation errors.
+
+    Edits apply in order, each to the result of the ones before it. Only
+    lines an edit adds or re-options are checked against the menu; an edit
+    that fails validation is skipped and the rest still apply.
+    """
+    lines = dict(draft.lines)
+    ops: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    def put(sig: str, line: Dict[str, Any]) -> None:
+        lines[sig] = line
+        ops.append({"op": "set_line", "sig": sig, "line": line})
+
+    def drop(sig: str) -> None:
+        del lines[sig]
+        ops.append({"op": "remove_line", "sig": sig})
+
+    for edit in edits:
+        if edit.op == "add_item":
+            item = OrderItem(
+                item_id=edit.item_id, quantity=1 if edit.quantity is None else edit.quantity,
+                modifier_selections=edit.modifier_selections, special_instructions=edit.special_instructions,
+            )
+            if item.quantity < 1:
+                errors.append(f"Quantity for {edit.item_id} must be at least 1")
+                continue
+            sig = line_signature(item)
+            if sig in lines:
+                put(sig, {**lines[sig], "quantity": lines[sig]["quantity"] + item.quantity})
+                continue
+            line, line_errors = _priced_line(item, rules)
+            if line_errors:
+                errors.extend(line_errors)
+                continue
+            put(sig, line)
+            continue
+
+        sig, error = _find_line(lines, edit)
+        if error:
+            errors.append(error)
+            continue
+        line = lines[sig]
+        if edit.op == "remove_item":
+            drop(sig)
+        elif edit.op == "set_quantity":
+            if edit.quantity is None or edit.quantity < 0:
+                errors.append(f"set_quantity for {edit.item_id} needs a quantity of 0 or more")
+            elif edit.quantity == 0:
+                drop(sig)
+            elif edit.quantity != line["quantity"]:
+                put(sig, {**line, "quantity": edit.quantity})
+        elif edit.op == "set_modifier":
+            if not edit.modifier_name or not edit.option:
+                errors.append("set_modifier needs modifier_name and option")
+                continue
+            selections = [m for m in line["modifier_selections"] if m["modifier_name"] != edit.modifier_name]
+            selections.append({"modifier_name": edit.modifier_name, "option": edit.option})
+            changed = {**line, "modifier_selections": selections}
+            item_rules = rules.get(edit.item_id)
+            if item_rules is not None:
+                # The line's whole selection is re-checked and re-priced.
+                adjustment, line_errors = item_rules.price(ModifierSelection(**m) for m in selections)
+                if line_errors:
+                    errors.extend(line_errors)
+                    continue
+                changed["modifier_price"] = adjustment / 100
+            new_sig = line_signature(OrderItem(**changed))
+            if new_sig == sig:
+                continue
+            drop(sig)
+            if new_sig in lines:
+                # Now the same as another line: merge the two.
+                changed = {**lines[new_sig], "quantity": lines[new_sig]["quantity"] + line["quantity"]}
+            put(new_sig, changed)
+    return ops, errors
+
+
+class DraftOrderStore:
+    def __init__(
+        self,
+        journal_dir: Optional[str],
+        flush_delay: float,
+        idle_seconds: float,
+        compact_bytes: int = 1 << 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._drafts: Dict[str, DraftOrder] = {}
+        self._by_call: Dict[str, str] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._journal = None
+        self._journal_bytes = 0
+        self._journal_lock = threading.Lock()
+        self.configure(journal_dir, flush_delay, idle_seconds, compact_bytes)
+
+    def configure(self, journal_dir: Optional[str], flush_delay: float, idle_seconds: float, compact_bytes: int) -> None:
+        """Set the journal directory and timings. The journal only moves if
+        nothing has been written to it yet."""
+        with self._journal_lock:
+            if self._journal is None:
+                self.journal_dir = journal_dir or None
+                # One journal per store, so no other process ever writes to it
+                self.journal_path = (
+                    os.path.join(journal_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}{JOURNAL_SUFFIX}")
+                    if journal_dir else None
+                )
+            self.flush_delay = flush_delay
+            self.idle_seconds = idle_seconds
+            self.compact_bytes = compact_bytes
+            self._compact_at = max(compact_bytes, self._journal_bytes)
+
+    # -- journal ---------------------------------------------------------------
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if not self.journal_path:
+            return
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._journal_lock:
+            if self._journal is None:
+                os.makedirs(self.journal_dir, exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+                _lock_journal(self._journal)
+            self._journal.write(line)
+            self._journal.flush()
+            self._journal_bytes += len(line)
+            if self._journal_bytes > self._compact_at:
+                self._compact()
+
+    def _replay(self, journal) -> None:
+        for raw in journal:
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                # A torn last line from a crash mid-write.
+                continue
+            order_id = record["order_id"]
+            if record["op"] == "open":
+                self._register(DraftOrder(order_id, record["call_id"], record["restaurant_id"]))
+                continue
+            draft = self._drafts.get(order_id)
+            if draft is None:
+                continue
+            if record["op"] == "flushed":
+                draft.flushed_version = record["version"]
+            elif record["op"] == "state":
+                draft.status = record["status"]
+                draft.version = record["version"]
+                draft.flushed_version = record["flushed_version"]
+            elif record["op"] == "closed":
+                self._forget(draft)
+            else:
+                draft.apply(record)
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the open drafts' current state.
+
+        Called with the journal lock held. Versions are written as they
+        are, not renumbered, since idempotency keys refer to them.
+        """
+        tmp_path = self.journal_path + ".tmp"
+        journal = open(tmp_path, "w", encoding="utf-8")
+        _lock_journal(journal)
+        size = 0
+        for draft in self._drafts.values():
+            records = [{"op": "open", "call_id": draft.call_id, "restaurant_id": draft.restaurant_id},
+                       {"op": "fields", "fields": draft.fields},
+                       {"op": "tax_rate", "tax_rate": draft.tax_rate}]
+            records += [{"op": "set_line", "sig": sig, "line": line} for sig, line in draft.lines.items()]
+            records.append({"op": "state", "status": draft.status,
+                            "version": draft.version, "flushed_version": draft.flushed_version})
+            for record in records:
+                line = json.dumps({"order_id": draft.order_id, **record}, separators=(",", ":")) + "\n"
+                journal.write(line)
+                size += len(line)
+        journal.flush()
+        os.replace(tmp_path, self.journal_path)
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = journal
+        self._journal_bytes = size
+        # A journal that is mostly open drafts is not rewritten on every append.
+        self._compact_at = max(self.compact_bytes, 2 * size)
+
+    def _adopt(self, path: str):
+        """The journal at `path`, locked, if the process that wrote it is gone."""
+        try:
+            journal = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        try:
+            # Another process may have adopted and removed it since it was listed.
+            if _lock_journal(journal) and os.stat(path).st_ino == os.fstat(journal.fileno()).st_ino:
+                return journal
+        except FileNotFoundError:
+            pass
+        journal.close()
+        return None
+
+    async def recover(self) -> int:
+        """Rebuild open drafts from orphaned journals and persist any unflushed ones."""
+        if not self.journal_dir or not os.path.isdir(self.journal_dir):
+            return 0
+        with self._journal_lock:
+            adopted = []
+            for name in sorted(os.listdir(self.journal_dir)):
+                path = os.path.join(self.journal_dir, name)
+                if not name.endswith(JOURNAL_SUFFIX) or path == self.journal_path:
+                    continue
+                journal = self._adopt(path)
+                if journal is not None:
+                    self._replay(journal)
+                    adopted.append((path, journal))
+            if adopted:
+                # Their drafts are in this journal before theirs are removed.
+                self._compact()
+            for path, journal in adopted:
+                os.remove(path)
+                journal.close()
+        await self.flush_all()
+        return len(self._drafts)
+
+    def release_journal(self) -> None:
+        """Close the journal at shutdown: removed if no drafts are open, else
+        compacted and left for the next process to adopt."""
+        with self._journal_lock:
+            if self._journal is None:
+                return
+            if self._drafts:
+                self._compact()
+            self._journal.close()
+            self._journal = None
+            if not self._drafts:
+                os.remove(self.journal_path)
+
+    # -- sessions --------------------------------------------------------------
+
+    def _register(self, draft: DraftOrder) -> None:
+        self._drafts[draft.order_id] = draft
+        self._by_call[draft.call_id] = draft.order_id
+
+    def _forget(self, draft: DraftOrder) -> None:
+        self._drafts.pop(draft.order_id, None)
+        if self._by_call.get(draft.call_id) == draft.order_id:
+            del self._by_call[draft.call_id]
+        timer = self._timers.pop(draft.order_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def get(self, order_id: str) -> Optional[DraftOrder]:
+        return self._drafts.get(order_id)
+
+    def order_id_for_call(self, call_id: str) -> Optional[str]:
+        return self._by_call.get(call_id)
+
+    def open(self, order_id: str, call_id: str, restaurant_id: str) -> DraftOrder:
+        draft = self._drafts.get(order_id)
+        if draft is None:
+            self._evict_idle()
+            draft = DraftOrder(order_id, call_id, restaurant_id)
+            self._register(draft)
+            self._append({"order_id": order_id, "op": "open", "call_id": call_id, "restaurant_id": restaurant_id})
+        draft.touched = self._clock()
+        return draft
+
+    def load(self, row: Dict[str, Any]) -> DraftOrder:
+        """Open a draft from an `orders` row that is not in memory: saved by
+        another process, or by a draft that was since evicted."""
+        draft = self._drafts.get(row["order_id"])
+        if draft is not None:
+            return draft
+        draft = self.open(row["order_id"], row["call_id"], row["restaurant_id"])
+        draft.status = row.get("status") or draft.status
+        lines: Dict[str, Dict[str, Any]] = {}
+        for line in row.get("items") or []:
+            sig = line_signature(OrderItem(**line))
+            if sig in lines:
+                line = {**lines[sig], "quantity": lines[sig]["quantity"] + line["quantity"]}
+            lines[sig] = line
+        ops = [{"op": "fields", "fields": {name: row.get(name, draft.fields[name]) for name in DRAFT_FIELDS}}]
+        ops += [{"op": "set_line", "sig": sig, "line": line} for sig, line in lines.items()]
+        for op in ops:
+            draft.apply(op)
+            self._append({"order_id": draft.order_id, **op})
+        # Already saved: nothing to write until it changes.
+        draft.flushed_version = draft.version
+        self._append({"order_id": draft.order_id, "op": "state", "status": draft.status,
+                      "version": draft.version, "flushed_version": draft.flushed_version})
+        return draft
+
+    def record(self, draft: DraftOrder, ops: List[Dict[str, Any]]) -> None:
+        """Apply deltas to a draft, journal them and schedule the write-behind."""
+        if not ops:
+            return
+        for op in ops:
+            draft.apply(op)
+            self._append({"order_id": draft.order_id, **op})
+        self._schedule(draft)
+
+    def _schedule(self, draft: DraftOrder) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        timer = self._timers.pop(draft.order_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[draft.order_id] = loop.call_later(
+            self.flush_delay, lambda: asyncio.ensure_future(self._flush_in_background(draft.order_id)),
+        )
+
+    async def _flush_in_background(self, order_id: str) -> None:
+        self._timers.pop(order_id, None)
+        try:
+            await self.flush(order_id)
+        except Exception as exc:
+            # Still dirty: the next change, confirm or shutdown retries it.
+            log_error("draft_flush_failed", order_id=order_id, error=str(exc))
+
+    async def flush(self, order_id: str) -> Optional[DraftOrder]:
+        """Write the draft's row now if it has unsaved changes."""
+        draft = self._drafts.get(order_id)
+        if draft is None:
+            return None
+        async with draft.lock:
+            if not draft.dirty:
+                return draft
+            version = draft.version
+            saved = await execute(db.table("orders").upsert(draft.row()))
+            if saved.data:
+                draft.status = saved.data[0].get("status") or draft.status
+            draft.flushed_version = version
+            self._append({"order_id": order_id, "op": "flushed", "version": version})
+        return draft
+
+    async def close(self, order_id: str) -> None:
+        """Flush and drop the draft; the database row is the record from here on."""
+        draft = await self.flush(order_id)
+        if draft is not None:
+            self._forget(draft)
+            self._append({"order_id": order_id, "op": "closed"})
+            self._compact_if_empty()
+
+    def _compact_if_empty(self) -> None:
+        """With no drafts open, the journal's history is no longer needed."""
+        with self._journal_lock:
+            if not self._drafts and self._journal is not None and self._journal_bytes:
+                self._compact()
+
+    async def flush_all(self) -> None:
+        for order_id in list(self._drafts):
+            try:
+                await self.flush(order_id)
+            except Exception as exc:
+                log_error("draft_flush_failed", order_id=order_id, error=str(exc))
+
+    def _evict_idle(self) -> None:
+        """Drop drafts untouched for idle_seconds that are already saved."""
+        cutoff = self._clock() - self.idle_seconds
+        for draft in [d for d in self._drafts.values() if d.touched < cutoff and not d.dirty]:
+            self._forget(draft)
+            self._append({"order_id": draft.order_id, "op": "closed"})
+        self._compact_if_empty()
+
+    def __len__(self) -> int:
+        return len(self._drafts)
+
+
+draft_orders = DraftOrderStore(
+    journal_dir=settings.DRAFT_JOURNAL_DIR,
+    flush_delay=settings.DRAFT_FLUSH_DELAY_SECONDS,
+    idle_seconds=settings.DRAFT_IDLE_SECONDS,
+    compact_bytes=settings.DRAFT_JOURNAL_COMPACT_BYTES,
+)
+
+
+@on_reload
+def _apply_settings() -> None:
+    draft_orders.configure(
+        settings.DRAFT_JOURNAL_DIR,
+        settings.DRAFT_FLUSH_DELAY_SECONDS,
+        settings.DRAFT_IDLE_SECONDS,
+        settings.DRAFT_JOURNAL_COMPACT_BYTES,
+    )
@@ -0,0 +1,57 @@
+"""
+Streaming export encoders for orders and call logs.
+
+Each encoder consumes an async row iterator and yields text chunks for a
+StreamingResponse, so an export of any date range holds one database chunk
+in memory at a time rather than the whole result set.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def ndjson_lines(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+async def csv_lines(rows: AsyncIterator[Dict[str, Any]], columns: Sequence[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in (row.get(column) for column in columns)
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    rows: AsyncIterator[Dict[str, Any]],
+    export_format: str,
+    columns: Sequence[str],
+    filename: str,
+) -> StreamingResponse:
+    if export_format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {export_format}")
+
+    body = csv_lines(rows, columns) if export_format == "csv" else ndjson_lines(rows)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
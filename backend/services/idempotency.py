@@ -0,0 +1,110 @@
+"""
+Idempotency for tool calls that write.
+
+Voice agents retry a tool call when speech-to-text or the network hiccups.
+Each write call gets a key made from its call_id (or order_id), the version
+of the draft it applies to, and a hash of its payload. A repeat of a
+completed call is answered from a short-lived response cache. A repeat that
+arrives while the first is still running waits for that same execution
+(single-flight) instead of starting another. The same payload sent again
+after the order has changed has a new key, so it is applied, not replayed.
+
+The shared execution runs in its own task. If the caller that started it
+disconnects, the callers still waiting on it are not cancelled with it.
+Failures are never cached: every caller waiting at that moment sees the
+error, and the next retry runs again.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from pydantic import BaseModel
+
+from backend.config import on_reload, settings
+from backend.metrics import registry
+
+IDEMPOTENCY_REQUESTS = registry.counter(
+    "voicehub_idempotency_requests_total",
+    "Idempotent tool calls by outcome: executed, replayed from cache, or coalesced onto an in-flight call.",
+    ["operation", "outcome"],
+)
+
+
+def payload_hash(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def idempotency_key(operation: str, scope: str, payload: BaseModel, version: int = 0) -> str:
+    return f"{operation}:{scope}:{version}:{payload_hash(payload)}"
+
+
+class IdempotencyCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return False, None
+            expires_at, result = entry
+            if self._clock() >= expires_at:
+                del self._results[key]
+                return False, None
+            return True, result
+
+    def _store(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._results[key] = (self._clock() + self.ttl_seconds, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    async def run(self, key: str, execute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result for `key`, executing at most once per TTL window."""
+        operation = key.split(":", 1)[0]
+        found, result = self._cached(key)
+        if found:
+            IDEMPOTENCY_REQUESTS.labels(operation, "replayed").inc()
+            return result
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            IDEMPOTENCY_REQUESTS.labels(operation, "coalesced").inc()
+            return await asyncio.shield(task)
+
+        IDEMPOTENCY_REQUESTS.labels(operation, "executed").inc()
+        task = asyncio.ensure_future(execute())
+        self._in_flight[key] = task
+
+        def _settle(done: asyncio.Task) -> None:
+            if self._in_flight.get(key) is done:
+                del self._in_flight[key]
+            if not done.cancelled() and done.exception() is None:
+                self._store(key, done.result())
+        task.add_done_callback(_settle)
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+order_idempotency = IdempotencyCache(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+)
+
+
+@on_reload
+def _apply_settings() -> None:
+    order_idempotency.ttl_seconds = settings.IDEMPOTENCY_TTL_SECONDS
+    order_idempotency.max_entries = settings.IDEMPOTENCY_MAX_ENTRIES
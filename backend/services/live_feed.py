@@ -0,0 +1,155 @@
+"""
+In-process pub/sub for the dashboard's live feed (GET /events).
+
+Services publish a small event per change as they make it: an order created
+or updated during a call, an order confirmed, a call log written. Every
+screen subscribed to that restaurant receives it as a server-sent event, so
+a kitchen screen applies deltas to the lists it loaded once instead of
+polling /orders and /stats.
+
+  order.created    {"order": {...}}   a new draft order
+  order.updated    {"order": {...}}   lines or details of an open order changed
+  order.confirmed  {"order": {...}, "pickup_eta_minutes": n}
+  call.logged      {"call": {...}}    a call_logs row (e.g. a handoff)
+  resync           {}                 deltas were lost; reload the lists
+
+Each event is encoded to its SSE frame once, however many screens receive
+it, and fan-out only appends the frame to each subscriber's buffer. A
+subscriber that falls LIVE_FEED_QUEUE_SIZE frames behind has its buffer
+replaced by a single resync event rather than slowing down publishers or
+growing without bound.
+
+Event ids are "<epoch>-<sequence>". The last LIVE_FEED_REPLAY_SIZE events
+per restaurant are kept, so a screen that reconnects with Last-Event-ID
+gets what it missed. If those events are gone, or the id is from before a
+restart, it gets a resync instead.
+
+Subscribers only see events published by their own process. Run the API as
+a single process, or pin each restaurant's writers and screens to the same
+one, for the feed to be complete.
+"""
+import asyncio
+import itertools
+import json
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from backend.config import on_reload, settings
+
+
+def _frame(event_id: str, event_type: str, data: Dict[str, Any]) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+_RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class Subscription:
+    """One connected screen: a bounded buffer of frames it has not been sent yet."""
+    __slots__ = ("restaurant_id", "limit", "frames", "ready", "resyncs")
+
+    def __init__(self, restaurant_id: str, limit: int):
+        self.restaurant_id = restaurant_id
+        self.limit = limit
+        self.frames: Deque[str] = deque()
+        self.ready = asyncio.Event()
+        self.resyncs = 0
+
+    def push(self, frame: str) -> None:
+        if len(self.frames) >= self.limit:
+            self.frames.clear()
+            frame = _RESYNC
+            self.resyncs += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+    async def next_frames(self, timeout: float) -> List[str]:
+        """Everything buffered, waiting up to `timeout` for something; [] on timeout."""
+        if not self.frames:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+
+class LiveFeed:
+    def __init__(self, queue_size: int, replay_size: int):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        # restaurant -> recent (sequence, frame), and the newest sequence dropped from it
+        self._recent: Dict[str, Deque[Tuple[int, str]]] = {}
+        self._evicted: Dict[str, int] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, restaurant_id: str, event_type: str, data: Dict[str, Any]) -> str:
+        sequence = next(self._sequence)
+        event_id = f"{self.epoch}-{sequence}"
+        frame = _frame(event_id, event_type, data)
+
+        recent = self._recent.get(restaurant_id)
+        if recent is None:
+            recent = self._recent[restaurant_id] = deque()
+        recent.append((sequence, frame))
+        if len(recent) > self.replay_size:
+            self._evicted[restaurant_id] = recent.popleft()[0]
+
+        subscribers = self._subscribers.get(restaurant_id)
+        if subscribers:
+            for subscription in subscribers:
+                subscription.push(frame)
+            self.delivered += len(subscribers)
+        self.published += 1
+        return event_id
+
+    def subscribe(self, restaurant_id: str, last_event_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(restaurant_id, self.queue_size)
+        if last_event_id:
+            for frame in self._missed(restaurant_id, last_event_id):
+                subscription.push(frame)
+        self._subscribers.setdefault(restaurant_id, set()).add(subscription)
+        return subscription
+
+    def _missed(self, restaurant_id: str, last_event_id: str) -> List[str]:
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return [_RESYNC]
+        last = int(sequence)
+        if last < self._evicted.get(restaurant_id, 0):
+            return [_RESYNC]
+        return [frame for seq, frame in self._recent.get(restaurant_id, ()) if seq > last]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.restaurant_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.restaurant_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "restaurants": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+live_feed = LiveFeed(
+    queue_size=settings.LIVE_FEED_QUEUE_SIZE,
+    replay_size=settings.LIVE_FEED_REPLAY_SIZE,
+)
+
+
+@on_reload
+def _apply_settings() -> None:
+    live_feed.queue_size = settings.LIVE_FEED_QUEUE_SIZE
+    live_feed.replay_size = settings.LIVE_FEED_REPLAY_SIZE
@@ -0,0 +1,180 @@
+"""
+In-process menu cache for restaurant-voice-hub.
+
+Holds each restaurant's parsed menu for a short TTL so tool calls during a live
+phone conversation do not hit the database on every agent turn. The cache is
+bounded across restaurants with LRU eviction, and writers (availability
+toggles, CSV uploads) invalidate or patch entries immediately.
+
+Each entry is a MenuSnapshot: the parsed items plus the lookups derived from
+them (id map, search index, compiled modifier rules), built once per load
+instead of once per request. Concurrent misses for one restaurant share a
+single load, and a load that overlapped a write to that restaurant's menu
+is returned to its callers but not cached.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.config import on_reload, settings
+from backend.models import MenuItem
+from backend.services.menu_search import MenuSearchIndex
+from backend.services.modifier_rules import ItemRules, compile_rules
+
+
+class MenuSnapshot:
+    def __init__(self, items: List[MenuItem]):
+        self.items = items
+        self.by_id: Dict[str, MenuItem] = {item.item_id: item for item in items}
+        self.search_index = MenuSearchIndex(items)
+        self.rules: Dict[str, ItemRules] = compile_rules(items)
+
+    def replace_item(self, item: MenuItem) -> None:
+        """Swap in a changed item without rebuilding the whole snapshot."""
+        if item.item_id not in self.by_id:
+            self.items = self.items + [item]
+        else:
+            self.items = [item if i.item_id == item.item_id else i for i in self.items]
+        self.by_id[item.item_id] = item
+        self.rules[item.item_id] = ItemRules(item)
+        self.search_index.update_item(item)
+
+
+class RestaurantCache:
+    """Per-restaurant entries with a TTL, bounded by LRU eviction."""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_restaurants: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_restaurants = max_restaurants
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every write, so a load that overlapped one is not cached
+        self._epoch = 0
+        self._generations: Dict[str, int] = {}
+        self._loading: Dict[str, "asyncio.Future[Any]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, restaurant_id: str) -> Optional[Any]:
+        """Return the cached entry, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(restaurant_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[restaurant_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(restaurant_id)
+            self.hits += 1
+            return value
+
+    def set(self, restaurant_id: str, value: Any) -> None:
+        with self._lock:
+            self._store(restaurant_id, value)
+
+    def _store(self, restaurant_id: str, value: Any) -> None:
+        self._entries[restaurant_id] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(restaurant_id)
+        while len(self._entries) > self.max_restaurants:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, restaurant_id: Optional[str] = None) -> None:
+        """Drop one restaurant's entry, or every entry when no id is given."""
+        with self._lock:
+            if restaurant_id is None:
+                self._epoch += 1
+                self._generations.clear()
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            self._bump(restaurant_id)
+            if self._entries.pop(restaurant_id, None) is not None:
+                self.invalidations += 1
+
+    def _bump(self, restaurant_id: str) -> None:
+        self._generations[restaurant_id] = self._generations.get(restaurant_id, 0) + 1
+
+    def _generation(self, restaurant_id: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(restaurant_id, 0)
+
+    async def load(self, restaurant_id: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a missing entry, once however many callers miss it together.
+
+        The result is cached unless the restaurant was written to while it
+        was being fetched; the callers still get it either way.
+        """
+        task = self._loading.get(restaurant_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(restaurant_id, fetch))
+            self._loading[restaurant_id] = task
+
+            def _settle(done: "asyncio.Future[Any]") -> None:
+                if self._loading.get(restaurant_id) is done:
+                    del self._loading[restaurant_id]
+            task.add_done_callback(_settle)
+        return await asyncio.shield(task)
+
+    async def _load(self, restaurant_id: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            generation = self._generation(restaurant_id)
+        value = await fetch()
+        with self._lock:
+            if self._generation(restaurant_id) == generation:
+                self._store(restaurant_id, value)
+        return value
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_restaurants": self.max_restaurants,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class MenuCache(RestaurantCache):
+    def update_item(self, restaurant_id: str, item: MenuItem) -> None:
+        """Patch one item in a cached snapshot. A load already under way for
+        the restaurant read the old item, so it will not be cached."""
+        with self._lock:
+            self._bump(restaurant_id)
+            entry = self._entries.get(restaurant_id)
+            if entry is not None:
+                entry[1].replace_item(item)
+
+
+menu_cache = MenuCache(
+    ttl_seconds=settings.MENU_CACHE_TTL_SECONDS,
+    max_restaurants=settings.MENU_CACHE_MAX_RESTAURANTS,
+)
+
+
+@on_reload
+def _apply_settings() -> None:
+    menu_cache.ttl_seconds = settings.MENU_CACHE_TTL_SECONDS
+    menu_cache.max_restaurants = settings.MENU_CACHE_MAX_RESTAURANTS
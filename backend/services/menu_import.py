@@ -0,0 +1,273 @@
+"""
+Streaming, validated menu CSV import.
+
+The upload is decoded and parsed chunk by chunk. Each row is validated on
+its own, so one bad price does not sink the whole file, and rows are
+matched to the restaurant's existing items by (name, category). Existing
+items keep their item_id, which in-flight draft orders reference. The
+result is an ImportPlan of inserts, updates and deletes for the caller to
+apply in batches.
+
+CSV columns: name, category, price, and optionally description and
+modifiers. Modifiers use "Group:Option|Option;Group:Option", for example
+"Size:Small|Large;Cheese:Cheddar|Swiss". Modifier rules set elsewhere are
+kept for the groups and options a re-upload still lists, and a file without
+a modifiers column leaves existing items' modifiers alone.
+"""
+import codecs
+import csv
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from fastapi import UploadFile
+
+READ_CHUNK_BYTES = 64 * 1024
+
+MenuKey = Tuple[str, str]
+
+
+class RowError(Exception):
+    pass
+
+
+class ImportPlan:
+    def __init__(self):
+        self.inserts: List[Dict[str, Any]] = []
+        self.updates: List[Dict[str, Any]] = []
+        self.deletes: List[str] = []
+        self.unchanged = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    @property
+    def valid_rows(self) -> int:
+        return len(self.inserts) + len(self.updates) + self.unchanged
+
+
+class _LineFeed:
+    """Line iterator behind one long-lived csv.reader.
+
+    Lines are appended as chunks are decoded. Running out of lines is
+    remembered, so a record that reached the end of what has arrived so far
+    can be given back and parsed again once more text is in.
+    """
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+        self.taken: List[str] = []
+        self.starved = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            self.starved = True
+            raise StopIteration
+        line = self.lines.popleft()
+        self.taken.append(line)
+        return line
+
+    def give_back(self) -> None:
+        self.lines.extendleft(reversed(self.taken))
+
+
+class _RecordSplitter:
+    """Turns decoded text chunks into complete CSV records.
+
+    A chunk can end mid-line and a quoted field can span lines. Quoting is
+    left to the csv module: a record is only kept once the reader finished
+    it without running out of lines, or the upload has ended.
+    """
+    def __init__(self):
+        self._partial_line = ""
+        self._feed = _LineFeed()
+        self._reader = csv.reader(self._feed)
+        self._line_number = 0
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, Union[List[str], RowError]]]:
+        lines = (self._partial_line + text).splitlines(keepends=True)
+        self._partial_line = ""
+        if lines and not final and not lines[-1].endswith(("\n", "\r")):
+            self._partial_line = lines.pop()
+        self._feed.lines.extend(lines)
+
+        records: List[Tuple[int, Union[List[str], RowError]]] = []
+        while True:
+            self._feed.taken = []
+            self._feed.starved = False
+            try:
+                record: Union[List[str], RowError] = next(self._reader)
+            except StopIteration:
+                break
+            except csv.Error as exc:
+                record = RowError(f"Unreadable CSV record: {exc}")
+            if self._feed.starved and not final:
+                self._feed.give_back()
+                break
+            records.append((self._line_number + 1, record))
+            self._line_number += len(self._feed.taken)
+        return records
+
+
+async def iter_csv_rows(file: UploadFile) -> AsyncIterator[Tuple[int, Union[List[str], RowError]]]:
+    """Yield (line_number, fields) for each CSV record without reading the whole upload.
+
+    A record the csv module cannot read is yielded as (line_number, RowError).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    splitter = _RecordSplitter()
+    while True:
+        chunk = await file.read(READ_CHUNK_BYTES)
+        final = not chunk
+        for record in splitter.feed(decoder.decode(chunk, final=final), final=final):
+            yield record
+        if final:
+            return
+
+
+def parse_modifiers(value: str) -> List[Dict[str, Any]]:
+    modifiers = []
+    for group in filter(None, (g.strip() for g in value.split(";"))):
+        name, sep, options = group.partition(":")
+        choices = [o.strip() for o in options.split("|") if o.strip()]
+        if not sep or not name.strip() or not choices:
+            raise RowError(f"Invalid modifiers '{group}', expected 'Group:Option|Option'")
+        modifiers.append({"name": name.strip(), "options": choices})
+    return modifiers
+
+
+def parse_row(row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    name = (row.get("name") or "").strip()
+    if not name:
+        raise RowError("Missing name")
+    category = (row.get("category") or "").strip() or "General"
+
+    raw_price = (row.get("price") or "").strip().lstrip("$")
+    try:
+        price = round(float(raw_price), 2)
+    except ValueError:
+        raise RowError(f"Invalid price '{row.get('price') or ''}'")
+    if price < 0:
+        raise RowError("Price cannot be negative")
+
+    return {
+        "name": name,
+        "category": category,
+        "price": price,
+        "description": (row.get("description") or "").strip() or None,
+        "modifiers": parse_modifiers(row.get("modifiers") or ""),
+    }
+
+
+def merge_modifiers(current: Optional[List[Dict[str, Any]]], parsed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Carry the stored rules (required, selection limits, price adjustments)
+    over to the uploaded groups. The CSV only names groups and options, so
+    rules are kept for every group and option that is still listed."""
+    stored = {group.get("name"): group for group in current or []}
+    merged = []
+    for group in parsed:
+        previous = stored.get(group["name"])
+        if previous is None:
+            merged.append(group)
+            continue
+        kept = {**previous, **group}
+        if previous.get("price_adjustments"):
+            kept["price_adjustments"] = {
+                option: price for option, price in previous["price_adjustments"].items()
+                if option in group["options"]
+            }
+        merged.append(kept)
+    return merged
+
+
+def menu_key(name: str, category: str) -> MenuKey:
+    return " ".join(name.lower().split()), " ".join(category.lower().split())
+
+
+def _changed(existing: Dict[str, Any], parsed: Dict[str, Any]) -> bool:
+    return (
+        existing.get("name") != parsed["name"]
+        or existing.get("category") != parsed["category"]
+        or float(existing.get("price") or 0) != parsed["price"]
+        or (existing.get("description") or None) != parsed["description"]
+        or (existing.get("modifiers") or []) != parsed["modifiers"]
+    )
+
+
+async def plan_import(
+    file: UploadFile,
+    restaurant_id: str,
+    existing_rows: List[Dict[str, Any]],
+) -> ImportPlan:
+    plan = ImportPlan()
+    existing: Dict[MenuKey, Dict[str, Any]] = {}
+    for record in existing_rows:
+        existing.setdefault(menu_key(record["name"], record["category"]), record)
+
+    seen: Dict[MenuKey, int] = {}
+    # Keys of rows that failed validation: never delete those items just
+    # because this upload had a typo in them.
+    protected: Set[MenuKey] = set()
+    header: Optional[List[str]] = None
+    has_modifiers = False
+
+    async for line_number, fields in iter_csv_rows(file):
+        if isinstance(fields, RowError):
+            plan.errors.append({"row": line_number, "error": str(fields)})
+            if header is None:
+                return plan
+            continue
+        if header is None:
+            header = [h.strip().lower() for h in fields]
+            if "name" not in header or "price" not in header:
+                plan.errors.append({"row": line_number, "error": "Header must include name and price"})
+                return plan
+            has_modifiers = "modifiers" in header
+            continue
+        if not any(f.strip() for f in fields):
+            continue
+
+        row = dict(zip(header, fields))
+        try:
+            parsed = parse_row(row)
+        except RowError as exc:
+            plan.errors.append({"row": line_number, "error": str(exc)})
+            if (row.get("name") or "").strip():
+                protected.add(menu_key(row["name"], (row.get("category") or "").strip() or "General"))
+            continue
+
+        key = menu_key(parsed["name"], parsed["category"])
+        if key in seen:
+            plan.errors.append({"row": line_number, "error": f"Duplicate of row {seen[key]}"})
+            continue
+        seen[key] = line_number
+
+        current = existing.get(key)
+        if current is None:
+            plan.inserts.append({
+                "item_id": str(uuid.uuid4())[:8],
+                "restaurant_id": restaurant_id,
+                "availability": True,
+                **parsed,
+            })
+            continue
+
+        # Without a modifiers column the stored groups stay as they are
+        parsed["modifiers"] = (
+            merge_modifiers(current.get("modifiers"), parsed["modifiers"])
+            if has_modifiers else current.get("modifiers") or []
+        )
+        if _changed(current, parsed):
+            plan.updates.append({
+                "item_id": current["item_id"],
+                "restaurant_id": restaurant_id,
+                "availability": current.get("availability", True),
+                **parsed,
+            })
+        else:
+            plan.unchanged += 1
+
+    matched = {existing[key]["item_id"] for key in seen if key in existing}
+    matched |= {existing[key]["item_id"] for key in protected if key in existing}
+    plan.deletes = [r["item_id"] for r in existing_rows if r["item_id"] not in matched]
+    return plan
@@ -0,0 +1,96 @@
+"""
+Resolve spoken item phrases ("two cheeseburgers", "a large fries") to menu
+items in one pass over a single menu snapshot.
+
+Each phrase is split into a quantity, modifier options of the matched item
+("large" -> Size: Large) and the words left to name the item. The item comes
+from the search index. Its confidence (0..1) combines three things:
+
+  - how much of the phrase the item's name accounts for (recall)
+  - how much of the name the phrase accounts for (precision)
+  - how far the item is ahead of the runner-up (a near tie is ambiguous)
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from backend.models import MenuItem, ModifierSelection, ResolvedItem, SpokenItem
+from backend.services.menu_cache import MenuSnapshot
+from backend.services.menu_search import tokenize
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "dozen": 12,
+    "couple": 2, "pair": 2,
+}
+# Words around a quantity that name nothing ("a couple of", "some", "please")
+_FILLER = {"of", "some", "the", "please", "order", "my", "and", "with", "get", "like"}
+
+# A runner-up scoring within this fraction of the top hit makes the match ambiguous
+AMBIGUITY_MARGIN = 0.1
+ALTERNATIVES = 2
+
+
+def split_quantity(tokens: List[str]) -> Tuple[Optional[int], List[str]]:
+    """Leading quantity words of a phrase, and the rest of it."""
+    quantity = None
+    rest = list(tokens)
+    while rest:
+        token = rest[0]
+        if token.isdigit() and quantity is None:
+            quantity = int(token)
+        elif token in _NUMBER_WORDS and quantity is None:
+            quantity = _NUMBER_WORDS[token]
+        elif token not in _FILLER:
+            break
+        rest.pop(0)
+    return quantity, rest
+
+
+def match_modifiers(item: MenuItem, tokens: List[str]) -> Tuple[List[ModifierSelection], List[str]]:
+    """Options of the item's modifiers named in the phrase, and the tokens left over."""
+    remaining = list(tokens)
+    selections: List[ModifierSelection] = []
+    for modifier in item.modifiers:
+        picked = 0
+        # Longest first, so "extra large" wins over "large".
+        for option in sorted(modifier.options, key=lambda o: -len(o)):
+            if modifier.max_selections is not None and picked >= modifier.max_selections:
+                break
+            option_tokens = tokenize(option)
+            if option_tokens and all(t in remaining for t in option_tokens):
+                for t in option_tokens:
+                    remaining.remove(t)
+                selections.append(ModifierSelection(modifier_name=modifier.name, option=option))
+                picked += 1
+    return selections, remaining
+
+
+def resolve_phrase(snapshot: MenuSnapshot, spoken: SpokenItem) -> ResolvedItem:
+    parsed_quantity, tokens = split_quantity(tokenize(spoken.phrase))
+    quantity = spoken.quantity or parsed_quantity or 1
+    hits, _ = snapshot.search_index.search(" ".join(tokens), limit=1 + ALTERNATIVES) if tokens else ([], 0)
+    if not hits:
+        return ResolvedItem(phrase=spoken.phrase, quantity=quantity, confidence=0.0)
+
+    top = hits[0]
+    selections, name_tokens = match_modifiers(top.item, tokens)
+    recall, precision = snapshot.search_index.coverage(name_tokens or tokens, top.item.item_id)
+    confidence = recall * (0.6 + 0.4 * precision)
+    if len(hits) > 1 and top.score > 0:
+        margin = 1 - hits[1].score / top.score
+        if margin < AMBIGUITY_MARGIN:
+            confidence *= 0.5 + 0.5 * margin / AMBIGUITY_MARGIN
+
+    return ResolvedItem(
+        phrase=spoken.phrase,
+        item_id=top.item.item_id,
+        name=top.item.name,
+        quantity=quantity,
+        modifier_selections=selections,
+        available=top.item.availability,
+        confidence=round(confidence, 3),
+        alternatives=[hit.item.name for hit in hits[1:]],
+    )
+
+
+def resolve_batch(snapshot: MenuSnapshot, spoken_items: Sequence[SpokenItem]) -> List[ResolvedItem]:
+    return [resolve_phrase(snapshot, spoken) for spoken in spoken_items]
@@ -0,0 +1,301 @@
+"""
+Ranked, typo-tolerant menu search for restaurant-voice-hub.
+
+Callers on the phone rarely say an item's exact name: speech-to-text gives us
+"cheese burger", "bbq bacon", plurals and near-misses. Each restaurant's menu
+is indexed once when it loads:
+
+  - an inverted index from normalized terms to the items they appear in,
+    weighted by field (name over category) and by rarity (IDF)
+  - adjacent token pairs are indexed joined as well, so "cheese burger" and
+    "cheeseburger" meet in the middle
+  - a character trigram index over the vocabulary, used to expand query terms
+    that have no exact match into close spellings and containing terms
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from backend.models import MenuItem
+
+NAME_WEIGHT = 3.0
+CATEGORY_WEIGHT = 1.0
+
+# Score multipliers for non-exact term matches
+FUZZY_FACTOR = 0.8
+CONTAINS_FACTOR = 0.6
+MIN_TRIGRAM_SIMILARITY = 0.3
+PHRASE_BONUS = 2.0
+RERANK_MARGIN = 50
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Spoken/written variants that should land on the same term
+_SYNONYMS = {
+    "barbecue": "bbq",
+    "barbeque": "bbq",
+    "bbque": "bbq",
+    "w": "with",
+    "n": "and",
+}
+
+
+class SearchHit(NamedTuple):
+    item: MenuItem
+    score: float
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _stem(token: str) -> str:
+    """Fold the plural forms a caller is likely to use onto the singular."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("shes", "ches", "xes", "sses")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for raw in _normalize(text).split():
+        token = _SYNONYMS.get(raw, raw)
+        tokens.append(_stem(token))
+    return tokens
+
+
+def _terms(tokens: List[str]) -> List[str]:
+    """Tokens plus each adjacent pair joined, for compound-word matching."""
+    joined = [a + b for a, b in zip(tokens, tokens[1:])]
+    return tokens + joined
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance, giving up once it exceeds max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2: Optional[List[int]] = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous2 is not None
+                and i > 1 and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _max_typos(term: str) -> int:
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 6:
+        return 1
+    return 2
+
+
+class MenuSearchIndex:
+    def __init__(self, items: Iterable[MenuItem] = ()):
+        self._items: Dict[str, MenuItem] = {}
+        self._order: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_names: Dict[str, str] = {}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._vocab_trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._expansions: Dict[str, List[Tuple[str, float]]] = {}
+        self._lock = threading.RLock()
+        for item in items:
+            self.add_item(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # ── Index maintenance ────────────────────────────────────────────────────
+
+    def add_item(self, item: MenuItem) -> None:
+        with self._lock:
+            if item.item_id in self._items:
+                self.remove_item(item.item_id)
+
+            weights: Dict[str, float] = {}
+            for term in _terms(tokenize(item.category)):
+                weights[term] = max(weights.get(term, 0.0), CATEGORY_WEIGHT)
+            for term in _terms(tokenize(item.name)):
+                weights[term] = max(weights.get(term, 0.0), NAME_WEIGHT)
+
+            for term, weight in weights.items():
+                if term not in self._postings:
+                    for gram in _trigrams(term):
+                        self._vocab_trigrams[gram].add(term)
+                self._postings[term][item.item_id] = weight
+
+            self._items[item.item_id] = item
+            self._order.setdefault(item.item_id, len(self._order))
+            self._doc_terms[item.item_id] = weights
+            self._doc_names[item.item_id] = " ".join(tokenize(item.name))
+            self._expansions.clear()
+
+    def remove_item(self, item_id: str) -> None:
+        with self._lock:
+            weights = self._doc_terms.pop(item_id, None)
+            if weights is None:
+                return
+            for term in weights:
+                postings = self._postings[term]
+                postings.pop(item_id, None)
+                if not postings:
+                    del self._postings[term]
+                    for gram in _trigrams(term):
+                        self._vocab_trigrams[gram].discard(term)
+            del self._items[item_id]
+            del self._doc_names[item_id]
+            self._expansions.clear()
+
+    def update_item(self, item: MenuItem) -> None:
+        """Re-index one item; a pure availability/price change skips the term work."""
+        with self._lock:
+            current = self._items.get(item.item_id)
+            if current is not None and current.name == item.name and current.category == item.category:
+                self._items[item.item_id] = item
+                return
+            self.add_item(item)
+
+    # ── Querying ─────────────────────────────────────────────────────────────
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Vocabulary terms a query term should match, with a score multiplier."""
+        cached = self._expansions.get(term)
+        if cached is not None:
+            return cached
+
+        expansions: List[Tuple[str, float]] = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+
+        query_grams = _trigrams(term)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self._vocab_trigrams.get(gram, ()):
+                shared[candidate] += 1
+
+        max_typos = _max_typos(term)
+        for candidate, overlap in shared.items():
+            if candidate == term:
+                continue
+            similarity = overlap / len(query_grams | _trigrams(candidate))
+            if len(term) >= 3 and term in candidate:
+                expansions.append((candidate, CONTAINS_FACTOR * len(term) / len(candidate)))
+            elif max_typos and similarity >= MIN_TRIGRAM_SIMILARITY:
+                distance = _edit_distance(term, candidate, max_typos)
+                if distance <= max_typos:
+                    expansions.append((candidate, FUZZY_FACTOR * (1 - distance / (len(term) + 1))))
+
+        self._expansions[term] = expansions
+        return expansions
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[SearchHit], int]:
+        """Return the top `limit` hits ranked by score, and the total match count."""
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            doc_count = max(len(self._items), 1)
+            scores: Dict[str, float] = defaultdict(float)
+
+            for term in _terms(tokens):
+                expansions = self._expand(term)
+                if len(expansions) == 1:
+                    vocab_term, factor = expansions[0]
+                    postings = self._postings[vocab_term]
+                    boost = math.log(1 + doc_count / len(postings)) * factor
+                    for item_id, weight in postings.items():
+                        scores[item_id] += weight * boost
+                    continue
+
+                # Several vocabulary terms can stand in for one query term; an
+                # item only earns the best of them, not their sum.
+                best: Dict[str, float] = {}
+                for vocab_term, factor in expansions:
+                    postings = self._postings[vocab_term]
+                    boost = math.log(1 + doc_count / len(postings)) * factor
+                    for item_id, weight in postings.items():
+                        score = weight * boost
+                        if score > best.get(item_id, 0.0):
+                            best[item_id] = score
+                for item_id, score in best.items():
+                    scores[item_id] += score
+
+            if not scores:
+                return [], 0
+
+            # Rank on term scores, then re-rank a small head with the phrase
+            # bonus rather than string-matching every scored item.
+            phrase = " ".join(tokens)
+            head = heapq.nlargest(limit + RERANK_MARGIN, scores.items(), key=itemgetter(1))
+            ranked = []
+            for item_id, score in head:
+                if phrase in self._doc_names[item_id]:
+                    score += PHRASE_BONUS
+                ranked.append((-score, self._order[item_id], item_id))
+            ranked.sort()
+
+            hits = [SearchHit(self._items[item_id], round(-neg_score, 4)) for neg_score, _, item_id in ranked[:limit]]
+            return hits, len(scores)
+
+    def coverage(self, tokens: List[str], item_id: str) -> Tuple[float, float]:
+        """How much of the query an item's name accounts for, and how much of
+        the name the query accounts for. Both are 0..1; fuzzy and partial term
+        matches count at the same discount they get in search()."""
+        with self._lock:
+            name_tokens = tokenize(self._items[item_id].name)
+            name_terms = set(_terms(name_tokens))
+            query_cover = [0.0] * len(tokens)
+            matched: Set[str] = set()
+            for position, term in enumerate(_terms(tokens)):
+                best, hit = 0.0, None
+                for vocab_term, factor in self._expand(term):
+                    if vocab_term in name_terms and factor > best:
+                        best, hit = factor, vocab_term
+                if hit is None:
+                    continue
+                matched.add(hit)
+                # Terms past the single tokens are adjacent pairs joined.
+                covers = [position] if position < len(tokens) else [position - len(tokens), position - len(tokens) + 1]
+                for i in covers:
+                    query_cover[i] = max(query_cover[i], best)
+
+        if not tokens or not name_tokens:
+            return 0.0, 0.0
+        pairs = [a + b for a, b in zip(name_tokens, name_tokens[1:])]
+        name_hits = sum(
+            1 for i, token in enumerate(name_tokens)
+            if token in matched or (i > 0 and pairs[i - 1] in matched) or (i < len(pairs) and pairs[i] in matched)
+        )
+        return sum(query_cover) / len(tokens), name_hits / len(name_tokens)
@@ -1,52 +1,93 @@
-import io
-import csv
-import uuid
-from typing import List, Optional
+import asyncio
+from typing import Any, Dict, List, Optional
 from fastapi import UploadFile, HTTPException
-from backend.database import supabase
-from backend.models import MenuItem, ModifierOption, MenuResponse
+from backend.database import db, execute
+from backend.models import (
+    MenuItem, ModifierOption, MenuResponse, MenuResolveBatchResponse, OrderItem, SpokenItem
+)
+from backend.services.menu_cache import MenuSnapshot, menu_cache
+from backend.services.menu_import import plan_import
+from backend.services.menu_resolve import resolve_batch
+from backend.config import settings
 
 class MenuService:
     @staticmethod
-    def get_menu(restaurant_id: str) -> List[MenuItem]:
+    def _record_to_item(record: dict) -> MenuItem:
+        return MenuItem(
+            item_id=record["item_id"],
+            name=record["name"],
+            category=record["category"],
+            price=record["price"],
+            availability=record["availability"],
+            description=record.get("description"),
+            modifiers=[ModifierOption(**m) for m in record["modifiers"]] if record["modifiers"] else []
+        )
+
+    @staticmethod
+    def _build_snapshot(records: List[Dict[str, Any]]) -> MenuSnapshot:
+        return MenuSnapshot([MenuService._record_to_item(record) for record in records])
+
+    @staticmethod
+    async def _load_snapshot(restaurant_id: str) -> MenuSnapshot:
+        response = await execute(db.table("menu_items").select("*").eq("restaurant_id", restaurant_id))
+        if len(response.data) >= settings.MENU_BUILD_THREAD_MIN_ITEMS:
+            return await asyncio.to_thread(MenuService._build_snapshot, response.data)
+        return MenuService._build_snapshot(response.data)
+
+    @staticmethod
+    async def get_menu_snapshot(restaurant_id: str) -> MenuSnapshot:
+        cached = menu_cache.get(restaurant_id)
+        if cached is not None:
+            return cached
+
         try:
-            response = supabase.table("menu_items").select("*").eq("restaurant_id", restaurant_id).execute()
-            items = []
-            for record in response.data:
-                items.append(MenuItem(
-                    item_id=record["item_id"],
-                    name=record["name"],
-                    category=record["category"],
-                    price=record["price"],
-                    availability=record["availability"],
-                    modifiers=[ModifierOption(**m) for m in record["modifiers"]] if record["modifiers"] else []
-                ))
-            return items
+            return await menu_cache.load(restaurant_id, lambda: MenuService._load_snapshot(restaurant_id))
         except Exception as e:
             print(f"Error fetching menu: {e}")
-            return []
+            return MenuSnapshot([])
+
+    @staticmethod
+    async def get_menu(restaurant_id: str) -> List[MenuItem]:
+        snapshot = await MenuService.get_menu_snapshot(restaurant_id)
+        return list(snapshot.items)
+
+    @staticmethod
+    def get_cache_stats():
+        return menu_cache.stats()
 
     @staticmethod
-    def search_menu(restaurant_id: str, query: Optional[str] = None, limit: int = 20) -> MenuResponse:
-        all_items = MenuService.get_menu(restaurant_id)
+    async def search_menu(restaurant_id: str, query: Optional[str] = None, limit: int = 20) -> MenuResponse:
+        snapshot = await MenuService.get_menu_snapshot(restaurant_id)
         
         if not query:
-            return MenuResponse(matches=all_items[:limit], notes="Listing full menu")
+            return MenuResponse(matches=snapshot.items[:limit], notes="Listing full menu")
 
-        matches = []
-        q = query.lower()
-        for item in all_items:
-            if q in item.name.lower() or q in item.category.lower():
-                matches.append(item)
-            
-        return MenuResponse(matches=matches[:limit], notes=f"Found {len(matches)} items for '{query}'")
+        hits, total = snapshot.search_index.search(query, limit)
+        return MenuResponse(matches=[hit.item for hit in hits], notes=f"Found {total} items for '{query}'")
 
     @staticmethod
-    def update_availability(item_id: str, available: bool):
+    async def resolve_items(restaurant_id: str, spoken_items: List[SpokenItem]) -> MenuResolveBatchResponse:
+        """Match every spoken item against one menu snapshot."""
+        snapshot = await MenuService.get_menu_snapshot(restaurant_id)
+        matches = resolve_batch(snapshot, spoken_items)
+        order_items, unresolved = [], []
+        for match in matches:
+            if match.item_id and match.available and match.confidence >= settings.MENU_RESOLVE_MIN_CONFIDENCE:
+                order_items.append(OrderItem(
+                    item_id=match.item_id, quantity=match.quantity, modifier_selections=match.modifier_selections,
+                ))
+            else:
+                unresolved.append(match.phrase)
+        return MenuResolveBatchResponse(matches=matches, order_items=order_items, unresolved=unresolved)
+
+    @staticmethod
+    async def update_availability(item_id: str, available: bool):
         try:
-            response = supabase.table("menu_items").update({"availability": available}).eq("item_id", item_id).execute()
+            response = await execute(db.table("menu_items").update({"availability": available}).eq("item_id", item_id))
             if not response.data:
                 raise HTTPException(status_code=404, detail="Item not found")
+            record = response.data[0]
+            menu_cache.update_item(record["restaurant_id"], MenuService._record_to_item(record))
             return {"status": "success", "item_id": item_id, "available": available}
         except Exception as e:
             if isinstance(e, HTTPException): raise e
@@ -54,27 +95,40 @@ class MenuService:
 
     @staticmethod
     async def upload_menu_csv(file: UploadFile, restaurant_id: str):
-        content = await file.read()
-        text = content.decode("utf-8")
-        reader = csv.DictReader(io.StringIO(text))
-        
-        new_items = []
-        for row in reader:
-            item_id = str(uuid.uuid4())[:8]
-            new_items.append({
-                "item_id": item_id,
-                "restaurant_id": restaurant_id,
-                "name": row.get("name", "Unknown"),
-                "category": row.get("category", "General"),
-                "price": float(row.get("price", 0.0)),
-                "availability": True,
-                "modifiers": []
-            })
-        
         try:
-            # Replace mode: delete existing, insert new
-            supabase.table("menu_items").delete().eq("restaurant_id", restaurant_id).execute()
-            supabase.table("menu_items").insert(new_items).execute()
-            return {"message": f"Uploaded {len(new_items)} items", "items_count": len(new_items)}
+            existing = await execute(
+                db.table("menu_items")
+                .select("item_id, name, category, price, description, modifiers, availability")
+                .eq("restaurant_id", restaurant_id)
+            )
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+
+        plan = await plan_import(file, restaurant_id, existing.data)
+        if not plan.valid_rows:
+            # Never treat an unreadable file as "the menu is now empty"
+            raise HTTPException(status_code=400, detail={"message": "No valid menu rows", "errors": plan.errors})
+
+        try:
+            # Upserts first, deletes last: the menu is never empty mid-import
+            changed = plan.inserts + plan.updates
+            for start in range(0, len(changed), settings.MENU_IMPORT_BATCH_SIZE):
+                batch = changed[start:start + settings.MENU_IMPORT_BATCH_SIZE]
+                await execute(db.table("menu_items").upsert(batch, on_conflict="item_id"))
+            for start in range(0, len(plan.deletes), settings.MENU_IMPORT_BATCH_SIZE):
+                batch = plan.deletes[start:start + settings.MENU_IMPORT_BATCH_SIZE]
+                await execute(db.table("menu_items").delete().in_("item_id", batch))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            menu_cache.invalidate(restaurant_id)
+
+        return {
+            "message": f"Uploaded {plan.valid_rows} items",
+            "items_count": plan.valid_rows,
+            "inserted": len(plan.inserts),
+            "updated": len(plan.updates),
+            "deleted": len(plan.deletes),
+            "unchanged": plan.unchanged,
+            "errors": plan.errors,
+        }
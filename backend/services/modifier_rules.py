@@ -0,0 +1,84 @@
+"""
+Modifier validation and pricing, compiled per menu item.
+
+Each item's modifier groups are compiled once, when its menu loads, into
+lookup tables: group name -> (option -> price adjustment in cents), plus
+each group's minimum and maximum number of selections. Checking a line's
+modifier_selections is then one dictionary lookup per selection and one
+count check per constrained group, with no scan of the group or option
+lists per order line.
+
+A group's minimum is min_selections, raised to 1 when it is `required`. No
+max_selections means any number of options may be picked.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.models import MenuItem, ModifierSelection
+
+
+def to_cents(price: float) -> int:
+    return int(round(price * 100))
+
+
+class CompiledModifier:
+    __slots__ = ("name", "options", "min_selections", "max_selections")
+
+    def __init__(self, name: str, options: Dict[str, int], min_selections: int, max_selections: Optional[int]):
+        self.name = name
+        # option -> price adjustment in cents
+        self.options = options
+        self.min_selections = min_selections
+        self.max_selections = max_selections
+
+
+class ItemRules:
+    """An item's compiled modifier groups."""
+    __slots__ = ("item", "groups", "constrained")
+
+    def __init__(self, item: MenuItem):
+        self.item = item
+        self.groups: Dict[str, CompiledModifier] = {}
+        for modifier in item.modifiers:
+            adjustments = modifier.price_adjustments
+            self.groups[modifier.name] = CompiledModifier(
+                modifier.name,
+                {option: to_cents(adjustments.get(option, 0.0)) for option in modifier.options},
+                max(modifier.min_selections, 1 if modifier.required else 0),
+                modifier.max_selections,
+            )
+        # Groups whose selection count has to be checked on every line
+        self.constrained: Tuple[CompiledModifier, ...] = tuple(
+            g for g in self.groups.values() if g.min_selections > 0 or g.max_selections is not None
+        )
+
+    def price(self, selections: Iterable[ModifierSelection]) -> Tuple[int, List[str]]:
+        """Per-unit price adjustment in cents for a line's selections, and what is wrong with them."""
+        adjustment = 0
+        errors: List[str] = []
+        counts: Dict[str, int] = {}
+        for selection in selections:
+            group = self.groups.get(selection.modifier_name)
+            if group is None:
+                errors.append(f"{self.item.name} has no modifier {selection.modifier_name}")
+                continue
+            cents = group.options.get(selection.option)
+            if cents is None:
+                errors.append(f"{selection.option} is not an option for {self.item.name} {group.name}")
+                continue
+            adjustment += cents
+            counts[group.name] = counts.get(group.name, 0) + 1
+
+        for group in self.constrained:
+            count = counts.get(group.name, 0)
+            if count < group.min_selections:
+                if group.min_selections == 1:
+                    errors.append(f"{self.item.name} needs a {group.name} choice")
+                else:
+                    errors.append(f"{self.item.name} needs at least {group.min_selections} {group.name} choices")
+            elif group.max_selections is not None and count > group.max_selections:
+                errors.append(f"{self.item.name} allows at most {group.max_selections} {group.name} choices")
+        return adjustment, errors
+
+
+def compile_rules(items: Iterable[MenuItem]) -> Dict[str, ItemRules]:
+    return {item.item_id: ItemRules(item) for item in items}
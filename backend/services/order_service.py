@@ -1,116 +1,173 @@
+import asyncio
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from fastapi import HTTPException
-from backend.database import supabase
+from backend.database import db, execute
 from backend.models import (
-    OrderCreateRequest, OrderResponse, EtaResponse, 
-    OrderConfirmRequest, OrderConfirmResponse, HandoffRequest, HandoffResponse
+    OrderCreateRequest, OrderEditRequest, OrderResponse, EtaResponse,
+    OrderConfirmRequest, OrderConfirmResponse, HandoffRequest, HandoffResponse, RestaurantSettings
 )
 from backend.services.menu_service import MenuService
+from backend.services.restaurant_service import RestaurantService
+from backend.services.time_windows import TimeWindow, resolve_window
+from backend.services.draft_orders import DRAFT_FIELDS, DraftOrder, draft_orders, edit_changes, line_changes
+from backend.services.idempotency import idempotency_key, order_idempotency
+from backend.services.kitchen_load import kitchen_load
+from backend.services.live_feed import live_feed
+from backend.services.pagination import apply_keyset, build_page, clamp_page_size, iter_keyset, projection
 from backend.config import settings
 
+# Columns a caller may request through `fields=`
+ORDER_COLUMNS = (
+    "order_id", "restaurant_id", "call_id", "status", "fulfillment", "customer_name",
+    "phone", "items", "notes", "subtotal", "tax", "total", "created_at",
+)
+
+# Namespace for order ids derived from an idempotency key
+ORDER_ID_NAMESPACE = uuid.UUID("5d0c1f9e-6b8a-4c55-9f0e-3a1d2b7c8e40")
+
 class OrderService:
     @staticmethod
-    def _calculate_eta_internal(restaurant_id: str) -> int:
-        base_eta = settings.BASE_ETA_MINUTES
-        try:
-            one_hour_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
-            response = supabase.table("orders") \
-                .select("count", count="exact") \
-                .eq("restaurant_id", restaurant_id) \
-                .eq("status", "confirmed") \
-                .gt("created_at", one_hour_ago) \
-                .execute()
-            
-            count = response.count or 0
-            adjustment = min(count * 2, 30)
-            return base_eta + adjustment
-        except:
-            return base_eta
-
-    @staticmethod
-    def create_or_update_order(req: OrderCreateRequest) -> OrderResponse:
-        # Fetch menu once
-        menu = MenuService.get_menu(req.restaurant_id)
-        menu_map = {item.item_id: item for item in menu}
-        
-        order_id = req.order_id or str(uuid.uuid4())
-        validation_errors = []
-        subtotal = 0.0
-        valid_items = []
-        
-        for item in req.items:
-            if item.item_id not in menu_map:
-                print(f"Validation Error: Item {item.item_id} not found. Available IDs: {list(menu_map.keys())}")
-                validation_errors.append(f"Item {item.item_id} not found")
-                continue
-                
-            menu_item = menu_map[item.item_id]
-            if not menu_item.availability:
-                validation_errors.append(f"Item {menu_item.name} is unavailable")
-                continue
-                
-            subtotal += menu_item.price * item.quantity
-            
-            # Flatten item for storage
-            item_dict = item.dict()
-            item_dict["name"] = menu_item.name
-            item_dict["price"] = menu_item.price
-            valid_items.append(item_dict)
-
-        tax = subtotal * settings.TAX_RATE
-        total = subtotal + tax
-        status = "draft"
-        
-        # Preserve existing status if updating
+    def _calculate_eta_internal(restaurant_id: str, config: RestaurantSettings) -> int:
+        return kitchen_load.eta_minutes(restaurant_id, config.base_eta_minutes, config.eta_max_load_minutes)
+
+    @staticmethod
+    def _tax_rate_change(draft: DraftOrder, config: RestaurantSettings) -> List[Dict[str, Any]]:
+        if draft.tax_rate == config.tax_rate:
+            return []
+        return [{"op": "tax_rate", "tax_rate": config.tax_rate}]
+
+    @staticmethod
+    def _publish_draft(draft: DraftOrder, created: bool) -> None:
+        """Push the draft as it now stands to the restaurant's live dashboards."""
+        order = {**draft.row(), "status": draft.status}
+        for money in ("subtotal", "tax", "total"):
+            order[money] = round(order[money], 2)
+        live_feed.publish(draft.restaurant_id, "order.created" if created else "order.updated", {"order": order})
+
+    @staticmethod
+    async def seed_kitchen_load() -> int:
+        """Fill the in-memory load window with orders confirmed within it."""
         try:
-            existing = supabase.table("orders").select("status").eq("order_id", order_id).execute()
-            if existing.data:
-                status = existing.data[0]["status"]
-        except:
-            pass
-        
+            since = (datetime.utcnow() - timedelta(seconds=kitchen_load.window_seconds)).isoformat()
+            response = await execute(
+                db.table("orders")
+                .select("restaurant_id, created_at, items")
+                .eq("status", "confirmed")
+                .gt("created_at", since)
+            )
+            return kitchen_load.seed(response.data)
+        except Exception as e:
+            print(f"Error seeding kitchen load: {e}")
+            return 0
+
+    @staticmethod
+    async def create_or_update_order(req: OrderCreateRequest) -> OrderResponse:
+        # Retries of the same call with the same payload, against the same
+        # draft version, are replayed or coalesced. Once the draft has moved
+        # on, the payload is applied again: a cart sent after a different one
+        # is a real change, and a late retry of an applied cart changes
+        # nothing. Without an order_id the call's open draft is updated;
+        # failing that, the new order's id is derived from the idempotency
+        # key, so even a retry outside the cache window targets the same row.
+        order_id = req.order_id or draft_orders.order_id_for_call(req.call_id)
+        draft = draft_orders.get(order_id) if order_id else None
+        key = idempotency_key("order_create_or_update", req.call_id, req, draft.version if draft else 0)
+        order_id = order_id or str(uuid.uuid5(ORDER_ID_NAMESPACE, key))
+        return await order_idempotency.run(key, lambda: OrderService._save_order(req, order_id))
+
+    @staticmethod
+    async def _load_draft(order_id: str) -> Optional[DraftOrder]:
+        """The order's draft, loading its saved row on first use; None if there is no such order."""
+        draft = draft_orders.get(order_id)
+        if draft is None:
+            response = await execute(db.table("orders").select("*").eq("order_id", order_id))
+            if response.data:
+                draft = draft_orders.load(response.data[0])
+        return draft
+
+    @staticmethod
+    async def _save_order(req: OrderCreateRequest, order_id: str) -> OrderResponse:
+        # Prices come from the cached menu snapshot and the tax rate from the
+        # cached restaurant settings, and only lines that are new to the
+        # draft are looked up. The row is written behind by the draft store,
+        # so once the draft is open, warm caches mean no database round trip.
+        # The first update reads the row, if there is one, so its status and
+        # lines carry over.
+        (snapshot, config), draft = await asyncio.gather(
+            asyncio.gather(
+                MenuService.get_menu_snapshot(req.restaurant_id), RestaurantService.get_settings(req.restaurant_id),
+            ),
+            OrderService._load_draft(order_id),
+        )
+        created = draft is None
+        draft = draft_orders.open(order_id, req.call_id, req.restaurant_id)
+
+        ops, validation_errors = line_changes(draft, req.items, snapshot.rules)
+        ops += OrderService._tax_rate_change(draft, config)
+        fields = {name: getattr(req, name) for name in DRAFT_FIELDS}
+        if fields != draft.fields:
+            ops.append({"op": "fields", "fields": fields})
+        draft_orders.record(draft, ops)
+        if ops:
+            OrderService._publish_draft(draft, created)
+        return OrderService._draft_response(draft, validation_errors)
+
+    @staticmethod
+    async def edit_order(req: OrderEditRequest) -> OrderResponse:
+        # add_item is not idempotent by nature, so a retried edit must not
+        # apply twice, while the same edit made again ("one more burger") must.
+        # The key is the draft version the caller based the edit on, which a
+        # retry repeats however far the draft has moved on since.
+        key = idempotency_key("order_edit", req.call_id, req, req.base_version)
+        return await order_idempotency.run(key, lambda: OrderService._edit(req))
+
+    @staticmethod
+    async def _edit(req: OrderEditRequest) -> OrderResponse:
+        # Only the lines the edits add or re-option are checked against the menu.
+        snapshot, config = await asyncio.gather(
+            MenuService.get_menu_snapshot(req.restaurant_id), RestaurantService.get_settings(req.restaurant_id),
+        )
+        draft = await OrderService._load_draft(req.order_id)
+        if draft is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if draft.status != "draft":
+            raise HTTPException(status_code=409, detail=f"Order is {draft.status} and can no longer be edited")
+        draft = draft_orders.open(draft.order_id, draft.call_id, draft.restaurant_id)
+        ops, validation_errors = edit_changes(draft, req.operations, snapshot.rules)
+        ops += OrderService._tax_rate_change(draft, config)
+        draft_orders.record(draft, ops)
+        if ops:
+            OrderService._publish_draft(draft, created=False)
+        return OrderService._draft_response(draft, validation_errors)
+
+    @staticmethod
+    def _draft_response(draft: DraftOrder, validation_errors: List[str]) -> OrderResponse:
+        subtotal = draft.subtotal
+        tax = subtotal * draft.tax_rate
+
         # Identify missing fields
         missing = []
-        if not req.customer_name: missing.append("customer_name")
-        if not req.phone: missing.append("phone")
-        if not req.items: missing.append("items")
-        
-        # Save to DB
-        order_data = {
-            "order_id": order_id,
-            "restaurant_id": req.restaurant_id,
-            "call_id": req.call_id,
-            "fulfillment": req.fulfillment,
-            "customer_name": req.customer_name,
-            "phone": req.phone,
-            "items": valid_items,
-            "notes": req.notes,
-            "subtotal": subtotal,
-            "tax": tax,
-            "total": total,
-            "status": status
-        }
-        
-        try:
-            supabase.table("orders").upsert(order_data).execute()
-        except Exception as e:
-            print(f"Error saving order: {e}")
-        
+        if not draft.fields["customer_name"]: missing.append("customer_name")
+        if not draft.fields["phone"]: missing.append("phone")
+        if not draft.lines: missing.append("items")
+
         return OrderResponse(
-            order_id=order_id,
-            status=status,
+            order_id=draft.order_id,
+            status=draft.status,
+            version=draft.version,
             subtotal=round(subtotal, 2),
             tax=round(tax, 2),
-            total=round(total, 2),
+            total=round(subtotal + tax, 2),
             missing_fields=missing,
             validation_errors=validation_errors
         )
 
     @staticmethod
-    def get_eta(restaurant_id: str) -> EtaResponse:
-        eta = OrderService._calculate_eta_internal(restaurant_id)
+    async def get_eta(restaurant_id: str) -> EtaResponse:
+        config = await RestaurantService.get_settings(restaurant_id)
+        eta = OrderService._calculate_eta_internal(restaurant_id, config)
         return EtaResponse(
             eta_minutes=eta,
             ready_time_iso=(datetime.now() + timedelta(minutes=eta)).isoformat(),
@@ -118,9 +175,16 @@ class OrderService:
         )
 
     @staticmethod
-    def confirm_order(req: OrderConfirmRequest) -> OrderConfirmResponse:
+    async def confirm_order(req: OrderConfirmRequest) -> OrderConfirmResponse:
+        key = idempotency_key("order_confirm", req.order_id, req)
+        return await order_idempotency.run(key, lambda: OrderService._confirm(req))
+
+    @staticmethod
+    async def _confirm(req: OrderConfirmRequest) -> OrderConfirmResponse:
         try:
-            response = supabase.table("orders").select("*").eq("order_id", req.order_id).execute()
+            # The draft's latest changes must be in the row before it is checked.
+            await draft_orders.flush(req.order_id)
+            response = await execute(db.table("orders").select("*").eq("order_id", req.order_id))
             if not response.data:
                 raise HTTPException(status_code=404, detail="Order not found")
             
@@ -131,10 +195,18 @@ class OrderService:
                 raise HTTPException(status_code=400, detail="Missing required fields for confirmation")
                 
             # Update status
-            supabase.table("orders").update({"status": "confirmed"}).eq("order_id", req.order_id).execute()
+            await execute(db.table("orders").update({"status": "confirmed"}).eq("order_id", req.order_id))
+            if order["status"] != "confirmed":
+                kitchen_load.record(req.restaurant_id, order)
+            await draft_orders.close(req.order_id)
             
-            eta = OrderService._calculate_eta_internal(req.restaurant_id)
+            config = await RestaurantService.get_settings(req.restaurant_id)
+            eta = OrderService._calculate_eta_internal(req.restaurant_id, config)
             payment_link = f"https://example.com/pay/{req.order_id}" if req.payment_mode == "payment_link" else None
+            if order["status"] != "confirmed":
+                live_feed.publish(req.restaurant_id, "order.confirmed", {
+                    "order": {**order, "status": "confirmed"}, "pickup_eta_minutes": eta,
+                })
                 
             return OrderConfirmResponse(
                 confirmed=True,
@@ -150,13 +222,22 @@ class OrderService:
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    def handoff_to_human(req: HandoffRequest) -> HandoffResponse:
+    async def handoff_to_human(req: HandoffRequest) -> HandoffResponse:
+        # The human picking up the call sees the order as the agent left it.
+        order_id = req.order_id or draft_orders.order_id_for_call(req.call_id)
+        if order_id:
+            try:
+                await draft_orders.close(order_id)
+            except Exception as e:
+                print(f"Error saving draft order: {e}")
         try:
-            supabase.table("call_logs").insert({
+            response = await execute(db.table("call_logs").insert({
                 "restaurant_id": req.restaurant_id,
                 "type": "handoff",
-                "data": req.dict()
-            }).execute()
+                "data": req.model_dump()
+            }))
+            if response.data:
+                live_feed.publish(req.restaurant_id, "call.logged", {"call": response.data[0]})
         except Exception as e:
             print(f"Error logging handoff: {e}")
             
@@ -166,59 +247,63 @@ class OrderService:
         )
 
     @staticmethod
-    def _resolve_time_window(
-        time_range: str = "today",
-        start_date: Optional[str] = None,
-        end_date: Optional[str] = None,
+    def _orders_query(
+        columns: str,
+        restaurant_id: Optional[str],
+        window: TimeWindow,
+        status: Optional[str],
     ):
-        now = datetime.utcnow()
+        query = db.table("orders").select(columns)
 
-        def _parse_iso(value: Optional[str]) -> Optional[datetime]:
-            if not value:
-                return None
-            try:
-                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                return parsed.replace(tzinfo=None) if parsed.tzinfo else parsed
-            except Exception:
-                return None
-
-        if time_range == "custom":
-            start = _parse_iso(start_date)
-            end = _parse_iso(end_date) or now
-            if start:
-                return start.isoformat(), end.isoformat()
-
-        if time_range == "week":
-            return (now - timedelta(days=7)).isoformat(), now.isoformat()
-        if time_range == "month":
-            return (now - timedelta(days=30)).isoformat(), now.isoformat()
-        if time_range == "year":
-            return (now - timedelta(days=365)).isoformat(), now.isoformat()
-
-        # Default: today
-        start_of_day = datetime(now.year, now.month, now.day)
-        return start_of_day.isoformat(), now.isoformat()
-
-    @staticmethod
-    def get_orders(
+        if restaurant_id:
+            query = query.eq("restaurant_id", restaurant_id)
+
+        query = query.gte("created_at", window.start_iso).lt("created_at", window.end_iso)
+
+        if status and status.lower() != "all":
+            query = query.eq("status", status)
+        return query
+
+    @staticmethod
+    async def get_orders(
         restaurant_id: Optional[str] = None,
         time_range: str = "today",
         status: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-    ):
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        page_size = clamp_page_size(limit)
+        columns = projection(fields, ORDER_COLUMNS, "order_id")
         try:
-            query = supabase.table("orders").select("*").order("created_at", desc=True)
-
-            if restaurant_id:
-                query = query.eq("restaurant_id", restaurant_id)
-
-            start_iso, end_iso = OrderService._resolve_time_window(time_range, start_date, end_date)
-            query = query.gte("created_at", start_iso).lte("created_at", end_iso)
-
-            if status and status.lower() != "all":
-                query = query.eq("status", status)
+            timezone = await RestaurantService.get_timezone(restaurant_id)
+            window = resolve_window(time_range, timezone, start_date, end_date)
+            query = OrderService._orders_query(columns, restaurant_id, window, status)
+            query = apply_keyset(query, cursor, "order_id").limit(page_size + 1)
+            response = await execute(query)
+            return build_page(response.data, page_size, "order_id")
+        except Exception as e:
+            if isinstance(e, HTTPException): raise e
+            return {"items": [], "next_cursor": None}
 
-            return query.execute().data
-        except:
-            return []
+    @staticmethod
+    async def iter_orders(
+        restaurant_id: Optional[str] = None,
+        time_range: str = "today",
+        status: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every order in the window, fetched in chunks, for streaming exports."""
+        # Resolve the window once so "now" does not move between chunks
+        timezone = await RestaurantService.get_timezone(restaurant_id)
+        window = resolve_window(time_range, timezone, start_date, end_date)
+        orders = iter_keyset(
+            lambda: OrderService._orders_query("*", restaurant_id, window, status),
+            "order_id",
+            settings.EXPORT_CHUNK_SIZE,
+        )
+        async for order in orders:
+            yield order
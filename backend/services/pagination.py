@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination and column projection for dashboard list endpoints.
+
+Pages are ordered newest first on (created_at, id). The cursor is an opaque
+token holding the last row's key, and the next page asks for rows strictly
+before it. That is one index range scan per page, no matter how deep the
+caller pages, unlike OFFSET.
+"""
+import base64
+import json
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from backend.config import settings
+from backend.database import execute
+
+
+# A cursor comes back from the client and its values end up in a filter
+# string, so only a timestamp and a plain id token are accepted.
+_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?", re.ASCII)
+_ROW_ID = re.compile(r"[\w.:-]{1,128}", re.ASCII)
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not (isinstance(created_at, str) and _TIMESTAMP.fullmatch(created_at)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if isinstance(row_id, int) and not isinstance(row_id, bool):
+        row_id = str(row_id)
+    if not (isinstance(row_id, str) and _ROW_ID.fullmatch(row_id)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, row_id
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return settings.PAGE_SIZE_DEFAULT
+    return min(limit, settings.PAGE_SIZE_MAX)
+
+
+def projection(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    id_column: str,
+    derived: Optional[Mapping[str, str]] = None,
+) -> str:
+    """Build a select list from a comma-separated `fields` parameter.
+
+    `derived` maps extra field names to the select expression that reads
+    them, such as one key of a JSON column. The pagination key columns are
+    always included so the cursor can be built.
+    """
+    if not fields or fields.strip() == "*":
+        return "*"
+    derived = derived or {}
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed and f not in derived]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    columns = list(dict.fromkeys(requested + ["created_at", id_column]))
+    return ",".join(derived.get(column, column) for column in columns)
+
+
+def apply_keyset(query, cursor: Optional[str], id_column: str):
+    """Order newest first and, given a cursor, continue strictly after it."""
+    query = query.order("created_at", desc=True).order(id_column, desc=True)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",{id_column}.lt."{row_id}")'
+        )
+    return query
+
+
+def build_page(rows: List[Dict[str, Any]], page_size: int, id_column: str) -> Dict[str, Any]:
+    """Trim a page_size + 1 fetch to page_size and emit the next cursor, if any."""
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], str(last[id_column]))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def iter_keyset(build_query: Callable[[], Any], id_column: str, chunk_size: int) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every row of a query, newest first, fetching `chunk_size` rows per round trip.
+
+    `build_query` returns a fresh filtered query each time; only one chunk is
+    held in memory at once.
+    """
+    cursor = None
+    while True:
+        query = apply_keyset(build_query(), cursor, id_column).limit(chunk_size + 1)
+        response = await execute(query)
+        page = build_page(response.data, chunk_size, id_column)
+        for row in page["items"]:
+            yield row
+        cursor = page["next_cursor"]
+        if not cursor:
+            return
@@ -0,0 +1,105 @@
+"""
+Per-restaurant settings (tax rate, kitchen speed) from the `restaurants` table.
+
+Order pricing and ETAs read them on every call, so they are served from an
+in-process cache: a hit makes no database round trip. Restaurants without a
+row, and columns left null, fall back to the global defaults in Settings;
+those resolved settings are cached too, so a restaurant that never
+configured anything does not query on every call either.
+
+Writes through update_settings() invalidate the entry at once. Changes made
+elsewhere (the Supabase table editor, another worker) reach this process
+through settings_changed(), which a database webhook on `restaurants` can
+call via POST /restaurants/{restaurant_id}/settings/changed. Until then the
+entry's TTL bounds how stale it can be.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from backend.config import on_reload, settings
+from backend.database import db, execute
+from backend.models import RestaurantSettings, RestaurantSettingsUpdate
+from backend.services.menu_cache import RestaurantCache
+from backend.services.time_windows import is_valid_zone
+
+SETTINGS_COLUMNS = "restaurant_id, name, tax_rate, base_eta_minutes, eta_max_load_minutes, timezone"
+
+restaurant_settings_cache = RestaurantCache(
+    ttl_seconds=settings.RESTAURANT_CONFIG_TTL_SECONDS,
+    max_restaurants=settings.RESTAURANT_CONFIG_MAX_RESTAURANTS,
+)
+
+
+@on_reload
+def _apply_settings() -> None:
+    restaurant_settings_cache.ttl_seconds = settings.RESTAURANT_CONFIG_TTL_SECONDS
+    restaurant_settings_cache.max_restaurants = settings.RESTAURANT_CONFIG_MAX_RESTAURANTS
+
+
+def _defaulted(value: Any, default: Any) -> Any:
+    return default if value is None else value
+
+
+class RestaurantService:
+    @staticmethod
+    def _resolve(restaurant_id: str, record: Optional[Dict[str, Any]]) -> RestaurantSettings:
+        record = record or {}
+        return RestaurantSettings(
+            restaurant_id=restaurant_id,
+            name=record.get("name"),
+            tax_rate=float(_defaulted(record.get("tax_rate"), settings.TAX_RATE)),
+            base_eta_minutes=int(_defaulted(record.get("base_eta_minutes"), settings.BASE_ETA_MINUTES)),
+            eta_max_load_minutes=int(_defaulted(record.get("eta_max_load_minutes"), settings.ETA_MAX_LOAD_MINUTES)),
+            timezone=_defaulted(record.get("timezone"), settings.DEFAULT_TIMEZONE),
+        )
+
+    @staticmethod
+    async def get_settings(restaurant_id: str) -> RestaurantSettings:
+        cached = restaurant_settings_cache.get(restaurant_id)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await execute(
+                db.table("restaurants").select(SETTINGS_COLUMNS).eq("restaurant_id", restaurant_id)
+            )
+        except Exception as e:
+            # Price with the defaults rather than fail the call, and retry next time.
+            print(f"Error fetching restaurant settings: {e}")
+            return RestaurantService._resolve(restaurant_id, None)
+
+        resolved = RestaurantService._resolve(restaurant_id, response.data[0] if response.data else None)
+        restaurant_settings_cache.set(restaurant_id, resolved)
+        return resolved
+
+    @staticmethod
+    async def get_timezone(restaurant_id: Optional[str]) -> str:
+        """The zone a restaurant's dashboard days start in; the default for all restaurants."""
+        if not restaurant_id:
+            return settings.DEFAULT_TIMEZONE
+        return (await RestaurantService.get_settings(restaurant_id)).timezone
+
+    @staticmethod
+    async def update_settings(restaurant_id: str, update: RestaurantSettingsUpdate) -> RestaurantSettings:
+        changes = update.model_dump(exclude_unset=True)
+        if changes.get("timezone") and not is_valid_zone(changes["timezone"]):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {changes['timezone']}")
+        row = {"restaurant_id": restaurant_id, **changes, "updated_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            response = await execute(db.table("restaurants").upsert(row, on_conflict="restaurant_id"))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            RestaurantService.settings_changed(restaurant_id)
+        return RestaurantService._resolve(restaurant_id, response.data[0] if response.data else changes)
+
+    @staticmethod
+    def settings_changed(restaurant_id: Optional[str] = None) -> None:
+        """Notification hook: drop one restaurant's cached settings, or all of them."""
+        restaurant_settings_cache.invalidate(restaurant_id)
+
+    @staticmethod
+    def get_cache_stats():
+        return restaurant_settings_cache.stats()
@@ -1,49 +1,48 @@
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-from backend.database import supabase
+from typing import Dict, Any, Optional, List, AsyncIterator
+from fastapi import HTTPException
+from backend.config import settings
+from backend.database import db, execute
+from backend.services.pagination import apply_keyset, build_page, clamp_page_size, iter_keyset, projection
+from backend.services.restaurant_service import RestaurantService
+from backend.services.time_windows import TimeWindow, resolve_window
+
+# Counters kept per (restaurant, granularity, bucket) in stats_rollups
+ROLLUP_FIELDS = (
+    "calls",
+    "handoffs",
+    "timed_calls",
+    "call_duration_seconds",
+    "orders",
+    "confirmed_orders",
+    "revenue",
+)
+
+# Columns a caller may request through `fields=`
+CALL_LOG_COLUMNS = ("id", "restaurant_id", "type", "data", "created_at")
+# Fields the call list shows, read out of `data` so a page of the list does
+# not carry every transcript
+CALL_LOG_DATA_FIELDS = {
+    "phone": "phone:data->>phone",
+    "duration": "duration:data->>duration",
+    "outcome": "outcome:data->>outcome",
+    "transfer_reason": "transfer_reason:data->>reason",
+}
+
+# Columns written by the CSV export, after _flatten_call_log
+CALL_LOG_EXPORT_COLUMNS = (
+    "id", "restaurant_id", "type", "created_at", "phone", "duration",
+    "outcome", "transfer_reason", "data",
+)
 
 
 class StatsService:
-    @staticmethod
-    def _resolve_time_window(
-        time_range: str = "today",
-        start_date: Optional[str] = None,
-        end_date: Optional[str] = None,
-    ):
-        now = datetime.utcnow()
-
-        def _parse_iso(value: Optional[str]) -> Optional[datetime]:
-            if not value:
-                return None
-            try:
-                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                return parsed.replace(tzinfo=None) if parsed.tzinfo else parsed
-            except Exception:
-                return None
-
-        if time_range == "custom":
-            start = _parse_iso(start_date)
-            end = _parse_iso(end_date) or now
-            if start:
-                return start.isoformat(), end.isoformat()
-
-        if time_range == "week":
-            return (now - timedelta(days=7)).isoformat(), now.isoformat()
-        if time_range == "month":
-            return (now - timedelta(days=30)).isoformat(), now.isoformat()
-        if time_range == "year":
-            return (now - timedelta(days=365)).isoformat(), now.isoformat()
-
-        start_of_day = datetime(now.year, now.month, now.day)
-        return start_of_day.isoformat(), now.isoformat()
-
     @staticmethod
     def _flatten_call_log(record: Dict[str, Any]) -> Dict[str, Any]:
         payload = record.get("data") or {}
         if not isinstance(payload, dict):
             payload = {}
 
-        raw_outcome = payload.get("outcome", record.get("type"))
+        raw_outcome = payload.get("outcome", record.get("outcome") or record.get("type"))
         outcome = "transferred" if raw_outcome == "handoff" else raw_outcome
 
         return {
@@ -56,82 +55,129 @@ class StatsService:
         }
 
     @staticmethod
-    def get_stats(restaurant_id: Optional[str] = None) -> Dict[str, Any]:
-        try:
-            start_iso, _ = StatsService._resolve_time_window("today")
+    def _format_duration(seconds: float) -> str:
+        minutes, secs = divmod(int(round(seconds)), 60)
+        return f"{minutes}:{secs:02d}"
 
-            orders_query = supabase.table("orders").select("*").gte("created_at", start_iso)
-            if restaurant_id:
-                orders_query = orders_query.eq("restaurant_id", restaurant_id)
-            orders_resp = orders_query.execute()
-            orders = orders_resp.data
-
-            calls_query = supabase.table("call_logs").select("*", count="exact").gte("created_at", start_iso)
-            if restaurant_id:
-                calls_query = calls_query.eq("restaurant_id", restaurant_id)
-            calls_resp = calls_query.execute()
+    @staticmethod
+    async def get_rollup_totals(
+        restaurant_id: Optional[str],
+        start_iso: str,
+        end_iso: Optional[str] = None,
+        granularity: str = "hour",
+    ) -> Dict[str, float]:
+        """Sum the pre-aggregated rollup buckets starting in [start, end)."""
+        query = db.table("stats_rollups").select(",".join(ROLLUP_FIELDS)) \
+            .eq("granularity", granularity).gte("bucket_start", start_iso)
+        if end_iso:
+            query = query.lt("bucket_start", end_iso)
+        if restaurant_id:
+            query = query.eq("restaurant_id", restaurant_id)
+
+        response = await execute(query)
+        totals = dict.fromkeys(ROLLUP_FIELDS, 0.0)
+        for row in response.data:
+            for field in ROLLUP_FIELDS:
+                totals[field] += float(row.get(field) or 0)
+        return totals
 
-            calls_count = calls_resp.count or 0
+    @staticmethod
+    async def get_stats(restaurant_id: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            # Hour-aligned, so the hourly buckets add up to exactly the window
+            window = resolve_window("today", await RestaurantService.get_timezone(restaurant_id), align="hour")
+            totals = await StatsService.get_rollup_totals(restaurant_id, window.start_iso, window.end_iso)
 
-            confirmed_orders = [o for o in orders if o["status"] == "confirmed"]
-            revenue = sum(float(o["total"]) for o in confirmed_orders)
+            calls = int(totals["calls"])
+            confirmed_orders = int(totals["confirmed_orders"])
+            timed_calls = int(totals["timed_calls"])
+            revenue = round(totals["revenue"], 2)
 
             return {
                 "aiStatus": "online",
-                "callsToday": calls_count,
-                "ordersToday": len(orders),
+                "callsToday": calls,
+                "ordersToday": int(totals["orders"]),
                 "revenue": revenue,
-                "avgOrderValue": revenue / len(confirmed_orders) if confirmed_orders else 0,
-                "conversionRate": 0,
-                "avgCallDuration": "0:00",
-                "fallbackRate": 0,
+                "avgOrderValue": round(revenue / confirmed_orders, 2) if confirmed_orders else 0,
+                "conversionRate": round(confirmed_orders / calls * 100, 1) if calls else 0,
+                "avgCallDuration": StatsService._format_duration(totals["call_duration_seconds"] / timed_calls) if timed_calls else "0:00",
+                "fallbackRate": round(totals["handoffs"] / calls * 100, 1) if calls else 0,
             }
         except Exception as e:
             print(f"Stats error: {e}")
             return {}
 
     @staticmethod
-    def get_call_logs(
+    def _call_logs_query(columns: str, restaurant_id: Optional[str], window: TimeWindow):
+        query = db.table("call_logs").select(columns)
+        query = query.gte("created_at", window.start_iso).lt("created_at", window.end_iso)
+        if restaurant_id:
+            query = query.eq("restaurant_id", restaurant_id)
+        return query
+
+    @staticmethod
+    async def get_call_logs(
         restaurant_id: Optional[str] = None,
         time_range: str = "today",
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-    ):
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        page_size = clamp_page_size(limit)
+        columns = projection(fields, CALL_LOG_COLUMNS, "id", CALL_LOG_DATA_FIELDS)
         try:
-            start_iso, end_iso = StatsService._resolve_time_window(time_range, start_date, end_date)
-
-            query = supabase.table("call_logs").select("*").order("created_at", desc=True)
-            query = query.gte("created_at", start_iso).lte("created_at", end_iso)
-            if restaurant_id:
-                query = query.eq("restaurant_id", restaurant_id)
+            window = resolve_window(time_range, await RestaurantService.get_timezone(restaurant_id), start_date, end_date)
+            query = StatsService._call_logs_query(columns, restaurant_id, window)
+            query = apply_keyset(query, cursor, "id").limit(page_size + 1)
+            response = await execute(query)
+            page = build_page(response.data, page_size, "id")
+            page["items"] = [StatsService._flatten_call_log(record) for record in page["items"]]
+            return page
+        except Exception as e:
+            if isinstance(e, HTTPException): raise e
+            return {"items": [], "next_cursor": None}
 
-            response = query.execute()
-            return [StatsService._flatten_call_log(record) for record in response.data]
-        except:
-            return []
+    @staticmethod
+    async def iter_call_logs(
+        restaurant_id: Optional[str] = None,
+        time_range: str = "today",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every flattened call log in the window, fetched in chunks, for streaming exports."""
+        window = resolve_window(time_range, await RestaurantService.get_timezone(restaurant_id), start_date, end_date)
+        records = iter_keyset(
+            lambda: StatsService._call_logs_query("*", restaurant_id, window),
+            "id",
+            settings.EXPORT_CHUNK_SIZE,
+        )
+        async for record in records:
+            yield StatsService._flatten_call_log(record)
 
     @staticmethod
-    def get_call_detail(call_id: str, restaurant_id: Optional[str] = None):
+    async def get_call_detail(call_id: str, restaurant_id: Optional[str] = None):
         try:
-            query = supabase.table("call_logs").select("*").eq("id", call_id)
+            query = db.table("call_logs").select("*").eq("id", call_id)
             if restaurant_id:
                 query = query.eq("restaurant_id", restaurant_id)
 
-            response = query.single().execute()
+            response = await execute(query.single())
             return StatsService._flatten_call_log(response.data) if response.data else None
-        except:
+        except Exception:
             return None
 
     @staticmethod
-    def get_faqs_list(restaurant_id: str):
+    async def get_faqs_list(restaurant_id: str):
         try:
-            response = supabase.table("faqs").select("*").eq("restaurant_id", restaurant_id).execute()
+            response = await execute(db.table("faqs").select("*").eq("restaurant_id", restaurant_id))
             return response.data
         except Exception:
             return []
 
     @staticmethod
-    def bulk_replace_faqs(restaurant_id: str, faqs: List[Dict[str, Any]]):
+    async def bulk_replace_faqs(restaurant_id: str, faqs: List[Dict[str, Any]]):
         try:
             sanitized = [
                 {
@@ -143,10 +189,10 @@ class StatsService:
                 if faq.get("question") and faq.get("answer")
             ]
 
-            supabase.table("faqs").delete().eq("restaurant_id", restaurant_id).execute()
+            await execute(db.table("faqs").delete().eq("restaurant_id", restaurant_id))
 
             if sanitized:
-                supabase.table("faqs").insert(sanitized).execute()
+                await execute(db.table("faqs").insert(sanitized))
 
             return {"status": "success", "count": len(sanitized)}
         except Exception:
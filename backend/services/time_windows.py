@@ -0,0 +1,174 @@
+"""
+Dashboard time windows ("today", "week", custom dates) in a restaurant's
+own timezone.
+
+A window is a half-open UTC range [start, end), used as
+`created_at >= start and created_at < end`, which a range scan on the
+(restaurant_id, created_at) indexes serves.
+
+"today" starts at local midnight, so a restaurant's day boundary no longer
+falls in the middle of dinner service. "week", "month" and "year" are that
+day plus the 6, 29 or 364 days before it. Open-ended windows end at the
+next hour boundary after now, so every request in the same hour resolves
+to the same window and it can be used as a cache key. Custom dates
+without an offset are read as local time. A date with no time
+("2024-03-01") covers the whole day, so an end date of 2024-03-07 includes
+the 7th.
+
+By default ("exact") the bounds are kept as they are, for queries on the
+orders and call_logs rows. "hour" and "day" widen them to whole buckets,
+for summing the stats_rollups buckets. Hour buckets are in UTC, so in zones
+with a half-hour offset an hour-aligned "today" starts at the UTC hour
+before local midnight.
+"""
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+# Days before today included by each rolling range
+RANGE_DAYS = {"today": 0, "week": 6, "month": 29, "year": 364}
+ALIGNMENTS = ("exact", "hour", "day")
+
+
+class TimeWindow(NamedTuple):
+    start: datetime
+    end: datetime
+
+    @property
+    def start_iso(self) -> str:
+        return self.start.isoformat()
+
+    @property
+    def end_iso(self) -> str:
+        return self.end.isoformat()
+
+
+@lru_cache(maxsize=256)
+def get_zone(name: Optional[str]) -> tzinfo:
+    """The named IANA zone, or UTC when it is unset or unknown."""
+    if not name or ZoneInfo is None:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        return timezone.utc
+
+
+def is_valid_zone(name: str) -> bool:
+    return name == "UTC" or get_zone(name) is not timezone.utc
+
+
+def _floor(moment: datetime, align: str, zone: tzinfo) -> datetime:
+    """The bucket boundary at or before `moment`, in UTC."""
+    if align == "day":
+        local = moment.astimezone(zone)
+        return _local_midnight(local.date(), zone)
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil(moment: datetime, align: str, zone: tzinfo) -> datetime:
+    """The bucket boundary at or after `moment`, in UTC."""
+    floor = _floor(moment, align, zone)
+    if floor == moment:
+        return floor
+    return _next_boundary(floor, align, zone)
+
+
+def _next_boundary(boundary: datetime, align: str, zone: tzinfo) -> datetime:
+    if align == "day":
+        # Calendar days, not 24 hours: DST days are 23 or 25 hours long.
+        return _local_midnight(boundary.astimezone(zone).date() + timedelta(days=1), zone)
+    return boundary + timedelta(hours=1)
+
+
+def _local_midnight(day: date, zone: tzinfo) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=zone).astimezone(timezone.utc)
+
+
+def _bucket(align: str) -> str:
+    """The bucket "now" is rounded to, for open-ended windows and the cache key."""
+    return "hour" if align == "exact" else align
+
+
+def _aligned(start: datetime, end: datetime, align: str, zone: tzinfo) -> TimeWindow:
+    if align == "exact":
+        return TimeWindow(start, max(start, end))
+    start = _floor(start, align, zone)
+    # At least one whole bucket
+    return TimeWindow(start, max(_ceil(end, align, zone), _next_boundary(start, align, zone)))
+
+
+def _parse(value: Optional[str], zone: tzinfo):
+    """(moment in UTC, whether it was a bare date), or (None, False) if unreadable."""
+    if not value:
+        return None, False
+    try:
+        if len(value) == 10:
+            return _local_midnight(date.fromisoformat(value), zone), True
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None, False
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=zone)
+    return parsed.astimezone(timezone.utc), False
+
+
+@lru_cache(maxsize=1024)
+def _resolve(
+    time_range: str,
+    zone_name: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    align: str,
+    now_bucket: datetime,
+    today: date,
+) -> TimeWindow:
+    zone = get_zone(zone_name)
+    # Everything up to now is inside an open-ended window.
+    open_end = _next_boundary(now_bucket, _bucket(align), zone)
+
+    if time_range == "custom":
+        start, _ = _parse(start_date, zone)
+        if start is not None:
+            end, whole_day = _parse(end_date, zone)
+            if end is None:
+                end = open_end
+            elif whole_day:
+                end = _next_boundary(end, "day", zone)
+            return _aligned(start, end, align, zone)
+
+    start = _local_midnight(today - timedelta(days=RANGE_DAYS.get(time_range, 0)), zone)
+    return _aligned(start, open_end, align, zone)
+
+
+
+def resolve_window(
+    time_range: str = "today",
+    zone_name: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    align: str = "exact",
+    now: Optional[datetime] = None,
+) -> TimeWindow:
+    """The [start, end) window for a dashboard range, widened to whole `align`
+    buckets unless `align` is "exact".
+
+    Resolved bounds are cached per current hour (or day), so repeated
+    requests within it share one computation and one window.
+    """
+    if align not in ALIGNMENTS:
+        raise ValueError(f"align must be one of {ALIGNMENTS}")
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    zone = get_zone(zone_name)
+    return _resolve(
+        time_range, zone_name or None, start_date or None, end_date or None,
+        align, _floor(now, _bucket(align), zone), now.astimezone(zone).date(),
+    )
@@ -0,0 +1,474 @@
+"""
+Embedded SQLite storage behind the same query-builder calls as PostgREST.
+
+Services build queries as `db.table("orders").select("*").eq(...)` and run
+them through database.execute. With DB_BACKEND=sqlite, `db` is a
+SQLiteClient instead: the same chain compiles to SQL against a local
+WAL-mode database file. Tests, benchmarks and single-site deployments then
+run without a remote Postgres and without a network hop per query.
+
+The schema mirrors supabase_schema.sql, including the stats_rollups
+triggers. JSON columns are stored as text and decoded on the way out.
+Timestamps are ISO 8601 UTC strings, which compare like the timestamptz
+values PostgREST returns. Statements run inline on the caller's thread: an
+indexed local read takes tens of microseconds, less than a hop to a worker.
+"""
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+_NOW = "(strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))"
+
+SCHEMA = f"""
+create table if not exists menu_items (
+    item_id text primary key,
+    restaurant_id text not null,
+    name text not null,
+    category text not null,
+    price real not null,
+    description text,
+    availability integer default 1,
+    modifiers text default '[]',
+    created_at text default {_NOW}
+);
+
+create table if not exists orders (
+    order_id text primary key,
+    restaurant_id text not null,
+    call_id text,
+    status text not null default 'draft',
+    fulfillment text default 'pickup',
+    customer_name text,
+    phone text,
+    items text default '[]',
+    notes text,
+    subtotal real default 0,
+    tax real default 0,
+    total real default 0,
+    created_at text default {_NOW}
+);
+
+create table if not exists call_logs (
+    id text primary key,
+    restaurant_id text not null,
+    type text not null,
+    data text default '{{}}',
+    created_at text default {_NOW}
+);
+
+create table if not exists faqs (
+    id text primary key,
+    restaurant_id text not null,
+    question text not null,
+    answer text not null,
+    created_at text default {_NOW}
+);
+
+create table if not exists restaurants (
+    restaurant_id text primary key,
+    name text,
+    tax_rate real,
+    base_eta_minutes integer,
+    eta_max_load_minutes integer,
+    timezone text,
+    updated_at text default {_NOW}
+);
+
+create table if not exists stats_rollups (
+    restaurant_id text not null,
+    granularity text not null,
+    bucket_start text not null,
+    calls integer not null default 0,
+    handoffs integer not null default 0,
+    timed_calls integer not null default 0,
+    call_duration_seconds real not null default 0,
+    orders integer not null default 0,
+    confirmed_orders integer not null default 0,
+    revenue real not null default 0,
+    primary key (restaurant_id, granularity, bucket_start)
+);
+
+create index if not exists idx_menu_restaurant on menu_items(restaurant_id);
+create index if not exists idx_orders_status on orders(status);
+create index if not exists idx_orders_restaurant_created on orders(restaurant_id, created_at desc, order_id desc);
+create index if not exists idx_calls_restaurant_created on call_logs(restaurant_id, created_at desc, id desc);
+"""
+
+# Bucket start of an ISO timestamp, per rollup granularity
+_BUCKETS = {"hour": "'%Y-%m-%dT%H:00:00+00:00'", "day": "'%Y-%m-%dT00:00:00+00:00'"}
+
+
+def _bump(row: str, deltas: Dict[str, str]) -> str:
+    """SQL adding `deltas` to the hour and day buckets of `row` (new/old)."""
+    columns = ", ".join(deltas)
+    values = ", ".join(deltas.values())
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in deltas)
+    return "".join(
+        f"insert into stats_rollups (restaurant_id, granularity, bucket_start, {columns}) "
+        f"values ({row}.restaurant_id, '{g}', strftime({fmt}, {row}.created_at), {values}) "
+        f"on conflict (restaurant_id, granularity, bucket_start) do update set {updates};\n"
+        for g, fmt in _BUCKETS.items()
+    )
+
+
+def _order_deltas(row: str, sign: str) -> Dict[str, str]:
+    confirmed = f"{row}.status = 'confirmed'"
+    return {
+        "orders": f"{sign}1",
+        "confirmed_orders": f"case when {confirmed} then {sign}1 else 0 end",
+        "revenue": f"case when {confirmed} then {sign}coalesce({row}.total, 0) else 0 end",
+    }
+
+
+_CALL_DURATION = "duration_to_seconds(json_extract(new.data, '$.duration'))"
+_CALL_DELTAS = {
+    "calls": "1",
+    "handoffs": "case when new.type = 'handoff' then 1 else 0 end",
+    "timed_calls": f"case when {_CALL_DURATION} is null then 0 else 1 end",
+    "call_duration_seconds": f"coalesce({_CALL_DURATION}, 0)",
+}
+
+# Same contributions as rollup_orders() / rollup_call_logs() in supabase_schema.sql
+TRIGGERS = f"""
+create trigger if not exists trg_rollup_orders_insert after insert on orders begin
+{_bump("new", _order_deltas("new", ""))}end;
+
+create trigger if not exists trg_rollup_orders_update after update of status, total, restaurant_id on orders begin
+{_bump("old", _order_deltas("old", "-"))}{_bump("new", _order_deltas("new", ""))}end;
+
+create trigger if not exists trg_rollup_orders_delete after delete on orders begin
+{_bump("old", _order_deltas("old", "-"))}end;
+
+create trigger if not exists trg_rollup_call_logs after insert on call_logs begin
+{_bump("new", _CALL_DELTAS)}end;
+"""
+
+PRIMARY_KEYS = {
+    "menu_items": ("item_id",),
+    "orders": ("order_id",),
+    "call_logs": ("id",),
+    "faqs": ("id",),
+    "restaurants": ("restaurant_id",),
+    "stats_rollups": ("restaurant_id", "granularity", "bucket_start"),
+}
+# Filled in on insert, like the uuid_generate_v4() defaults
+GENERATED_IDS = {"call_logs": "id", "faqs": "id"}
+JSON_COLUMNS = {"menu_items": {"modifiers"}, "orders": {"items"}, "call_logs": {"data"}}
+BOOL_COLUMNS = {"menu_items": {"availability"}}
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+# PostgREST's `alias:column->>key`: one field of a JSON column, as text
+_JSON_FIELD = re.compile(r"^([a-z_][a-z0-9_]*):([a-z_][a-z0-9_]*)->>([a-z_][a-z0-9_]*)$")
+_FILTER_OPS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_DURATION_SECONDS = re.compile(r"^\d+(\.\d+)?$")
+_DURATION_CLOCK = re.compile(r"^\d+(:\d{1,2}){1,2}$")
+
+
+class StorageError(Exception):
+    pass
+
+
+def duration_to_seconds(value: Any) -> Optional[float]:
+    """Call durations arrive as seconds ("154") or clock strings ("2:34", "1:02:03")."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if _DURATION_SECONDS.match(text):
+        return float(text)
+    if _DURATION_CLOCK.match(text):
+        parts = text.split(":")
+        return float(sum(int(p) * 60 ** (len(parts) - 1 - i) for i, p in enumerate(parts)))
+    return None
+
+
+def _column(name: str) -> str:
+    name = name.strip()
+    if not _IDENTIFIER.match(name):
+        raise StorageError(f"Invalid column name: {name!r}")
+    return name
+
+
+def _select_item(text: str) -> str:
+    match = _JSON_FIELD.match(text.strip())
+    if match:
+        alias, column, key = match.groups()
+        return f"cast(json_extract({column}, '$.{key}') as text) as {alias}"
+    return _column(text)
+
+
+def _param(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a PostgREST logic list on commas outside parentheses and quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _logic(text: str, joiner: str) -> Tuple[str, List[Any]]:
+    """Compile an or_() filter string, e.g. 'a.lt.1,and(a.eq.1,b.lt."x")'."""
+    clauses, params = [], []
+    for part in _split_top_level(text):
+        for nested in ("and", "or"):
+            if part.startswith(nested + "(") and part.endswith(")"):
+                sql, nested_params = _logic(part[len(nested) + 1:-1], f" {nested} ")
+                clauses.append(f"({sql})")
+                params += nested_params
+                break
+        else:
+            column, op, value = part.split(".", 2)
+            if op not in _FILTER_OPS:
+                raise StorageError(f"Unsupported filter operator: {op}")
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            clauses.append(f"{_column(column)} {_FILTER_OPS[op]} ?")
+            params.append(value)
+    return joiner.join(clauses), params
+
+
+class SQLiteResponse:
+    def __init__(self, data: Union[List[Dict[str, Any]], Dict[str, Any], None], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class SQLiteQueryBuilder:
+    """One query, built with the postgrest-py chain the services already use."""
+    db_system = "sqlite"
+
+    def __init__(self, client: "SQLiteClient", table: str):
+        if table not in PRIMARY_KEYS:
+            raise StorageError(f"Unknown table: {table}")
+        self._client = client
+        self.table_name = table
+        self.operation = "select"
+        self._columns = "*"
+        # "exact" to also return the number of matching rows
+        self.count: Optional[str] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._values: Dict[str, Any] = {}
+        self._on_conflict: Tuple[str, ...] = PRIMARY_KEYS[table]
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._single = False
+
+    # -- operations ------------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "SQLiteQueryBuilder":
+        self.operation = "select"
+        requested = ",".join(columns) or "*"
+        if requested.strip() != "*":
+            requested = ", ".join(_select_item(c) for c in requested.split(","))
+        self._columns = requested
+        self.count = count
+        return self
+
+    def insert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]]) -> "SQLiteQueryBuilder":
+        self.operation = "insert"
+        self._rows = [rows] if isinstance(rows, dict) else list(rows)
+        return self
+
+    def upsert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]], on_conflict: str = "") -> "SQLiteQueryBuilder":
+        self.insert(rows)
+        self.operation = "upsert"
+        if on_conflict:
+            self._on_conflict = tuple(_column(c) for c in on_conflict.split(","))
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "SQLiteQueryBuilder":
+        self.operation = "update"
+        self._values = values
+        return self
+
+    def delete(self) -> "SQLiteQueryBuilder":
+        self.operation = "delete"
+        return self
+
+    # -- filters and modifiers -------------------------------------------------
+
+    def _filter(self, column: str, op: str, value: Any) -> "SQLiteQueryBuilder":
+        self._where.append(f"{_column(column)} {op} ?")
+        self._params.append(_param(value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, "=", value)
+
+    def neq(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, "<>", value)
+
+    def gt(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, ">", value)
+
+    def gte(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, ">=", value)
+
+    def lt(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, "<", value)
+
+    def lte(self, column: str, value: Any) -> "SQLiteQueryBuilder":
+        return self._filter(column, "<=", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "SQLiteQueryBuilder":
+        values = [_param(v) for v in values]
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_column(column)} in ({', '.join('?' * len(values))})")
+        self._params += values
+        return self
+
+    def or_(self, filters: str) -> "SQLiteQueryBuilder":
+        sql, params = _logic(filters, " or ")
+        self._where.append(f"({sql})")
+        self._params += params
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "SQLiteQueryBuilder":
+        self._order.append(f"{_column(column)} {'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, size: int) -> "SQLiteQueryBuilder":
+        self._limit = int(size)
+        return self
+
+    def single(self) -> "SQLiteQueryBuilder":
+        self._single = True
+        return self
+
+    # -- compilation -----------------------------------------------------------
+
+    def _where_sql(self) -> str:
+        return f" where {' and '.join(self._where)}" if self._where else ""
+
+    def _insert_statement(self, row: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        generated = GENERATED_IDS.get(self.table_name)
+        if generated and row.get(generated) is None:
+            row = {**row, generated: str(uuid.uuid4())}
+        columns = [_column(c) for c in row]
+        sql = (f"insert into {self.table_name} ({', '.join(columns)}) "
+               f"values ({', '.join('?' * len(columns))})")
+        if self.operation == "upsert":
+            updates = [c for c in columns if c not in self._on_conflict] or list(self._on_conflict)
+            sql += (f" on conflict ({', '.join(self._on_conflict)}) do update set "
+                    + ", ".join(f"{c} = excluded.{c}" for c in updates))
+        return sql + " returning *", [_param(v) for v in row.values()]
+
+    def statements(self) -> List[Tuple[str, List[Any]]]:
+        table = self.table_name
+        if self.operation == "select":
+            sql = f"select {self._columns} from {table}{self._where_sql()}"
+            if self._order:
+                sql += " order by " + ", ".join(self._order)
+            if self._limit is not None:
+                sql += f" limit {self._limit}"
+            return [(sql, list(self._params))]
+        if self.operation in ("insert", "upsert"):
+            return [self._insert_statement(row) for row in self._rows]
+        if self.operation == "update":
+            assignments = ", ".join(f"{_column(c)} = ?" for c in self._values)
+            params = [_param(v) for v in self._values.values()] + self._params
+            return [(f"update {table} set {assignments}{self._where_sql()} returning *", params)]
+        return [(f"delete from {table}{self._where_sql()} returning *", list(self._params))]
+
+    def count_statement(self) -> Tuple[str, List[Any]]:
+        return f"select count(*) from {self.table_name}{self._where_sql()}", list(self._params)
+
+    # -- execution -------------------------------------------------------------
+
+    def _decode(self, columns: List[str], rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Rows as dicts, with JSON and boolean columns converted column by column."""
+        records = [dict(zip(columns, row)) for row in rows]
+        for column in JSON_COLUMNS.get(self.table_name, set()).intersection(columns):
+            loads = json.loads
+            for record in records:
+                value = record[column]
+                if value is not None:
+                    record[column] = loads(value)
+        for column in BOOL_COLUMNS.get(self.table_name, set()).intersection(columns):
+            for record in records:
+                if record[column] is not None:
+                    record[column] = bool(record[column])
+        return records
+
+    async def execute(self) -> SQLiteResponse:
+        columns, rows, count = self._client.run(self)
+        data = self._decode(columns, rows)
+        if self._single:
+            if len(data) != 1:
+                raise StorageError(f"JSON object requested, {len(data)} rows returned")
+            return SQLiteResponse(data[0], count)
+        return SQLiteResponse(data, count)
+
+
+class SQLiteClient:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.create_function("duration_to_seconds", 1, duration_to_seconds, deterministic=True)
+        # WAL: readers never block on the writer, and a commit is an append
+        # to the log rather than a rewrite of the database file.
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.executescript(SCHEMA + TRIGGERS)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> SQLiteQueryBuilder:
+        return SQLiteQueryBuilder(self, name)
+
+    # Same entry point name as the PostgREST client
+    from_ = table
+
+    def run(self, query: SQLiteQueryBuilder) -> Tuple[List[str], List[tuple], Optional[int]]:
+        """(column names, rows, count) for a built query."""
+        statements = query.statements()
+        with self._lock:
+            if query.operation == "select":
+                sql, params = statements[0]
+                cursor = self._conn.execute(sql, params)
+                rows = cursor.fetchall()
+                count = None
+                if query.count:
+                    count_sql, count_params = query.count_statement()
+                    count = self._conn.execute(count_sql, count_params).fetchone()[0]
+                return [d[0] for d in cursor.description], rows, count
+
+            # A multi-row write lands all at once or not at all.
+            columns: List[str] = []
+            rows = []
+            self._conn.execute("begin immediate")
+            try:
+                for sql, params in statements:
+                    cursor = self._conn.execute(sql, params)
+                    rows += cursor.fetchall()
+                    columns = [d[0] for d in cursor.description]
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+            return columns, rows, None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,171 @@
+"""Tests for in-memory draft orders: deltas, write-behind and journal recovery."""
+import asyncio
+import os
+
+from backend.models import MenuItem, ModifierOption, ModifierSelection, OrderEditOperation, OrderItem
+from backend.services import draft_orders
+from backend.services.draft_orders import DraftOrderStore, edit_changes, line_changes
+from backend.services.modifier_rules import compile_rules
+
+MENU = {
+    "burger": MenuItem(item_id="burger", name="Classic Cheeseburger", category="Burgers", price=10.99, availability=True,
+                       modifiers=[ModifierOption(name="Toppings", options=["No pickles", "Extra cheese"],
+                                                 price_adjustments={"Extra cheese": 0.75})]),
+    "fries": MenuItem(item_id="fries", name="Fries", category="Sides", price=3.49, availability=True,
+                      modifiers=[ModifierOption(name="Size", options=["Regular", "Large"])]),
+}
+RULES = compile_rules(MENU.values())
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def _fake_db(monkeypatch):
+    upserts = []
+
+    async def fake_execute(query):
+        upserts.append(query.request.json)
+        return FakeResponse([{**query.request.json, "status": "draft"}])
+
+    monkeypatch.setattr(draft_orders, "execute", fake_execute)
+    return upserts
+
+
+def _update(store, draft, items):
+    ops, errors = line_changes(draft, items, RULES)
+    store.record(draft, ops)
+    return ops, errors
+
+
+def test_only_changed_lines_become_deltas():
+    store = DraftOrderStore(journal_dir=None, flush_delay=60, idle_seconds=1800)
+    draft = store.open("o1", "c1", "r1")
+    _update(store, draft, [OrderItem(item_id="burger", quantity=1)])
+    assert draft.subtotal == 10.99
+
+    # A price change on the menu does not reprice a line already in the cart.
+    ops, errors = line_changes(draft, [OrderItem(item_id="burger", quantity=3), OrderItem(item_id="nope", quantity=1)], {})
+    assert errors == ["Item nope not found"]
+    assert [op["op"] for op in ops] == ["set_line"]
+    store.record(draft, ops)
+    assert draft.subtotal == 32.97
+
+    no_pickles = OrderItem(item_id="burger", quantity=1,
+                           modifier_selections=[ModifierSelection(modifier_name="Toppings", option="No pickles")])
+    ops, _ = _update(store, draft, [no_pickles, OrderItem(item_id="fries", quantity=2)])
+    assert sorted(op["op"] for op in ops) == ["remove_line", "set_line", "set_line"]
+    assert draft.subtotal == 17.97
+    assert len(draft.row()["items"]) == 2
+
+
+def test_edits_touch_only_their_lines():
+    store = DraftOrderStore(journal_dir=None, flush_delay=60, idle_seconds=1800)
+    draft = store.open("o3", "c3", "r1")
+    _update(store, draft, [OrderItem(item_id="burger", quantity=2)])
+
+    edits = [
+        OrderEditOperation(op="add_item", item_id="fries", quantity=2),
+        OrderEditOperation(op="set_modifier", item_id="fries", modifier_name="Size", option="Large"),
+        OrderEditOperation(op="set_modifier", item_id="fries", modifier_name="Size", option="Huge"),
+        OrderEditOperation(op="set_quantity", item_id="burger", quantity=1),
+        OrderEditOperation(op="remove_item", item_id="shake"),
+    ]
+    # The burger is no longer on the menu: editing its quantity needs no lookup.
+    ops, errors = edit_changes(draft, edits, {"fries": RULES["fries"]})
+    store.record(draft, ops)
+    assert errors == ["Huge is not an option for Fries Size", "Item shake is not in the order"]
+    assert draft.subtotal == 17.97
+    fries = next(line for line in draft.lines.values() if line["item_id"] == "fries")
+    assert fries["modifier_selections"] == [{"modifier_name": "Size", "option": "Large"}]
+
+    # Without modifiers an edit picks the plain line; re-optioning it merges it into the Large one.
+    ops, errors = edit_changes(draft, [
+        OrderEditOperation(op="add_item", item_id="fries"),
+        OrderEditOperation(op="set_modifier", item_id="fries", modifier_name="Size", option="Large"),
+        OrderEditOperation(op="add_item", item_id="fries",
+                           modifier_selections=[ModifierSelection(modifier_name="Size", option="Regular")]),
+        OrderEditOperation(op="set_quantity", item_id="fries", quantity=5),
+    ], RULES)
+    store.record(draft, ops)
+    assert errors == ["Item fries is in the order more than once; give its modifier_selections"]
+    assert [line["quantity"] for line in draft.lines.values() if line["item_id"] == "fries"] == [3, 1]
+    assert draft.subtotal == 24.95
+
+
+def test_burst_of_updates_is_one_debounced_upsert(monkeypatch):
+    upserts = _fake_db(monkeypatch)
+    store = DraftOrderStore(journal_dir=None, flush_delay=0.02, idle_seconds=1800)
+
+    async def turns():
+        draft = store.open("o2", "c2", "r1")
+        for quantity in (1, 2, 3):
+            _update(store, draft, [OrderItem(item_id="fries", quantity=quantity)])
+            await asyncio.sleep(0.005)
+        assert upserts == []
+        await asyncio.sleep(0.05)
+
+    asyncio.run(turns())
+    assert len(upserts) == 1
+    assert upserts[0]["items"][0]["quantity"] == 3
+    assert not store.get("o2").dirty
+
+
+def test_recover_adopts_finished_journals_and_writes_unsaved_drafts(monkeypatch, tmp_path):
+    upserts = _fake_db(monkeypatch)
+    journal_dir = str(tmp_path / "journals")
+
+    before = DraftOrderStore(journal_dir=journal_dir, flush_delay=60, idle_seconds=1800)
+    saved = before.open("saved", "c-saved", "r1")
+    _update(before, saved, [OrderItem(item_id="burger", quantity=1)])
+    asyncio.run(before.flush("saved"))
+    unsaved = before.open("unsaved", "c-unsaved", "r1")
+    _update(before, unsaved, [OrderItem(item_id="fries", quantity=2)])
+    closed = before.open("closed", "c-closed", "r1")
+    _update(before, closed, [OrderItem(item_id="fries", quantity=1)])
+    asyncio.run(before.close("closed"))
+    with open(before.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"order_id": "unsaved", "op"')  # torn write at crash time
+
+    # A process that is still running keeps its journal.
+    running = DraftOrderStore(journal_dir=journal_dir, flush_delay=60, idle_seconds=1800)
+    running.open("live", "c-live", "r1")
+    upserts.clear()
+
+    after = DraftOrderStore(journal_dir=journal_dir, flush_delay=60, idle_seconds=1800)
+    assert asyncio.run(after.recover()) == 0
+    before.release_journal()  # the process exits
+    assert asyncio.run(after.recover()) == 2
+    assert [u["order_id"] for u in upserts] == ["unsaved"]
+    assert upserts[0]["subtotal"] == 6.98
+    assert after.order_id_for_call("c-saved") == "saved"
+    assert after.get("saved").subtotal == 10.99
+    assert after.get("saved").version == saved.version
+    assert after.get("closed") is None
+    assert after.get("live") is None
+    assert sorted(os.listdir(journal_dir)) == sorted(
+        os.path.basename(s.journal_path) for s in (running, after)
+    )
+
+    # The compacted journal replays to the same state.
+    after.release_journal()
+    again = DraftOrderStore(journal_dir=journal_dir, flush_delay=60, idle_seconds=1800)
+    upserts.clear()
+    assert asyncio.run(again.recover()) == 2
+    assert upserts == []
+    assert again.get("saved").version == saved.version
+
+
+def test_journal_is_compacted_past_its_threshold_and_when_drafts_close(monkeypatch, tmp_path):
+    _fake_db(monkeypatch)
+    store = DraftOrderStore(journal_dir=str(tmp_path), flush_delay=60, idle_seconds=1800, compact_bytes=2000)
+    draft = store.open("o4", "c4", "r1")
+    for quantity in range(1, 30):
+        _update(store, draft, [OrderItem(item_id="fries", quantity=quantity)])
+        assert os.path.getsize(store.journal_path) <= 2000 + 500
+
+    asyncio.run(store.close("o4"))
+    assert os.path.getsize(store.journal_path) == 0
+    store.release_journal()
+    assert os.listdir(str(tmp_path)) == []
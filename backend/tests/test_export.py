@@ -0,0 +1,71 @@
+"""Tests for the streaming order and call-log exports."""
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.main import app
+from backend.services import pagination
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def _fake_pages(monkeypatch, rows, id_column):
+    """Serve `rows` newest first, honouring the keyset cursor and the limit."""
+    calls = []
+
+    async def fake_execute(query):
+        params = query.request.params
+        limit = int(params["limit"])
+        remaining = rows
+        if "or" in params:
+            created_at = params["or"].split('created_at.lt."', 1)[1].split('"', 1)[0]
+            remaining = [r for r in rows if r["created_at"] < created_at]
+        calls.append(limit)
+        return FakeResponse(remaining[:limit])
+
+    monkeypatch.setattr(pagination, "execute", fake_execute)
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+    return calls
+
+
+def test_orders_export_streams_ndjson_in_chunks(monkeypatch):
+    rows = [
+        {"order_id": f"o{i}", "created_at": f"2024-05-01T10:0{9 - i}:00", "items": [{"item_id": "x"}], "total": i}
+        for i in range(5)
+    ]
+    calls = _fake_pages(monkeypatch, rows, "order_id")
+
+    response = TestClient(app).get("/orders/export", params={"restaurant_id": "r1", "range": "year"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["order_id"] for r in exported] == ["o0", "o1", "o2", "o3", "o4"]
+    assert calls == [3, 3, 3]
+
+
+def test_calls_export_csv_flattens_each_row(monkeypatch):
+    rows = [{
+        "id": "c1", "restaurant_id": "r1", "type": "handoff", "created_at": "2024-05-01T10:00:00",
+        "data": {"reason": "allergy question", "phone": "555-0100"},
+    }]
+    _fake_pages(monkeypatch, rows, "id")
+
+    response = TestClient(app).get("/calls/export", params={"format": "csv"})
+
+    assert response.headers["content-type"].startswith("text/csv")
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert records[0]["outcome"] == "transferred"
+    assert records[0]["transfer_reason"] == "allergy question"
+    assert json.loads(records[0]["data"])["phone"] == "555-0100"
+
+
+def test_unknown_export_format_is_rejected():
+    response = TestClient(app).get("/orders/export", params={"format": "xlsx"})
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+"""Tests for the sliding-window kitchen load tracker."""
+from backend.services.kitchen_load import ItemCountLoadModel, KitchenLoadTracker
+
+
+class FakeClock:
+    def __init__(self, now: float = 10_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_orders_age_out_of_the_window():
+    clock = FakeClock()
+    tracker = KitchenLoadTracker(window_seconds=3600, clock=clock)
+    tracker.record("r1", {})
+    clock.now += 1800
+    tracker.record("r1", {})
+    assert tracker.load("r1") == 2
+
+    clock.now += 1800
+    assert tracker.load("r1") == 1
+    clock.now += 1800
+    assert tracker.load("r1") == 0
+    assert tracker.load("other") == 0
+
+
+def test_eta_matches_original_order_count_formula():
+    tracker = KitchenLoadTracker(clock=FakeClock())
+    assert tracker.eta_minutes("r1", 30) == 30
+    for _ in range(3):
+        tracker.record("r1", {})
+    assert tracker.eta_minutes("r1", 30) == 36
+    for _ in range(20):
+        tracker.record("r1", {})
+    assert tracker.eta_minutes("r1", 30) == 60
+
+
+def test_item_count_model_weights_large_orders():
+    tracker = KitchenLoadTracker(load_model=ItemCountLoadModel(), clock=FakeClock())
+    tracker.record("r1", {"items": [{"quantity": 4}, {"quantity": 2}]})
+    tracker.record("r1", {"items": []})
+    assert tracker.load("r1") == 7
+
+
+def test_seed_from_rows_skips_expired_and_keeps_order():
+    clock = FakeClock(now=1_700_000_000.0)
+    tracker = KitchenLoadTracker(window_seconds=3600, clock=clock)
+    seeded = tracker.seed([
+        {"restaurant_id": "r1", "created_at": "2023-11-14T22:10:00+00:00"},
+        {"restaurant_id": "r1", "created_at": "2023-11-14T21:00:00+00:00"},
+        {"restaurant_id": "r2", "created_at": "2023-11-14T22:00:00Z"},
+    ])
+    assert seeded == 3
+    assert tracker.load("r1") == 1
+    assert tracker.load("r2") == 1
@@ -0,0 +1,136 @@
+"""Tests for the dashboard live feed and the events services publish to it."""
+import asyncio
+import json
+
+import pytest
+
+from backend.models import HandoffRequest, OrderConfirmRequest, OrderCreateRequest, OrderItem
+from backend.routers.events import stream_events
+from backend.services import draft_orders, menu_service, order_service, restaurant_service
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.idempotency import order_idempotency
+from backend.services.live_feed import LiveFeed
+from backend.services.menu_cache import menu_cache
+from backend.services.order_service import OrderService
+from backend.sqlite_store import SQLiteClient
+
+
+def _events(frames):
+    """(event, data) pairs from SSE frames."""
+    parsed = []
+    for frame in frames:
+        fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def test_events_fan_out_to_the_restaurants_subscribers_only():
+    async def run():
+        feed = LiveFeed(queue_size=10, replay_size=10)
+        screens = [feed.subscribe("r1") for _ in range(3)]
+        other = feed.subscribe("r2")
+        feed.publish("r1", "order.created", {"order": {"order_id": "o1"}})
+        got = [await s.next_frames(0.01) for s in screens]
+        return got, await other.next_frames(0.01), feed.stats()
+
+    got, other, stats = asyncio.run(run())
+    assert all(_events(frames) == [("order.created", {"order": {"order_id": "o1"}})] for frames in got)
+    assert other == []
+    assert (stats["subscribers"], stats["published"], stats["delivered"]) == (4, 1, 3)
+
+
+def test_slow_subscriber_gets_a_resync_instead_of_a_backlog():
+    async def run():
+        feed = LiveFeed(queue_size=3, replay_size=10)
+        screen = feed.subscribe("r1")
+        for n in range(5):
+            feed.publish("r1", "order.updated", {"n": n})
+        return await screen.next_frames(0.01), screen.resyncs
+
+    frames, resyncs = asyncio.run(run())
+    assert _events(frames) == [("resync", {}), ("order.updated", {"n": 4})]
+    assert resyncs == 1
+
+
+def test_reconnect_replays_missed_events_or_asks_for_a_resync():
+    async def run():
+        feed = LiveFeed(queue_size=10, replay_size=1)
+        first = feed.publish("r1", "order.created", {"n": 1})
+        second = feed.publish("r1", "order.updated", {"n": 2})
+        feed.publish("r2", "order.created", {"n": 0})
+        feed.publish("r1", "order.updated", {"n": 3})
+        replayed = await feed.subscribe("r1", second).next_frames(0.01)
+        too_old = await feed.subscribe("r1", first).next_frames(0.01)
+        restarted = await feed.subscribe("r1", "0000-1").next_frames(0.01)
+        return replayed, too_old, restarted
+
+    replayed, too_old, restarted = asyncio.run(run())
+    assert _events(replayed) == [("order.updated", {"n": 3})]
+    assert _events(too_old) == _events(restarted) == [("resync", {})]
+
+
+def test_stream_sends_keepalives_and_unsubscribes_on_close(monkeypatch):
+    feed = LiveFeed(queue_size=10, replay_size=10)
+    monkeypatch.setattr("backend.routers.events.live_feed", feed)
+
+    async def run():
+        stream = stream_events("r1", None, heartbeat_seconds=0.01)
+        opened = await stream.__anext__()
+        idle = await stream.__anext__()
+        feed.publish("r1", "call.logged", {"call": {"id": "c1"}})
+        feed.publish("r1", "call.logged", {"call": {"id": "c2"}})
+        batch = await stream.__anext__()
+        await stream.aclose()
+        return opened, idle, batch
+
+    opened, idle, batch = asyncio.run(run())
+    assert opened == idle == ": keepalive\n\n"
+    assert [data["call"]["id"] for _, data in _events(batch.split("\n\n")[:-1])] == ["c1", "c2"]
+    assert feed.stats()["subscribers"] == 0
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "voicehub.db"))
+    for module in (draft_orders, menu_service, order_service, restaurant_service):
+        monkeypatch.setattr(module, "db", client)
+    monkeypatch.setattr(order_service, "draft_orders", DraftOrderStore(None, flush_delay=60, idle_seconds=1800))
+    feed = LiveFeed(queue_size=100, replay_size=100)
+    monkeypatch.setattr(order_service, "live_feed", feed)
+    order_idempotency.clear()
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    yield client, feed
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    client.close()
+
+
+def test_order_and_call_log_writes_are_published(store):
+    client, feed = store
+    asyncio.run(client.table("menu_items").insert(
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 10.0}
+    ).execute())
+
+    async def call():
+        screen = feed.subscribe("r1")
+
+        def update(quantity):
+            return OrderService.create_or_update_order(OrderCreateRequest(
+                restaurant_id="r1", call_id="c1", customer_name="Ann", phone="555",
+                items=[OrderItem(item_id="b1", quantity=quantity)],
+            ))
+
+        resp = await update(1)
+        await update(1)  # unchanged: nothing to push
+        await update(2)
+        await OrderService.confirm_order(OrderConfirmRequest(restaurant_id="r1", order_id=resp.order_id))
+        await OrderService.handoff_to_human(HandoffRequest(restaurant_id="r1", call_id="c2", reason="asked"))
+        return await screen.next_frames(0.01)
+
+    events = _events(asyncio.run(call()))
+    assert [event for event, _ in events] == ["order.created", "order.updated", "order.confirmed", "call.logged"]
+    assert events[1][1]["order"]["items"][0]["quantity"] == 2
+    assert events[1][1]["order"]["total"] == 21.77
+    assert events[2][1]["order"]["status"] == "confirmed" and events[2][1]["pickup_eta_minutes"] > 0
+    assert events[3][1]["call"]["type"] == "handoff"
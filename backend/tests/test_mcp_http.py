@@ -0,0 +1,89 @@
+"""Tests for the Streamable HTTP MCP transport mounted at /mcp."""
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import mcp_server
+from backend.routers import mcp
+
+
+async def _fake_dispatch(name, arguments):
+    await asyncio.sleep(arguments.get("delay", 0))
+    return json.dumps({"tool": name})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mcp_server, "dispatch_tool_async", _fake_dispatch)
+    monkeypatch.setattr(mcp, "sessions", mcp.McpSessionStore(ttl_seconds=60, max_sessions=100))
+    app = FastAPI()
+    app.include_router(mcp.router)
+    return TestClient(app)
+
+
+def _call(req_id, delay=0):
+    return {"jsonrpc": "2.0", "id": req_id, "method": "tools/call",
+            "params": {"name": "menu_search", "arguments": {"delay": delay}}}
+
+
+def _open_session(client):
+    response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+    assert response.status_code == 200
+    assert response.json()["result"]["serverInfo"]["name"] == "restaurant-voice-hub"
+    return response.headers[mcp.SESSION_HEADER]
+
+
+def test_session_lifecycle(client):
+    session_id = _open_session(client)
+    headers = {mcp.SESSION_HEADER: session_id}
+
+    initialized = client.post("/mcp", json={"jsonrpc": "2.0", "method": "notifications/initialized"}, headers=headers)
+    assert initialized.status_code == 202
+
+    response = client.post("/mcp", json=_call(1), headers=headers)
+    assert response.json()["id"] == 1
+    assert json.loads(response.json()["result"]["content"][0]["text"]) == {"tool": "menu_search"}
+
+    assert client.delete("/mcp", headers=headers).status_code == 204
+    assert client.post("/mcp", json=_call(2), headers=headers).status_code == 404
+    assert client.post("/mcp", json=_call(3)).status_code == 400
+
+
+def test_sessions_are_independent(client):
+    first, second = _open_session(client), _open_session(client)
+    assert first != second
+    for session_id in (first, second):
+        response = client.post("/mcp", json=[_call("a"), _call("b")], headers={mcp.SESSION_HEADER: session_id})
+        assert sorted(r["id"] for r in response.json()) == ["a", "b"]
+
+
+def test_batch_streams_each_response_as_it_completes(client):
+    headers = {mcp.SESSION_HEADER: _open_session(client), "Accept": "application/json, text/event-stream"}
+    response = client.post("/mcp", json=[_call("slow", 0.2), _call("fast", 0.01), "bad"], headers=headers)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [e.get("id") for e in events] == [None, "fast", "slow"]
+    assert events[0]["error"]["code"] == -32600
+
+
+def test_session_store_expires_idle_sessions_and_caps_count():
+    now = [0.0]
+    store = mcp.McpSessionStore(ttl_seconds=10, max_sessions=2, clock=lambda: now[0])
+
+    async def scenario():
+        first = store.create()
+        now[0] = 5
+        assert store.get(first) is not None
+        now[0] = 14
+        assert store.get(first) is not None  # last seen at 5
+        second, third = store.create(), store.create()
+        assert store.get(first) is None  # evicted, oldest of three
+        now[0] = 30
+        assert store.get(second) is None and store.get(third) is None
+        assert len(store) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,195 @@
+"""Tests for the MCP server: tool registry, generated schemas and the concurrent stdio transport."""
+import asyncio
+import io
+import json
+import sys
+import time
+
+import pytest
+
+from backend import mcp_server
+from backend.metrics import TOOL_LATENCY
+from backend.models import EtaResponse
+from backend.observability import flush_logs, log_error
+from backend.services import draft_orders
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.order_service import OrderService
+
+
+async def _fake_dispatch(name, arguments):
+    await asyncio.sleep(arguments.get("delay", 0))
+    if name == "boom":
+        raise ValueError("tool failed")
+    return json.dumps({"tool": name, "n": arguments.get("n")})
+
+
+def _call(req_id, delay, n=None, name="order_confirm"):
+    return {"jsonrpc": "2.0", "id": req_id, "method": "tools/call",
+            "params": {"name": name, "arguments": {"delay": delay, "n": n}}}
+
+
+def _run_session(lines, max_concurrency=64, close_after=0.0):
+    """Pipe `lines` (dicts, lists or raw strings) into the server; return (responses, wall time)."""
+    written = []
+
+    async def main():
+        queue = asyncio.Queue()
+        for line in lines:
+            queue.put_nowait((line if isinstance(line, str) else json.dumps(line)).encode() + b"\n")
+
+        async def read_line():
+            if queue.empty():
+                await asyncio.sleep(close_after)
+                return b""
+            return queue.get_nowait()
+
+        start = time.perf_counter()
+        await mcp_server.serve(read_line, written.append, max_concurrency)
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    return [json.loads(w) for w in written], elapsed
+
+
+@pytest.fixture
+def fake_dispatch(monkeypatch):
+    monkeypatch.setattr(mcp_server, "dispatch_tool_async", _fake_dispatch)
+
+
+def test_concurrent_calls_take_about_as_long_as_the_slowest(fake_dispatch):
+    delays = [0.05] * 49 + [0.3]
+    responses, elapsed = _run_session([_call(i, d, n=i) for i, d in enumerate(delays)])
+
+    assert sorted(r["id"] for r in responses) == list(range(50))
+    for r in responses:
+        assert json.loads(r["result"]["content"][0]["text"])["n"] == r["id"]
+    # Sequential handling would take ~2.75s.
+    assert elapsed < 0.3 + 0.25
+
+
+def test_responses_are_written_as_calls_complete(fake_dispatch):
+    responses, _ = _run_session([_call("slow", 0.2), _call("fast", 0.01)])
+    assert [r["id"] for r in responses] == ["fast", "slow"]
+
+
+def test_concurrency_limit_is_respected(fake_dispatch):
+    _, elapsed = _run_session([_call(i, 0.1) for i in range(4)], max_concurrency=2)
+    assert elapsed >= 0.2
+
+
+def test_batch_gets_one_array_response_without_notifications(fake_dispatch):
+    batch = [
+        _call(1, 0.01),
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        _call(3, 0, name="boom"),
+        "not an object",
+    ]
+    responses, _ = _run_session([batch])
+
+    (batch_response,) = responses
+    by_id = {r["id"]: r for r in batch_response}
+    assert set(by_id) == {1, 2, 3, None}
+    assert by_id[3]["result"]["isError"] is True
+    assert by_id[None]["error"]["code"] == -32600
+
+
+def test_cancellation_notification_stops_the_call_without_a_response(fake_dispatch):
+    cancel = {"jsonrpc": "2.0", "method": "notifications/cancelled",
+              "params": {"requestId": "slow", "reason": "caller hung up"}}
+    responses, elapsed = _run_session([_call("slow", 5), _call("fast", 0), cancel], close_after=0.05)
+
+    assert [r["id"] for r in responses] == ["fast"]
+    assert elapsed < 1
+
+
+def test_parse_errors_and_empty_batches_are_reported(fake_dispatch):
+    responses, _ = _run_session(["{not json", "[]"])
+    assert [r["error"]["code"] for r in responses] == [-32700, -32600]
+
+
+def test_input_schemas_are_generated_from_request_models():
+    schema = mcp_server.TOOLS["order_create_or_update"]["inputSchema"]
+    assert schema["required"] == ["restaurant_id", "call_id"]
+    assert schema["properties"]["fulfillment"]["enum"] == ["pickup", "delivery"]
+    item = schema["properties"]["items"]["items"]
+    assert item["required"] == ["item_id", "quantity"]
+    assert "$ref" not in json.dumps(schema) and "title" not in schema
+    assert mcp_server.TOOLS["menu_search"]["inputSchema"]["required"] == []
+    assert set(mcp_server.TOOLS) == {
+        "menu_search", "menu_resolve_batch", "order_create_or_update", "order_edit", "get_eta", "order_confirm", "handoff_to_human",
+    }
+
+
+def test_dispatch_validates_traces_and_serializes(monkeypatch):
+    seen = []
+
+    async def fake_get_eta(restaurant_id):
+        seen.append(restaurant_id)
+        return EtaResponse(eta_minutes=25, reason="Kitchen is quiet")
+
+    monkeypatch.setattr(OrderService, "get_eta", fake_get_eta)
+    monkeypatch.setattr(mcp_server, "_handlers", None)
+    latency_count = TOOL_LATENCY.labels("get_eta").count
+
+    text = asyncio.run(mcp_server.dispatch_tool_async("get_eta", {"restaurant_id": "r1", "order_id": "o1"}))
+    assert json.loads(text) == {"eta_minutes": 25, "ready_time_iso": None, "reason": "Kitchen is quiet"}
+    assert seen == ["r1"]
+
+    assert TOOL_LATENCY.labels("get_eta").count == latency_count + 1
+    with pytest.raises(ValueError, match="order_id"):
+        asyncio.run(mcp_server.dispatch_tool_async("get_eta", {"restaurant_id": "r1"}))
+    with pytest.raises(ValueError, match="Unknown tool"):
+        asyncio.run(mcp_server.dispatch_tool_async("nope", {}))
+
+
+def test_stdio_process_recovers_drafts_and_writes_them_out_at_eof(monkeypatch, tmp_path):
+    upserts = []
+
+    async def fake_execute(query):
+        upserts.append(query.request.json["order_id"])
+        return type("Response", (), {"data": [{**query.request.json, "status": "draft"}]})()
+
+    monkeypatch.setattr(draft_orders, "execute", fake_execute)
+    # A process that exited with an unsaved draft in its journal
+    crashed = DraftOrderStore(journal_dir=str(tmp_path), flush_delay=60, idle_seconds=1800)
+    crashed.record(crashed.open("o-crashed", "c1", "r1"), [{"op": "fields", "fields": {"customer_name": "Ann"}}])
+    crashed.release_journal()
+
+    store = DraftOrderStore(journal_dir=str(tmp_path), flush_delay=60, idle_seconds=1800)
+    monkeypatch.setattr(draft_orders, "draft_orders", store)
+
+    async def fake_dispatch(name, arguments):
+        # An order update whose write-behind is still pending when input ends
+        store.record(store.open("o-session", "c2", "r1"), [{"op": "fields", "fields": {"phone": "555"}}])
+        return json.dumps({"ok": True})
+
+    monkeypatch.setattr(mcp_server, "dispatch_tool_async", fake_dispatch)
+    lines = [json.dumps(_call(1, 0)).encode() + b"\n"]
+
+    async def read_line():
+        return lines.pop() if lines else b""
+
+    written = []
+    asyncio.run(mcp_server.serve_process(read_line, written.append))
+
+    assert len(written) == 1
+    assert upserts == ["o-crashed", "o-session"]
+
+
+def test_stdio_keeps_log_lines_off_the_protocol_stream(monkeypatch):
+    out, err = io.StringIO(), io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    monkeypatch.setattr(sys, "stderr", err)
+
+    async def fake_serve_process(read_line, write_line):
+        log_error("draft_flush_failed", order_id="o1", error="database unavailable")
+        print("Error fetching menu: database unavailable")
+        flush_logs()
+        write_line(json.dumps({"jsonrpc": "2.0", "id": 1, "result": {}}))
+
+    monkeypatch.setattr(mcp_server, "serve_process", fake_serve_process)
+    mcp_server.run_stdio()
+
+    assert [json.loads(line)["id"] for line in out.getvalue().splitlines()] == [1]
+    assert "draft_flush_failed" in err.getvalue() and "Error fetching menu" in err.getvalue()
@@ -0,0 +1,145 @@
+"""Tests for the per-restaurant menu cache."""
+import asyncio
+import threading
+
+from backend.config import settings
+from backend.models import MenuItem
+from backend.services import menu_service
+from backend.services.menu_cache import MenuCache, menu_cache
+from backend.services.menu_service import MenuService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _menu(name: str):
+    return [MenuItem(item_id=name, name=name, category="Burgers", price=9.99, availability=True)]
+
+
+def test_hit_after_set_and_miss_when_empty():
+    cache = MenuCache(ttl_seconds=60, max_restaurants=4, clock=FakeClock())
+    assert cache.get("r1") is None
+
+    cache.set("r1", _menu("burger"))
+    assert cache.get("r1")[0].name == "burger"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = MenuCache(ttl_seconds=30, max_restaurants=4, clock=clock)
+    cache.set("r1", _menu("burger"))
+
+    clock.now = 29.9
+    assert cache.get("r1") is not None
+    clock.now = 30.0
+    assert cache.get("r1") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction_keeps_recently_used_restaurants():
+    cache = MenuCache(ttl_seconds=60, max_restaurants=2, clock=FakeClock())
+    cache.set("r1", _menu("a"))
+    cache.set("r2", _menu("b"))
+    cache.get("r1")
+    cache.set("r3", _menu("c"))
+
+    assert cache.get("r2") is None
+    assert cache.get("r1") is not None
+    assert cache.get("r3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_single_and_all():
+    cache = MenuCache(ttl_seconds=60, max_restaurants=4, clock=FakeClock())
+    cache.set("r1", _menu("a"))
+    cache.set("r2", _menu("b"))
+
+    cache.invalidate("r1")
+    assert cache.get("r1") is None
+    assert cache.get("r2") is not None
+
+    cache.invalidate()
+    assert cache.get("r2") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def test_concurrent_misses_share_one_load():
+    cache = MenuCache(ttl_seconds=60, max_restaurants=4, clock=FakeClock())
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        return _menu("burger")
+
+    async def main():
+        return await asyncio.gather(*(cache.load("r1", fetch) for _ in range(20)))
+
+    results = asyncio.run(main())
+    assert fetches == [1]
+    assert all(r is results[0] for r in results)
+    assert cache.get("r1") is results[0]
+
+
+def test_a_load_that_overlapped_a_write_is_not_cached():
+    cache = MenuCache(ttl_seconds=60, max_restaurants=4, clock=FakeClock())
+
+    async def load_while(write):
+        async def fetch():
+            write()
+            return _menu("stale")
+        return await cache.load("r1", fetch)
+
+    sold_out = MenuItem(item_id="stale", name="stale", category="Burgers", price=9.99, availability=False)
+    assert asyncio.run(load_while(lambda: cache.update_item("r1", sold_out)))[0].name == "stale"
+    assert cache.get("r1") is None
+    asyncio.run(load_while(lambda: cache.invalidate()))
+    assert cache.get("r1") is None
+
+    asyncio.run(cache.load("r1", lambda: asyncio.sleep(0, _menu("fresh"))))
+    assert cache.get("r1")[0].name == "fresh"
+
+
+def test_large_menus_are_built_off_the_event_loop(monkeypatch):
+    records = [
+        {"item_id": f"i{n}", "name": f"Item {n}", "category": "Mains", "price": 5.0,
+         "availability": True, "modifiers": None}
+        for n in range(3)
+    ]
+    build_snapshot = MenuService._build_snapshot
+    threads = []
+
+    def recording_build(rows):
+        threads.append(threading.current_thread())
+        return build_snapshot(rows)
+
+    async def fake_execute(query):
+        return FakeResponse(records)
+
+    monkeypatch.setattr(menu_service, "execute", fake_execute)
+    monkeypatch.setattr(MenuService, "_build_snapshot", staticmethod(recording_build))
+    monkeypatch.setattr(settings, "MENU_BUILD_THREAD_MIN_ITEMS", 3)
+    menu_cache.invalidate()
+    try:
+        assert len(asyncio.run(MenuService.get_menu_snapshot("r1")).items) == 3
+        menu_cache.invalidate()
+        monkeypatch.setattr(settings, "MENU_BUILD_THREAD_MIN_ITEMS", 4)
+        asyncio.run(MenuService.get_menu_snapshot("r1"))
+    finally:
+        menu_cache.invalidate()
+    assert threads[0] is not threading.main_thread()
+    assert threads[1] is threading.main_thread()
@@ -0,0 +1,144 @@
+"""Tests for the streaming, diff-based menu CSV import planner."""
+import asyncio
+import io
+import os
+
+from fastapi import UploadFile
+
+from backend.services import menu_import
+from backend.services.menu_import import plan_import
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "sample_menus", "burger_menu.csv")
+
+
+def _upload(text: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(text.encode("utf-8")), filename="menu.csv")
+
+
+def _plan(text: str, existing=()):
+    return asyncio.run(plan_import(_upload(text), "r1", list(existing)))
+
+
+def test_sample_menu_parses_descriptions_and_modifiers(monkeypatch):
+    # Tiny reads force records to straddle chunk boundaries
+    monkeypatch.setattr(menu_import, "READ_CHUNK_BYTES", 7)
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        plan = _plan(f.read())
+
+    assert plan.errors == []
+    assert len(plan.inserts) == 10
+    burger = next(i for i in plan.inserts if i["name"] == "Classic Cheeseburger")
+    assert burger["description"] == "Beef patty with cheddar cheese"
+    assert burger["modifiers"][0] == {"name": "Cheese", "options": ["Cheddar", "American", "Swiss"]}
+    mushroom = next(i for i in plan.inserts if i["name"] == "Mushroom Swiss Burger")
+    assert mushroom["description"] == "Sautéed mushrooms and swiss cheese"
+
+
+def test_matches_existing_items_and_keeps_their_ids():
+    existing = [
+        {"item_id": "keep", "name": "Onion Rings", "category": "Sides", "price": 6.99,
+         "description": None, "modifiers": [], "availability": False},
+        {"item_id": "reprice", "name": "Fountain Soda", "category": "Drinks", "price": 1.99,
+         "description": None, "modifiers": [], "availability": True},
+        {"item_id": "gone", "name": "Fish Tacos", "category": "Mains", "price": 11.0,
+         "description": None, "modifiers": [], "availability": True},
+    ]
+    plan = _plan(
+        "name,category,price\n"
+        "onion  rings,SIDES,6.99\n"
+        "Fountain Soda,Drinks,2.99\n"
+        "Veggie Burger,Burgers,13.99\n",
+        existing,
+    )
+
+    assert [u["item_id"] for u in plan.updates] == ["keep", "reprice"]
+    # Renamed casing counts as an update, but availability is preserved
+    assert plan.updates[0]["availability"] is False
+    assert plan.updates[1]["price"] == 2.99
+    assert [i["name"] for i in plan.inserts] == ["Veggie Burger"]
+    assert plan.deletes == ["gone"]
+
+
+def test_row_errors_are_reported_and_do_not_delete_the_item():
+    existing = [
+        {"item_id": "shake", "name": "Vanilla Milkshake", "category": "Drinks", "price": 5.99,
+         "description": None, "modifiers": [], "availability": True},
+    ]
+    plan = _plan(
+        "name,category,price,modifiers\n"
+        "Vanilla Milkshake,Drinks,five\n"
+        ",Drinks,1.00\n"
+        "Cola,Drinks,2.00,Size\n"
+        "\"Burger, Deluxe\",Burgers,15.00,\"Cheese:Cheddar|Swiss\"\n"
+        "\"Burger, Deluxe\",Burgers,16.00\n",
+        existing,
+    )
+
+    assert [e["row"] for e in plan.errors] == [2, 3, 4, 6]
+    assert "Invalid price" in plan.errors[0]["error"]
+    assert plan.deletes == []
+    assert [i["name"] for i in plan.inserts] == ["Burger, Deluxe"]
+
+
+def test_missing_header_columns_is_an_error():
+    plan = _plan("title,cost\nBurger,10\n")
+    assert plan.valid_rows == 0
+    assert plan.errors[0]["row"] == 1
+
+
+def test_stray_quote_in_an_unquoted_field_is_read_literally(monkeypatch):
+    monkeypatch.setattr(menu_import, "READ_CHUNK_BYTES", 5)
+    plan = _plan(
+        "name,category,price\n"
+        '12" Cheese Pizza,Pizza,14.99\n'
+        '"Garlic\nKnots",Sides,4.50\n'
+        "Cola,Drinks,2.00\n"
+    )
+
+    assert plan.errors == []
+    assert [i["name"] for i in plan.inserts] == ['12" Cheese Pizza', "Garlic\nKnots", "Cola"]
+
+
+def test_unreadable_record_is_a_row_error():
+    limit = menu_import.csv.field_size_limit(16)
+    try:
+        plan = _plan(
+            "name,category,price\n"
+            "Cola,Drinks,2.00\n"
+            '"A field longer than the limit",Drinks,3.00\n'
+            "Tea,Drinks,1.50\n"
+        )
+    finally:
+        menu_import.csv.field_size_limit(limit)
+
+    assert [e["row"] for e in plan.errors] == [3]
+    assert "Unreadable CSV record" in plan.errors[0]["error"]
+    assert [i["name"] for i in plan.inserts] == ["Cola", "Tea"]
+
+
+def test_reupload_keeps_modifier_rules_of_groups_still_listed():
+    size = {"name": "Size", "options": ["Small", "Large"], "required": True,
+            "price_adjustments": {"Small": 0.0, "Large": 1.5}}
+    sauce = {"name": "Sauce", "options": ["Ketchup"], "max_selections": 1}
+    existing = [
+        {"item_id": "fries", "name": "Fries", "category": "Sides", "price": 3.0,
+         "description": None, "modifiers": [size, sauce], "availability": True},
+        {"item_id": "soda", "name": "Soda", "category": "Drinks", "price": 2.0,
+         "description": None, "modifiers": [size], "availability": True},
+    ]
+
+    plan = _plan(
+        "name,category,price,modifiers\n"
+        "Fries,Sides,3.00,Size:Large|Medium\n"
+        "Soda,Drinks,2.00,Size:Small|Large\n",
+        existing,
+    )
+    assert [u["item_id"] for u in plan.updates] == ["fries"]
+    assert plan.updates[0]["modifiers"] == [{
+        "name": "Size", "options": ["Large", "Medium"], "required": True,
+        "price_adjustments": {"Large": 1.5},
+    }]
+    assert plan.unchanged == 1
+
+    plan = _plan("name,category,price\nFries,Sides,3.50\n", existing)
+    assert plan.updates[0]["modifiers"] == [size, sauce]
@@ -0,0 +1,59 @@
+"""Tests for resolving spoken item phrases against one menu snapshot."""
+import asyncio
+
+from backend.models import MenuItem, ModifierOption, SpokenItem
+from backend.services import menu_service
+from backend.services.menu_cache import MenuSnapshot, menu_cache
+from backend.services.menu_resolve import resolve_batch, split_quantity
+from backend.services.menu_service import MenuService
+
+MENU = [
+    MenuItem(item_id="cb", name="Classic Cheeseburger", category="Burgers", price=10.0, availability=True),
+    MenuItem(item_id="bbq", name="Bacon BBQ Burger", category="Burgers", price=12.0, availability=True),
+    MenuItem(item_id="fries", name="French Fries", category="Sides", price=4.0, availability=True,
+             modifiers=[ModifierOption(name="Size", options=["Regular", "Large"], max_selections=1)]),
+    MenuItem(item_id="coke", name="Coke", category="Drinks", price=2.0, availability=True),
+    MenuItem(item_id="shake", name="Vanilla Milkshake", category="Drinks", price=5.0, availability=False),
+]
+
+
+def test_split_quantity_reads_spoken_numbers():
+    assert split_quantity(["two", "cheeseburger"]) == (2, ["cheeseburger"])
+    assert split_quantity(["a", "couple", "of", "coke"]) == (1, ["couple", "of", "coke"])
+    assert split_quantity(["12", "wing"]) == (12, ["wing"])
+    assert split_quantity(["coke"]) == (None, ["coke"])
+
+
+def test_phrases_resolve_with_quantity_modifiers_and_confidence():
+    spoken = [SpokenItem(phrase=p) for p in
+              ("two cheeseburgers", "a large fries", "three cokes", "bacon bbq burger", "pizza")]
+    spoken.append(SpokenItem(phrase="coke", quantity=4))
+    matches = resolve_batch(MenuSnapshot(MENU), spoken)
+
+    assert [(m.item_id, m.quantity) for m in matches] == [
+        ("cb", 2), ("fries", 1), ("coke", 3), ("bbq", 1), (None, 1), ("coke", 4),
+    ]
+    fries = matches[1]
+    assert [(s.modifier_name, s.option) for s in fries.modifier_selections] == [("Size", "Large")]
+    assert matches[3].confidence == 1.0
+    assert matches[4].confidence == 0.0
+    # "cheeseburgers" names half of "Classic Cheeseburger": a match, but less certain.
+    assert 0.5 <= matches[0].confidence < 1.0
+
+
+def test_resolve_items_returns_order_ready_lines(monkeypatch):
+    menu_cache.set("r1", MenuSnapshot(MENU))
+
+    async def no_db(query):
+        raise AssertionError("the cached menu should be used")
+
+    monkeypatch.setattr(menu_service, "execute", no_db)
+    resp = asyncio.run(MenuService.resolve_items("r1", [
+        SpokenItem(phrase="two large fries"), SpokenItem(phrase="a vanilla milkshake"),
+        SpokenItem(phrase="lobster"),
+    ]))
+    assert [(i.item_id, i.quantity) for i in resp.order_items] == [("fries", 2)]
+    assert resp.order_items[0].modifier_selections[0].option == "Large"
+    # Unavailable and unmatched phrases are left for the agent to confirm.
+    assert resp.unresolved == ["a vanilla milkshake", "lobster"]
+    assert resp.matches[1].item_id == "shake" and not resp.matches[1].available
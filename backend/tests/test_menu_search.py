@@ -0,0 +1,78 @@
+"""Tests for the ranked menu search index."""
+from backend.models import MenuItem
+from backend.services.menu_search import MenuSearchIndex, tokenize
+
+
+def _item(item_id: str, name: str, category: str, available: bool = True) -> MenuItem:
+    return MenuItem(item_id=item_id, name=name, category=category, price=9.99, availability=available)
+
+
+MENU = [
+    _item("1", "Classic Cheeseburger", "Burgers"),
+    _item("2", "Bacon BBQ Burger", "Burgers"),
+    _item("3", "Mushroom Swiss Burger", "Burgers"),
+    _item("4", "Sweet Potato Fries", "Sides"),
+    _item("5", "Onion Rings", "Sides"),
+    _item("6", "Chocolate Milkshake", "Drinks"),
+    _item("7", "Fountain Soda", "Drinks"),
+]
+
+
+def _names(index: MenuSearchIndex, query: str, limit: int = 20):
+    hits, _ = index.search(query, limit)
+    return [hit.item.name for hit in hits]
+
+
+def test_tokenize_folds_plurals_and_synonyms():
+    assert tokenize("Onion Rings") == ["onion", "ring"]
+    assert tokenize("Barbecue Fries") == ["bbq", "fry"]
+
+
+def test_split_compound_matches_joined_name():
+    assert _names(MenuSearchIndex(MENU), "cheese burger")[0] == "Classic Cheeseburger"
+
+
+def test_word_order_and_partial_names():
+    assert _names(MenuSearchIndex(MENU), "bbq bacon")[0] == "Bacon BBQ Burger"
+
+
+def test_plural_query_matches_singular_and_vice_versa():
+    index = MenuSearchIndex(MENU)
+    assert _names(index, "onion ring")[0] == "Onion Rings"
+    assert _names(index, "milkshakes")[0] == "Chocolate Milkshake"
+
+
+def test_typo_tolerance():
+    index = MenuSearchIndex(MENU)
+    assert _names(index, "chocolat milkshak")[0] == "Chocolate Milkshake"
+    assert _names(index, "mushrom")[0] == "Mushroom Swiss Burger"
+
+
+def test_category_query_still_lists_category_items():
+    names = _names(MenuSearchIndex(MENU), "drinks")
+    assert set(names) == {"Chocolate Milkshake", "Fountain Soda"}
+
+
+def test_name_matches_rank_above_containing_terms():
+    names = _names(MenuSearchIndex(MENU), "burger")
+    assert len(names) == 3
+    assert names[-1] == "Classic Cheeseburger"
+
+
+def test_no_match_returns_empty():
+    hits, total = MenuSearchIndex(MENU).search("sushi platter")
+    assert hits == [] and total == 0
+
+
+def test_incremental_update_and_remove():
+    index = MenuSearchIndex(MENU)
+    index.update_item(_item("5", "Onion Rings", "Sides", available=False))
+    hits, _ = index.search("onion rings")
+    assert hits[0].item.availability is False
+
+    index.update_item(_item("5", "Garlic Knots", "Sides"))
+    assert _names(index, "onion rings") == []
+    assert _names(index, "garlic knot") == ["Garlic Knots"]
+
+    index.remove_item("5")
+    assert _names(index, "garlic") == []
@@ -0,0 +1,76 @@
+"""Tests for the Prometheus metrics registry and its trace_tool/execute wiring."""
+import asyncio
+
+import pytest
+
+from backend import database
+from backend.metrics import DB_QUERY_ERRORS, DB_QUERY_LATENCY, TOOL_ERRORS, TOOL_IN_FLIGHT, TOOL_LATENCY, Registry
+from backend.observability import trace_tool
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("demo_seconds", "Demo latency.", ["tool"], buckets=(0.1, 1.0))
+    child = histogram.labels("menu")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[0] == "# HELP demo_seconds Demo latency."
+    assert lines[1] == "# TYPE demo_seconds histogram"
+    assert 'demo_seconds_bucket{tool="menu",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{tool="menu",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{tool="menu",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{tool="menu"} 3.65' in lines
+    assert 'demo_seconds_count{tool="menu"} 4' in lines
+
+
+def test_counter_and_gauge_render_with_escaped_labels():
+    registry = Registry()
+    counter = registry.counter("demo_total", "Demo counter.", ["kind"])
+    gauge = registry.gauge("demo_in_flight", "Demo gauge.")
+    counter.labels('say "hi"').inc(2)
+    gauge.labels().inc()
+    gauge.labels().inc()
+    gauge.labels().dec()
+
+    text = registry.render()
+    assert 'demo_total{kind="say \\"hi\\""} 2.0' in text
+    assert "demo_in_flight 1.0" in text
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("demo_total", "Duplicate.")
+
+
+def test_trace_tool_records_latency_errors_and_in_flight():
+    @trace_tool("metrics_test_tool")
+    def flaky(fail: bool):
+        assert TOOL_IN_FLIGHT.labels("metrics_test_tool").value == 1
+        if fail:
+            raise KeyError("missing")
+        return "ok"
+
+    flaky(False)
+    with pytest.raises(KeyError):
+        flaky(True)
+
+    assert TOOL_LATENCY.labels("metrics_test_tool").count == 2
+    assert TOOL_ERRORS.labels("metrics_test_tool", "KeyError").value == 1
+    assert TOOL_IN_FLIGHT.labels("metrics_test_tool").value == 0
+
+
+def test_execute_times_queries_by_table_and_operation():
+    class FailingQuery:
+        request = database.db.table("metrics_probe").update({"status": "x"}).eq("id", "1").request
+
+        async def execute(self):
+            raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(database.execute(FailingQuery()))
+
+    assert DB_QUERY_LATENCY.labels("metrics_probe", "update").count == 1
+    assert DB_QUERY_ERRORS.labels("metrics_probe", "update").value == 1
+    assert database.query_labels(database.db.table("orders").upsert({"id": 1})) == ("orders", "upsert")
+    assert database.query_labels(database.db.table("orders").select("*")) == ("orders", "select")
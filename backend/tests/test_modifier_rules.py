@@ -0,0 +1,53 @@
+"""Tests for compiled modifier rules and modifier pricing on order lines."""
+from backend.models import MenuItem, ModifierOption, ModifierSelection, OrderItem
+from backend.services.draft_orders import DraftOrderStore, line_changes
+from backend.services.modifier_rules import ItemRules, compile_rules
+
+PIZZA = MenuItem(
+    item_id="pizza", name="Pizza", category="Pizza", price=12.0, availability=True,
+    modifiers=[
+        ModifierOption(name="Size", options=["Medium", "Large"], required=True, max_selections=1,
+                       price_adjustments={"Large": 3.0}),
+        ModifierOption(name="Toppings", options=["Olives", "Mushrooms", "Pepperoni"], max_selections=2,
+                       price_adjustments={"Pepperoni": 1.25, "Mushrooms": 0.8}),
+    ],
+)
+
+
+def _selections(*pairs):
+    return [ModifierSelection(modifier_name=name, option=option) for name, option in pairs]
+
+
+def test_rules_price_valid_selections_in_cents():
+    rules = ItemRules(PIZZA)
+    assert rules.price(_selections(("Size", "Large"), ("Toppings", "Pepperoni"), ("Toppings", "Mushrooms"))) == (505, [])
+    assert rules.price(_selections(("Size", "Medium"))) == (0, [])
+
+
+def test_rules_report_every_problem():
+    rules = ItemRules(PIZZA)
+    _, errors = rules.price(_selections(
+        ("Crust", "Thin"), ("Size", "Huge"),
+        ("Toppings", "Olives"), ("Toppings", "Mushrooms"), ("Toppings", "Pepperoni"),
+    ))
+    assert errors == [
+        "Pizza has no modifier Crust",
+        "Huge is not an option for Pizza Size",
+        "Pizza needs a Size choice",
+        "Pizza allows at most 2 Toppings choices",
+    ]
+
+
+def test_modifier_prices_are_part_of_the_subtotal():
+    store = DraftOrderStore(journal_dir=None, flush_delay=60, idle_seconds=1800)
+    draft = store.open("o1", "c1", "r1")
+    large_pepperoni = OrderItem(item_id="pizza", quantity=2,
+                                modifier_selections=_selections(("Toppings", "Pepperoni"), ("Size", "Large")))
+    no_size = OrderItem(item_id="pizza", quantity=1)
+    ops, errors = line_changes(draft, [large_pepperoni, no_size], compile_rules([PIZZA]))
+    store.record(draft, ops)
+
+    assert errors == ["Pizza needs a Size choice"]
+    assert draft.subtotal == 32.5
+    line = next(iter(draft.lines.values()))
+    assert (line["price"], line["modifier_price"]) == (12.0, 4.25)
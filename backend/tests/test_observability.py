@@ -1,7 +1,8 @@
 """Tests for structured observability utilities."""
+import asyncio
 import json
 import pytest
-from backend.observability import trace_tool, log_info, log_error
+from backend.observability import flush_logs, trace_tool, log_info, log_error
 
 
 def test_trace_tool_logs_success(capsys):
@@ -10,6 +11,7 @@ def test_trace_tool_logs_success(capsys):
         return {"status": "ok"}
 
     my_tool()
+    flush_logs()
     captured = capsys.readouterr()
     lines = [l for l in captured.out.strip().splitlines() if l]
     events = [json.loads(l)["event"] for l in lines]
@@ -25,6 +27,7 @@ def test_trace_tool_logs_error(capsys):
     with pytest.raises(ValueError):
         bad_tool()
 
+    flush_logs()
     captured = capsys.readouterr()
     lines = [l for l in captured.out.strip().splitlines() if l]
     records = [json.loads(l) for l in lines]
@@ -35,10 +38,53 @@ def test_trace_tool_logs_error(capsys):
     assert "latency_ms" in error_line
 
 
+def test_trace_tool_wraps_async_functions(capsys):
+    @trace_tool("async_tool")
+    async def my_tool():
+        return {"status": "ok"}
+
+    assert asyncio.run(my_tool()) == {"status": "ok"}
+    flush_logs()
+    captured = capsys.readouterr()
+    records = [json.loads(l) for l in captured.out.strip().splitlines() if l]
+    assert [r["event"] for r in records] == ["tool_invoked", "tool_success"]
+    assert all(r["tool"] == "async_tool" for r in records)
+
+
 def test_log_info_is_valid_json(capsys):
     log_info("test_event", foo="bar", count=42)
+    flush_logs()
     captured = capsys.readouterr()
     record = json.loads(captured.out.strip())
     assert record["event"] == "test_event"
     assert record["foo"] == "bar"
     assert record["level"] == "INFO"
+
+
+def test_sampled_tool_invoked_events_are_skipped(capsys, monkeypatch):
+    from backend import observability
+    monkeypatch.setitem(observability._SAMPLE_RATES, "tool_invoked", 0.0)
+
+    @trace_tool("sampled_tool")
+    def my_tool():
+        return None
+
+    my_tool()
+    flush_logs()
+    records = [json.loads(l) for l in capsys.readouterr().out.strip().splitlines() if l]
+    assert [r["event"] for r in records] == ["tool_success"]
+
+
+def test_buffered_sink_drops_when_full():
+    import os
+    import threading
+    from backend.log_sink import BufferedLogSink
+    sink = BufferedLogSink(max_buffer=2)
+    # Pretend the writer is running but stalled, so nothing drains the buffer.
+    sink._pid, sink._writer = os.getpid(), threading.current_thread()
+
+    for i in range(5):
+        sink.submit({"event": "e", "i": i})
+
+    assert sink.dropped == 3
+    assert len(sink._buffer) == 2
@@ -0,0 +1,287 @@
+"""Tests for OrderService write paths, with the database round trip faked out."""
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from backend.models import (
+    MenuItem, OrderConfirmRequest, OrderCreateRequest, OrderEditOperation, OrderEditRequest, OrderItem,
+    RestaurantSettings,
+)
+from backend.observability import flush_logs, record_round_trip, trace_tool
+from backend.services import draft_orders, order_service
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.idempotency import order_idempotency
+from backend.services.menu_cache import MenuSnapshot, menu_cache
+from backend.services.order_service import OrderService
+from backend.services.restaurant_service import restaurant_settings_cache
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+@pytest.fixture(autouse=True)
+def fresh_idempotency_cache():
+    order_idempotency.clear()
+    yield
+    order_idempotency.clear()
+
+
+@pytest.fixture
+def drafts(monkeypatch):
+    # A private store with no journal and a flush delay no test waits out.
+    store = DraftOrderStore(journal_dir=None, flush_delay=60, idle_seconds=1800)
+    monkeypatch.setattr(order_service, "draft_orders", store)
+    return store
+
+
+def _warm_menu(restaurant_id: str):
+    restaurant_settings_cache.set(restaurant_id, RestaurantSettings(
+        restaurant_id=restaurant_id, tax_rate=0.08875, base_eta_minutes=30, eta_max_load_minutes=30, timezone="UTC",
+    ))
+    menu_cache.set(restaurant_id, MenuSnapshot([
+        MenuItem(item_id="burger", name="Classic Cheeseburger", category="Burgers", price=10.0, availability=True),
+        MenuItem(item_id="shake", name="Vanilla Milkshake", category="Drinks", price=5.0, availability=False),
+        MenuItem(item_id="fries", name="Fries", category="Sides", price=5.0, availability=True),
+    ]))
+
+
+def test_update_is_written_behind_as_one_upsert_that_keeps_existing_status(monkeypatch, capsys, drafts):
+    _warm_menu("r1")
+    queries = []
+    existing = {"order_id": "order-1", "restaurant_id": "r1", "call_id": "call-1", "status": "confirmed", "items": []}
+
+    async def fake_execute(query):
+        record_round_trip()
+        queries.append((query.request.http_method, query.request.json))
+        if query.request.http_method == "GET":
+            return FakeResponse([existing])
+        return FakeResponse([{**query.request.json, "status": "confirmed"}])
+
+    monkeypatch.setattr(order_service, "execute", fake_execute)
+    monkeypatch.setattr(draft_orders, "execute", fake_execute)
+
+    @trace_tool("order_create_or_update")
+    async def tool(req):
+        return await OrderService.create_or_update_order(req)
+
+    req = OrderCreateRequest(
+        restaurant_id="r1",
+        call_id="call-1",
+        order_id="order-1",
+        items=[OrderItem(item_id="burger", quantity=2), OrderItem(item_id="shake", quantity=1)],
+    )
+    resp = asyncio.run(tool(req))
+
+    # The first update reads the existing row once; later ones only change the draft.
+    assert queries == [("GET", None)]
+    assert resp.status == "confirmed"
+    assert resp.subtotal == 20.0
+    assert resp.validation_errors == ["Item Vanilla Milkshake is unavailable"]
+    asyncio.run(tool(req.model_copy(update={"items": [OrderItem(item_id="burger", quantity=3)]})))
+
+    flush_logs()
+    records = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l.startswith("{")]
+    successes = [r for r in records if r["event"] == "tool_success"]
+    assert [r["db_round_trips"] for r in successes] == [1, 0]
+
+    draft = asyncio.run(drafts.flush("order-1"))
+    assert len(queries) == 2
+    method, payload = queries[1]
+    assert method == "POST"
+    assert "status" not in payload
+    assert payload["subtotal"] == 30.0
+    assert draft.status == "confirmed"
+
+
+def _no_saved_orders(monkeypatch):
+    async def fake_execute(query):
+        return FakeResponse([])
+
+    monkeypatch.setattr(order_service, "execute", fake_execute)
+
+
+def test_retried_create_reuses_one_order_and_one_write(monkeypatch, drafts):
+    _warm_menu("r2")
+    upserts = []
+
+    async def fake_execute(query):
+        upserts.append(query.request.json)
+        await asyncio.sleep(0.01)
+        return FakeResponse([{**query.request.json, "status": "draft"}])
+
+    monkeypatch.setattr(draft_orders, "execute", fake_execute)
+    _no_saved_orders(monkeypatch)
+    req = OrderCreateRequest(restaurant_id="r2", call_id="call-2", items=[OrderItem(item_id="burger", quantity=1)])
+
+    async def agent_retries():
+        # Two concurrent duplicates, then a late retry after the first finished.
+        first, second = await asyncio.gather(
+            OrderService.create_or_update_order(req), OrderService.create_or_update_order(req.model_copy()),
+        )
+        third = await OrderService.create_or_update_order(req.model_copy())
+        return first, second, third
+
+    first, second, third = asyncio.run(agent_retries())
+    assert first.order_id == second.order_id == third.order_id
+
+    # Past the cache window the retry lands on the call's draft and changes nothing.
+    order_idempotency.clear()
+    again = asyncio.run(OrderService.create_or_update_order(req))
+    assert again.order_id == first.order_id
+    assert again.subtotal == 10.0
+
+    asyncio.run(drafts.flush_all())
+    assert [u["order_id"] for u in upserts] == [first.order_id]
+
+
+def test_a_cart_sent_again_after_a_different_one_is_applied(monkeypatch, drafts):
+    _warm_menu("r7")
+    _no_saved_orders(monkeypatch)
+    burger_and_fries = [OrderItem(item_id="burger", quantity=1), OrderItem(item_id="fries", quantity=1)]
+
+    async def call():
+        responses = []
+        for items in (burger_and_fries, burger_and_fries[:1], burger_and_fries):
+            responses.append(await OrderService.create_or_update_order(OrderCreateRequest(
+                restaurant_id="r7", call_id="call-7", order_id="o7", items=items,
+            )))
+        return responses
+
+    responses = asyncio.run(call())
+    assert [r.subtotal for r in responses] == [15.0, 10.0, 15.0]
+    assert drafts.get("o7").subtotal == 15.0
+
+
+def test_confirm_runs_once_and_failures_are_not_cached(monkeypatch, drafts):
+    rows = []
+    calls = []
+
+    async def fake_execute(query):
+        calls.append(query.request.http_method)
+        await asyncio.sleep(0.01)
+        return FakeResponse(rows)
+
+    monkeypatch.setattr(order_service, "execute", fake_execute)
+    req = OrderConfirmRequest(restaurant_id="r3", order_id="o3")
+
+    with pytest.raises(HTTPException):
+        asyncio.run(OrderService.confirm_order(req))
+
+    rows.append({"order_id": "o3", "status": "draft", "customer_name": "Ann", "phone": "555",
+                 "items": [{"item_id": "burger", "quantity": 1}], "total": 10.0})
+    calls.clear()
+
+    async def confirm_twice():
+        return await asyncio.gather(OrderService.confirm_order(req), OrderService.confirm_order(req))
+
+    first, second = asyncio.run(confirm_twice())
+    assert first == second and first.confirmed
+    assert calls == ["GET", "PATCH"]
+
+
+def test_confirm_saves_the_draft_first_and_closes_it(monkeypatch, drafts):
+    _warm_menu("r4")
+    calls = []
+    saved = []
+
+    async def fake_execute(query):
+        calls.append(query.request.http_method)
+        if query.request.http_method == "POST":
+            saved.append({**query.request.json, "status": "draft"})
+        if query.request.http_method == "GET":
+            return FakeResponse(saved)
+        return FakeResponse([{"status": "draft"}])
+
+    monkeypatch.setattr(order_service, "execute", fake_execute)
+    monkeypatch.setattr(draft_orders, "execute", fake_execute)
+
+    async def call():
+        await OrderService.create_or_update_order(OrderCreateRequest(
+            restaurant_id="r4", call_id="call-4", order_id="o4", customer_name="Bo", phone="555",
+            items=[OrderItem(item_id="burger", quantity=1)],
+        ))
+        return await OrderService.confirm_order(OrderConfirmRequest(restaurant_id="r4", order_id="o4"))
+
+    assert asyncio.run(call()).confirmed
+    assert calls == ["GET", "POST", "GET", "PATCH"]
+    assert drafts.get("o4") is None
+
+
+def test_edit_loads_a_saved_order_once_and_rejects_confirmed_ones(monkeypatch, drafts):
+    _warm_menu("r5")
+    rows = {
+        "o5": {"order_id": "o5", "restaurant_id": "r5", "call_id": "call-5", "status": "draft",
+               "fulfillment": "pickup", "customer_name": None, "phone": None, "notes": None,
+               "items": [{"item_id": "burger", "quantity": 2, "modifier_selections": [],
+                          "special_instructions": None, "name": "Classic Cheeseburger", "price": 10.0}]},
+        "o6": {"order_id": "o6", "restaurant_id": "r5", "call_id": "call-6", "status": "confirmed", "items": []},
+    }
+    selects = []
+
+    async def fake_execute(query):
+        order_id = query.request.params["order_id"].split(".", 1)[1]
+        selects.append(order_id)
+        return FakeResponse([rows[order_id]])
+
+    monkeypatch.setattr(order_service, "execute", fake_execute)
+
+    def edit(order_id, *operations):
+        draft = drafts.get(order_id)
+        return asyncio.run(OrderService.edit_order(OrderEditRequest(
+            restaurant_id="r5", call_id="call-5", order_id=order_id, operations=list(operations),
+            base_version=draft.version if draft else 0,
+        )))
+
+    resp = edit("o5", OrderEditOperation(op="set_quantity", item_id="burger", quantity=3))
+    assert resp.subtotal == 30.0
+    assert resp.missing_fields == ["customer_name", "phone"]
+    resp = edit("o5", OrderEditOperation(op="remove_item", item_id="burger"))
+    assert resp.subtotal == 0.0 and "items" in resp.missing_fields
+    assert selects == ["o5"]
+    assert drafts.get("o5").dirty
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as excinfo:
+            edit("o6", OrderEditOperation(op="add_item", item_id="burger"))
+        assert excinfo.value.status_code == 409
+    assert selects == ["o5", "o6"]
+    assert drafts.get("o6").status == "confirmed"
+
+
+def test_the_same_edit_made_twice_applies_twice_but_a_retry_applies_once(monkeypatch, drafts):
+    _warm_menu("r8")
+    _no_saved_orders(monkeypatch)
+
+    async def call():
+        created = await OrderService.create_or_update_order(OrderCreateRequest(
+            restaurant_id="r8", call_id="call-8", order_id="o8", items=[OrderItem(item_id="burger", quantity=1)],
+        ))
+
+        def one_more(base_version):
+            return OrderService.edit_order(OrderEditRequest(
+                restaurant_id="r8", call_id="call-8", order_id="o8", base_version=base_version,
+                operations=[OrderEditOperation(op="add_item", item_id="burger")],
+            ))
+
+        first = await one_more(created.version)
+        retried = await one_more(created.version)
+        second = await one_more(first.version)
+        # A retry of the first edit that arrives after the second one
+        late_retry = await one_more(created.version)
+        return first, retried, second, late_retry
+
+    first, retried, second, late_retry = asyncio.run(call())
+    assert retried == first and first.subtotal == 20.0
+    assert second.subtotal == 30.0
+    assert late_retry == first
+    assert drafts.get("o8").subtotal == 30.0
+
+    with pytest.raises(ValidationError):
+        OrderEditRequest(restaurant_id="r8", call_id="call-8", order_id="o8",
+                         operations=[OrderEditOperation(op="add_item", item_id="burger")])
@@ -0,0 +1,66 @@
+"""Tests for keyset pagination helpers."""
+import pytest
+from fastapi import HTTPException
+
+from backend.config import settings
+from backend.services.pagination import (
+    build_page, clamp_page_size, decode_cursor, encode_cursor, projection,
+)
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("2024-05-01T18:30:00+00:00", "abc123")
+    assert "=" not in token
+    assert decode_cursor(token) == ("2024-05-01T18:30:00+00:00", "abc123")
+
+
+def test_bad_cursor_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("created_at, row_id", [
+    ('2024-05-01T18:30:00+00:00",status.eq.draft,created_at.lt."9999', "abc"),
+    ("2024-05-01T18:30:00+00:00", 'x"),or(status.neq.x'),
+    ("2024-05-01T18:30:00+00:00", ["abc"]),
+    (None, "abc"),
+])
+def test_cursor_values_that_could_change_the_filter_are_rejected(created_at, row_id):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(encode_cursor(created_at, row_id))
+    assert exc.value.status_code == 400
+
+
+def test_cursor_accepts_database_timestamps_and_ids():
+    for created_at in ("2024-05-01T18:30:00.12345+00:00", "2024-05-01 18:30:00", "2024-05-01T18:30:00Z"):
+        assert decode_cursor(encode_cursor(created_at, "call-8_1"))[0] == created_at
+    assert decode_cursor(encode_cursor("2024-05-01T18:30:00+00:00", 42))[1] == "42"
+
+
+def test_page_size_is_capped():
+    assert clamp_page_size(None) == settings.PAGE_SIZE_DEFAULT
+    assert clamp_page_size(10) == 10
+    assert clamp_page_size(10_000) == settings.PAGE_SIZE_MAX
+
+
+def test_projection_always_includes_cursor_keys_and_rejects_unknown():
+    assert projection(None, ("order_id", "status"), "order_id") == "*"
+    assert projection("status,total", ("status", "total"), "order_id") == "status,total,created_at,order_id"
+    with pytest.raises(HTTPException):
+        projection("status,password", ("status",), "order_id")
+
+
+def test_projection_selects_derived_fields_by_their_expression():
+    derived = {"phone": "phone:data->>phone"}
+    assert projection("type,phone", ("id", "type"), "id", derived) == "type,phone:data->>phone,created_at,id"
+
+
+def test_build_page_emits_cursor_only_when_more_rows_exist():
+    rows = [{"order_id": str(i), "created_at": f"2024-05-01T10:0{i}:00"} for i in range(3)]
+    page = build_page(rows, 2, "order_id")
+    assert [r["order_id"] for r in page["items"]] == ["0", "1"]
+    assert decode_cursor(page["next_cursor"]) == ("2024-05-01T10:01:00", "1")
+
+    last = build_page(rows[:2], 2, "order_id")
+    assert last["next_cursor"] is None
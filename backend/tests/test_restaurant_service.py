@@ -0,0 +1,99 @@
+"""Tests for per-restaurant settings and their cache, against the SQLite backend."""
+import asyncio
+
+import pytest
+
+from backend.models import OrderConfirmRequest, OrderCreateRequest, OrderItem, RestaurantSettingsUpdate
+from backend.observability import _db_round_trips
+from backend.services import draft_orders, menu_service, order_service, restaurant_service
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.idempotency import order_idempotency
+from backend.services.kitchen_load import kitchen_load
+from backend.services.menu_cache import menu_cache
+from backend.services.order_service import OrderService
+from backend.services.restaurant_service import RestaurantService, restaurant_settings_cache
+from backend.sqlite_store import SQLiteClient
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "voicehub.db"))
+    for module in (draft_orders, menu_service, order_service, restaurant_service):
+        monkeypatch.setattr(module, "db", client)
+    monkeypatch.setattr(order_service, "draft_orders", DraftOrderStore(None, flush_delay=60, idle_seconds=1800))
+    order_idempotency.clear()
+    menu_cache.invalidate()
+    restaurant_settings_cache.invalidate()
+    kitchen_load.reset()
+    yield client
+    menu_cache.invalidate()
+    restaurant_settings_cache.invalidate()
+    client.close()
+
+
+def test_settings_fall_back_to_defaults_and_are_cached(store, monkeypatch):
+    asyncio.run(store.table("restaurants").insert({"restaurant_id": "r1", "tax_rate": 0.05}).execute())
+    monkeypatch.setattr(restaurant_service.settings, "BASE_ETA_MINUTES", 25)
+
+    async def lookups():
+        counter = [0]
+        _db_round_trips.set(counter)
+        first = await RestaurantService.get_settings("r1")
+        unknown = await RestaurantService.get_settings("r2")
+        after_miss = counter[0]
+        await RestaurantService.get_settings("r1")
+        await RestaurantService.get_settings("r2")
+        return first, unknown, after_miss, counter[0]
+
+    first, unknown, after_miss, after_hits = asyncio.run(lookups())
+    assert (first.tax_rate, first.base_eta_minutes) == (0.05, 25)
+    assert (unknown.tax_rate, unknown.base_eta_minutes) == (restaurant_service.settings.TAX_RATE, 25)
+    assert after_miss == after_hits == 2
+
+
+def test_orders_use_the_restaurants_tax_rate_and_eta(store):
+    asyncio.run(store.table("menu_items").insert(
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 10.0}
+    ).execute())
+    asyncio.run(store.table("restaurants").insert(
+        {"restaurant_id": "r1", "tax_rate": 0.1, "base_eta_minutes": 12}
+    ).execute())
+
+    async def call():
+        resp = await OrderService.create_or_update_order(OrderCreateRequest(
+            restaurant_id="r1", call_id="c1", customer_name="Ann", phone="555",
+            items=[OrderItem(item_id="b1", quantity=2)],
+        ))
+        confirmed = await OrderService.confirm_order(OrderConfirmRequest(restaurant_id="r1", order_id=resp.order_id))
+        return resp, confirmed
+
+    resp, confirmed = asyncio.run(call())
+    assert (resp.tax, resp.total) == (2.0, 22.0)
+    assert confirmed.total == 22.0
+    assert confirmed.pickup_eta_minutes == kitchen_load.eta_minutes("r1", 12) < 30
+
+
+def test_update_invalidates_and_reprices_open_drafts(store):
+    asyncio.run(store.table("menu_items").insert(
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 10.0}
+    ).execute())
+
+    def order(quantity):
+        return OrderService.create_or_update_order(OrderCreateRequest(
+            restaurant_id="r1", call_id="c1", items=[OrderItem(item_id="b1", quantity=quantity)],
+        ))
+
+    async def call():
+        before = await order(1)
+        updated = await RestaurantService.update_settings("r1", RestaurantSettingsUpdate(tax_rate=0.2))
+        after = await order(2)
+        return before, updated, after
+
+    before, updated, after = asyncio.run(call())
+    assert before.tax == 0.89
+    assert updated.tax_rate == 0.2 and updated.base_eta_minutes == restaurant_service.settings.BASE_ETA_MINUTES
+    assert (after.tax, after.total) == (4.0, 24.0)
+    assert restaurant_settings_cache.get("r1").tax_rate == 0.2
+
+    RestaurantService.settings_changed("r1")
+    assert restaurant_settings_cache.get("r1") is None
@@ -0,0 +1,148 @@
+"""Tests for the embedded SQLite backend, run through the real services."""
+import asyncio
+
+import pytest
+
+from backend.models import OrderConfirmRequest, OrderCreateRequest, OrderItem
+from backend.services import draft_orders, menu_service, order_service, restaurant_service, stats_service
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.idempotency import order_idempotency
+from backend.services.menu_cache import menu_cache
+from backend.services.menu_service import MenuService
+from backend.services.order_service import OrderService
+from backend.services.pagination import iter_keyset
+from backend.services.stats_service import StatsService
+from backend.sqlite_store import SQLiteClient, StorageError, duration_to_seconds
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "voicehub.db"))
+    for module in (draft_orders, menu_service, order_service, restaurant_service, stats_service):
+        monkeypatch.setattr(module, "db", client)
+    monkeypatch.setattr(order_service, "draft_orders", DraftOrderStore(None, flush_delay=60, idle_seconds=1800))
+    order_idempotency.clear()
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    yield client
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    client.close()
+
+
+def run(query):
+    return asyncio.run(query.execute())
+
+
+def test_builder_round_trips_rows_like_postgrest(store):
+    run(store.table("menu_items").insert([
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 9.5,
+         "modifiers": [{"name": "Size", "options": ["Regular", "Large"]}]},
+        {"item_id": "f1", "restaurant_id": "r1", "name": "Fries", "category": "Sides", "price": 3.0,
+         "availability": False},
+        {"item_id": "x1", "restaurant_id": "r2", "name": "Soup", "category": "Mains", "price": 5.0},
+    ]))
+
+    rows = run(store.table("menu_items").select("item_id, availability, modifiers", count="exact")
+               .eq("restaurant_id", "r1").order("item_id", desc=True).limit(1))
+    assert rows.count == 2
+    assert rows.data == [{"item_id": "f1", "availability": False, "modifiers": []}]
+
+    updated = run(store.table("menu_items").update({"availability": True}).in_("item_id", ["f1", "zz"]))
+    assert [(r["item_id"], r["availability"]) for r in updated.data] == [("f1", True)]
+    assert run(store.table("menu_items").select("*").eq("item_id", "b1").single()).data["modifiers"][0]["name"] == "Size"
+    with pytest.raises(StorageError):
+        run(store.table("menu_items").select("*").eq("item_id", "nope").single())
+    with pytest.raises(StorageError):
+        store.table("menu_items").select("name; drop table orders")
+
+    deleted = run(store.table("menu_items").delete().eq("restaurant_id", "r2"))
+    assert [r["item_id"] for r in deleted.data] == ["x1"]
+
+
+def test_keyset_pages_use_the_or_filter(store):
+    run(store.table("call_logs").insert([
+        {"restaurant_id": "r1", "type": "call", "created_at": f"2024-01-01T10:00:0{i % 3}+00:00"} for i in range(7)
+    ]))
+
+    async def collect():
+        query = lambda: store.table("call_logs").select("id, created_at").eq("restaurant_id", "r1")
+        return [row async for row in iter_keyset(query, "id", chunk_size=2)]
+
+    rows = asyncio.run(collect())
+    keys = [(r["created_at"], r["id"]) for r in rows]
+    assert len(set(keys)) == 7
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_rollup_triggers_follow_status_changes_and_call_durations(store):
+    ts = "2024-03-05T14:20:00+00:00"
+    run(store.table("orders").insert({"order_id": "o1", "restaurant_id": "r1", "total": 20.0, "created_at": ts}))
+    run(store.table("orders").update({"status": "confirmed"}).eq("order_id", "o1"))
+    run(store.table("orders").upsert({"order_id": "o1", "restaurant_id": "r1", "total": 25.0}))
+    run(store.table("call_logs").insert([
+        {"restaurant_id": "r1", "type": "handoff", "data": {"duration": "2:34"}, "created_at": ts},
+        {"restaurant_id": "r1", "type": "call", "data": {"duration": 66}, "created_at": ts},
+        {"restaurant_id": "r1", "type": "call", "data": {}, "created_at": ts},
+    ]))
+
+    buckets = run(store.table("stats_rollups").select("*").order("granularity"))
+    assert [(b["granularity"], b["bucket_start"]) for b in buckets.data] == [
+        ("day", "2024-03-05T00:00:00+00:00"), ("hour", "2024-03-05T14:00:00+00:00"),
+    ]
+    for bucket in buckets.data:
+        assert (bucket["orders"], bucket["confirmed_orders"], bucket["revenue"]) == (1, 1, 25.0)
+        assert (bucket["calls"], bucket["handoffs"], bucket["timed_calls"]) == (3, 1, 2)
+        assert bucket["call_duration_seconds"] == 220
+    assert duration_to_seconds("1:02:03") == 3723
+
+
+def test_order_flow_runs_against_sqlite(store):
+    run(store.table("menu_items").insert(
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 10.0}
+    ))
+
+    async def call():
+        resp = await OrderService.create_or_update_order(OrderCreateRequest(
+            restaurant_id="r1", call_id="c1", customer_name="Ann", phone="555",
+            items=[OrderItem(item_id="b1", quantity=2)],
+        ))
+        confirmed = await OrderService.confirm_order(OrderConfirmRequest(restaurant_id="r1", order_id=resp.order_id))
+        totals = await StatsService.get_rollup_totals("r1", "2000-01-01T00:00:00", granularity="day")
+        return confirmed, totals
+
+    confirmed, totals = asyncio.run(call())
+    assert confirmed.confirmed and confirmed.total == 21.77
+    assert (totals["orders"], totals["confirmed_orders"], totals["revenue"]) == (1, 1, 21.775)
+    assert [i.name for i in asyncio.run(MenuService.get_menu("r1"))] == ["Burger"]
+
+
+def test_order_lists_stop_at_the_exact_custom_end(store):
+    run(store.table("orders").insert([
+        {"order_id": f"o{minute}", "restaurant_id": "r1", "created_at": f"2024-03-05T14:{minute}:00.000+00:00"}
+        for minute in (10, 20, 40, 50)
+    ]))
+
+    page = asyncio.run(OrderService.get_orders(
+        "r1", "custom", "all", "2024-03-05T14:15:00Z", "2024-03-05T14:40:00Z", fields="order_id",
+    ))
+    assert [o["order_id"] for o in page["items"]] == ["o20"]
+
+
+def test_call_list_fields_are_read_out_of_the_data_column(store):
+    run(store.table("call_logs").insert([
+        {"restaurant_id": "r1", "type": "handoff", "created_at": "2024-03-05T14:10:00.000+00:00",
+         "data": {"phone": "555", "duration": "2:34", "reason": "Allergy question", "transcript": "x" * 1000}},
+        {"restaurant_id": "r1", "type": "call", "created_at": "2024-03-05T14:20:00.000+00:00",
+         "data": {"outcome": "order", "duration": 90}},
+    ]))
+
+    page = asyncio.run(StatsService.get_call_logs(
+        "r1", "custom", "2024-03-05T14:00:00Z", "2024-03-05T15:00:00Z",
+        fields="id,type,created_at,phone,duration,outcome,transfer_reason",
+    ))
+    assert all("data" not in call for call in page["items"])
+    assert [(c["phone"], c["duration"], c["outcome"], c["transfer_reason"]) for c in page["items"]] == [
+        (None, "90", "order", None),
+        ("555", "2:34", "transferred", "Allergy question"),
+    ]
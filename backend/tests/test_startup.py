@@ -0,0 +1,133 @@
+"""Tests for lazy client construction and the startup pre-warm."""
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backend import database, main
+from backend.config import PROJECT_ROOT, settings
+from backend.services import menu_service, order_service, restaurant_service
+from backend.services.draft_orders import DraftOrderStore
+from backend.services.menu_cache import menu_cache
+from backend.sqlite_store import SQLiteClient
+
+
+def test_importing_the_app_does_not_build_the_database_client():
+    code = (
+        "import sys, backend.main, backend.mcp_server\n"
+        "from backend import database\n"
+        "print(database.db.built, 'postgrest' in sys.modules, 'httpx' in sys.modules, 'dotenv' in sys.modules)\n"
+    )
+    path = os.pathsep.join(p for p in (PROJECT_ROOT, os.environ.get("PYTHONPATH")) if p)
+    env = {**os.environ, "PYTHONPATH": path}
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=PROJECT_ROOT, env=env,
+    )
+    assert out.stdout.split() == ["False", "False", "False", "False"]
+
+
+def test_env_file_values_reach_objects_built_at_import(tmp_path, monkeypatch):
+    from backend import config, observability
+    from backend.routers.mcp import sessions
+    from backend.services.draft_orders import draft_orders
+    from backend.services.kitchen_load import kitchen_load
+    from backend.services.menu_cache import menu_cache
+
+    def fake_load_dotenv():
+        # What python-dotenv does with a .env file: fill in the environment
+        monkeypatch.setenv("KITCHEN_LOAD_MODEL", "items")
+        monkeypatch.setenv("MENU_CACHE_TTL_SECONDS", "5")
+        monkeypatch.setenv("DRAFT_JOURNAL_DIR", str(tmp_path / "journals"))
+        monkeypatch.setenv("MCP_MAX_SESSIONS", "7")
+        monkeypatch.setenv("LOG_TOOL_INVOKED_SAMPLE_RATE", "0.25")
+        return True
+
+    monkeypatch.setattr("dotenv.load_dotenv", fake_load_dotenv)
+    try:
+        assert config.load_env()
+        assert kitchen_load.load_model.name == "items"
+        assert menu_cache.ttl_seconds == 5.0
+        assert draft_orders.journal_dir == str(tmp_path / "journals")
+        assert sessions.max_sessions == 7
+        assert observability._SAMPLE_RATES["tool_invoked"] == 0.25
+    finally:
+        monkeypatch.undo()
+        config.settings.reload()
+        for hook in config._reload_hooks:
+            hook()
+    assert kitchen_load.load_model.name == config.settings.KITCHEN_LOAD_MODEL
+
+
+def test_lazy_client_builds_once_on_first_use():
+    built = []
+    lazy = database.LazyClient(lambda: built.append(1) or SQLiteClient(":memory:"))
+    assert not lazy.built and built == []
+    lazy.table("menu_items")
+    lazy.table("orders")
+    assert lazy.built and built == [1]
+    lazy.close()
+
+
+def _prewarm_client(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "voicehub.db"))
+    asyncio.run(client.table("menu_items").insert([
+        {"item_id": "b1", "restaurant_id": "r1", "name": "Burger", "category": "Mains", "price": 9.5},
+        {"item_id": "t1", "restaurant_id": "r2", "name": "Tacos", "category": "Mains", "price": 8.0},
+    ]).execute())
+    for module in (menu_service, order_service, restaurant_service):
+        monkeypatch.setattr(module, "db", client)
+    monkeypatch.setattr(main, "db", database.LazyClient(lambda: client))
+    monkeypatch.setattr(main, "draft_orders", DraftOrderStore(None, flush_delay=60, idle_seconds=1800))
+    monkeypatch.setattr(settings, "PREWARM_RESTAURANT_IDS", "r1, r2")
+    menu_cache.invalidate()
+    return client
+
+
+def test_prewarm_loads_configured_menus(tmp_path, monkeypatch):
+    client = _prewarm_client(tmp_path, monkeypatch)
+
+    asyncio.run(main.prewarm())
+    assert [item.name for item in menu_cache.get("r1").items] == ["Burger"]
+    assert [item.name for item in menu_cache.get("r2").items] == ["Tacos"]
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    client.close()
+
+
+def test_failed_warm_up_is_logged_and_does_not_abort_startup(tmp_path, monkeypatch):
+    client = _prewarm_client(tmp_path, monkeypatch)
+    get_menu_snapshot = main.MenuService.get_menu_snapshot
+    failures = []
+
+    async def flaky_menu(restaurant_id):
+        if restaurant_id == "r1":
+            raise ConnectionError("database unavailable")
+        return await get_menu_snapshot(restaurant_id)
+
+    monkeypatch.setattr(main.MenuService, "get_menu_snapshot", flaky_menu)
+    monkeypatch.setattr(main, "log_error", lambda event, **fields: failures.append((event, fields["step"])))
+
+    asyncio.run(main.prewarm())
+    assert failures == [("prewarm_failed", "menu:r1")]
+    assert menu_cache.get("r1") is None
+    assert [item.name for item in menu_cache.get("r2").items] == ["Tacos"]
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    client.close()
+
+
+def test_failed_draft_recovery_fails_startup(tmp_path, monkeypatch):
+    client = _prewarm_client(tmp_path, monkeypatch)
+
+    async def broken_recover():
+        raise OSError("journal unreadable")
+
+    monkeypatch.setattr(main.draft_orders, "recover", broken_recover)
+
+    with pytest.raises(OSError, match="journal unreadable"):
+        asyncio.run(main.prewarm())
+    menu_cache.invalidate()
+    restaurant_service.restaurant_settings_cache.invalidate()
+    client.close()
@@ -0,0 +1,74 @@
+"""Tests for StatsService rollup reads, with the database round trip faked out."""
+import asyncio
+
+from backend.models import RestaurantSettings
+from backend.services import stats_service
+from backend.services.restaurant_service import restaurant_settings_cache
+from backend.services.stats_service import StatsService
+from backend.services.time_windows import resolve_window
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def test_get_stats_reads_only_rollups_and_derives_rates(monkeypatch):
+    tables = []
+
+    async def fake_execute(query):
+        tables.append(str(query.request.path).rsplit("/", 1)[-1])
+        return FakeResponse([
+            {"calls": 6, "handoffs": 1, "timed_calls": 4, "call_duration_seconds": 600,
+             "orders": 5, "confirmed_orders": 3, "revenue": 60.5},
+            {"calls": 4, "handoffs": 1, "timed_calls": 0, "call_duration_seconds": 0,
+             "orders": 2, "confirmed_orders": 1, "revenue": "19.5"},
+        ])
+
+    monkeypatch.setattr(stats_service, "execute", fake_execute)
+    restaurant_settings_cache.set("r1", RestaurantSettings(
+        restaurant_id="r1", tax_rate=0.08, base_eta_minutes=15, eta_max_load_minutes=30, timezone="UTC",
+    ))
+    stats = asyncio.run(StatsService.get_stats("r1"))
+    restaurant_settings_cache.invalidate("r1")
+
+    assert tables == ["stats_rollups"]
+    assert stats["callsToday"] == 10
+    assert stats["ordersToday"] == 7
+    assert stats["revenue"] == 80.0
+    assert stats["avgOrderValue"] == 20.0
+    assert stats["conversionRate"] == 40.0
+    assert stats["fallbackRate"] == 20.0
+    assert stats["avgCallDuration"] == "2:30"
+
+
+def test_get_stats_with_no_activity(monkeypatch):
+    async def fake_execute(query):
+        return FakeResponse([])
+
+    monkeypatch.setattr(stats_service, "execute", fake_execute)
+    stats = asyncio.run(StatsService.get_stats(None))
+
+    assert stats["callsToday"] == 0
+    assert stats["conversionRate"] == 0
+    assert stats["avgCallDuration"] == "0:00"
+
+
+def test_get_stats_sums_the_buckets_of_the_restaurants_local_day(monkeypatch):
+    params = []
+
+    async def fake_execute(query):
+        params.append(query.request.params)
+        return FakeResponse([])
+
+    monkeypatch.setattr(stats_service, "execute", fake_execute)
+    restaurant_settings_cache.set("r2", RestaurantSettings(
+        restaurant_id="r2", tax_rate=0.08, base_eta_minutes=15, eta_max_load_minutes=30,
+        timezone="America/Los_Angeles",
+    ))
+    asyncio.run(StatsService.get_stats("r2"))
+    restaurant_settings_cache.invalidate("r2")
+
+    window = resolve_window("today", "America/Los_Angeles", align="hour")
+    assert params[0].get_list("bucket_start") == [f"gte.{window.start_iso}", f"lt.{window.end_iso}"]
+    assert window.start.hour in (7, 8)  # local midnight, PDT or PST
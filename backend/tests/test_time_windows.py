@@ -0,0 +1,74 @@
+"""Tests for the shared dashboard time-window resolver."""
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.services.time_windows import is_valid_zone, resolve_window
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_today_starts_at_local_midnight_and_ends_at_the_next_hour():
+    window = resolve_window("today", "America/New_York", now=_utc(2024, 5, 1, 15, 20))
+
+    assert window.start_iso == "2024-05-01T04:00:00+00:00"
+    assert window.end_iso == "2024-05-01T16:00:00+00:00"
+
+
+def test_day_alignment_follows_calendar_days_across_dst():
+    # 2024-03-10 is 23 hours long in New York
+    window = resolve_window("today", "America/New_York", align="day", now=_utc(2024, 3, 10, 18))
+    week = resolve_window("week", "America/New_York", align="day", now=_utc(2024, 3, 10, 18))
+
+    assert window == (_utc(2024, 3, 10, 5), _utc(2024, 3, 11, 4))
+    assert week.start == _utc(2024, 3, 4, 5)
+
+
+def test_late_evening_local_time_is_still_the_local_day():
+    # 23:30 in New York is already the next day in UTC
+    window = resolve_window("today", "America/New_York", now=_utc(2024, 5, 2, 3, 30))
+
+    assert window.start == _utc(2024, 5, 1, 4)
+
+
+def test_half_hour_zone_starts_at_local_midnight_unless_hour_aligned():
+    now = _utc(2024, 5, 1, 20)
+
+    # Local midnight on the 2nd is 18:30 UTC on the 1st
+    assert resolve_window("today", "Asia/Kolkata", now=now).start == _utc(2024, 5, 1, 18, 30)
+    assert resolve_window("today", "Asia/Kolkata", align="day", now=now).start == _utc(2024, 5, 1, 18, 30)
+    assert resolve_window("today", "Asia/Kolkata", align="hour", now=now).start == _utc(2024, 5, 1, 18)
+
+
+def test_custom_dates_are_local_and_a_bare_end_date_includes_that_day():
+    window = resolve_window("custom", "Europe/Berlin", "2024-03-01", "2024-03-07", now=_utc(2024, 5, 1))
+
+    assert window == (_utc(2024, 2, 29, 23), _utc(2024, 3, 7, 23))
+
+
+def test_custom_timestamps_are_kept_unless_widened_to_whole_buckets():
+    def custom(align):
+        return resolve_window(
+            "custom", None, "2024-03-01T10:15:00Z", "2024-03-01T12:40:00Z", align=align, now=_utc(2024, 5, 1),
+        )
+
+    assert custom("exact") == (_utc(2024, 3, 1, 10, 15), _utc(2024, 3, 1, 12, 40))
+    assert custom("hour") == (_utc(2024, 3, 1, 10), _utc(2024, 3, 1, 13))
+
+
+def test_requests_in_the_same_hour_share_one_window():
+    first = resolve_window("month", "Europe/London", now=_utc(2024, 5, 1, 9, 1))
+    second = resolve_window("month", "Europe/London", now=_utc(2024, 5, 1, 9, 59))
+
+    assert first is second
+    assert resolve_window("month", "Europe/London", now=_utc(2024, 5, 1, 10)) is not first
+
+
+def test_unknown_zone_falls_back_to_utc_and_bad_alignment_is_rejected():
+    assert not is_valid_zone("Mars/Olympus_Mons")
+    assert is_valid_zone("UTC") and is_valid_zone("Asia/Tokyo")
+    assert resolve_window("today", "Mars/Olympus_Mons", now=_utc(2024, 5, 1, 9)).start == _utc(2024, 5, 1)
+    with pytest.raises(ValueError):
+        resolve_window("today", align="minute")
@@ -0,0 +1,107 @@
+"""Tests for span tracing: nesting, header propagation, call_id correlation and export."""
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import database, tracing
+from backend.models import HandoffRequest
+from backend.observability import flush_logs, trace_tool
+
+
+class FakeQuery:
+    def __init__(self, request):
+        self.request = request
+
+    async def execute(self):
+        return None
+
+
+def _read_spans(path):
+    tracing.flush_spans()
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_tool_span_parents_db_spans_and_carries_call_id(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "spans.ndjson"
+    monkeypatch.setattr(tracing, "_processor", tracing.BatchSpanProcessor(tracing.FileSpanExporter(str(path))))
+
+    @trace_tool("handoff_test")
+    async def handoff(req: HandoffRequest):
+        await database.execute(FakeQuery(database.db.table("orders").select("*").request))
+        await database.execute(FakeQuery(database.db.table("call_logs").insert({"a": 1}).request))
+        return "ok"
+
+    req = HandoffRequest(restaurant_id="r1", call_id="call-42", reason="angry caller")
+    asyncio.run(handoff(req=req))
+
+    spans = {s["name"]: s for s in _read_spans(path)}
+    tool = spans["tool handoff_test"]
+    assert tool["parent_id"] is None
+    assert tool["attributes"]["call_id"] == "call-42"
+    assert tool["attributes"]["db_round_trips"] == 2
+    for name in ("db select orders", "db insert call_logs"):
+        assert spans[name]["parent_id"] == tool["span_id"]
+        assert spans[name]["trace_id"] == tool["trace_id"]
+
+    flush_logs()
+    records = [json.loads(l) for l in capsys.readouterr().out.splitlines() if l]
+    assert {r["trace_id"] for r in records} == {tool["trace_id"]}
+    assert {r["call_id"] for r in records} == {"call-42"}
+
+
+def test_db_queries_outside_a_trace_are_not_recorded(tmp_path, monkeypatch):
+    path = tmp_path / "spans.ndjson"
+    path.touch()
+    monkeypatch.setattr(tracing, "_processor", tracing.BatchSpanProcessor(tracing.FileSpanExporter(str(path))))
+
+    asyncio.run(database.execute(FakeQuery(database.db.table("orders").select("*").request)))
+
+    assert _read_spans(path) == []
+
+
+def test_inbound_traceparent_is_continued_and_echoed(tmp_path, monkeypatch):
+    path = tmp_path / "spans.ndjson"
+    monkeypatch.setattr(tracing, "_processor", tracing.BatchSpanProcessor(tracing.FileSpanExporter(str(path))))
+    app = FastAPI()
+    app.add_middleware(tracing.TraceContextMiddleware)
+
+    @app.get("/tool/ping")
+    @trace_tool("ping")
+    async def ping():
+        return {"trace_id": tracing.current_trace_id()}
+
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    client = TestClient(app)
+    response = client.get("/tool/ping", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+
+    assert response.headers["x-trace-id"] == trace_id
+    assert response.json() == {"trace_id": trace_id}
+    (span,) = _read_spans(path)
+    assert span["trace_id"] == trace_id
+    assert span["parent_id"] == parent_id
+
+    fresh = client.get("/tool/ping")
+    assert len(fresh.headers["x-trace-id"]) == 32
+    assert fresh.headers["x-trace-id"] != trace_id
+
+
+def test_otlp_encoding():
+    exporter = tracing.OTLPHttpExporter("http://collector:4318/", "voicehub-test")
+    with tracing.start_span("tool x", kind="server", call_id="c1", rows=3) as span:
+        pass
+    span.record_error(ValueError("boom"))
+
+    body = exporter.encode([span])
+    exporter.shutdown()
+    assert exporter.url == "http://collector:4318/v1/traces"
+    resource = body["resourceSpans"][0]
+    assert resource["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "voicehub-test"}}]
+    (otlp_span,) = resource["scopeSpans"][0]["spans"]
+    assert otlp_span["traceId"] == span.trace_id
+    assert otlp_span["kind"] == 2
+    assert "parentSpanId" not in otlp_span
+    assert {"key": "rows", "value": {"intValue": "3"}} in otlp_span["attributes"]
+    assert otlp_span["status"] == {"code": 2, "message": "ValueError: boom"}
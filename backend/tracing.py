@@ -0,0 +1,343 @@
+"""
+Span tracing for tool calls, services and database queries.
+
+The current span lives in a contextvar. trace_tool opens a parent span for
+each tool call, and every PostgREST round trip through database.execute
+opens a child span under it. That shows where a slow tool spent its time:
+the menu fetch, the status lookup or the upsert.
+
+An inbound `traceparent` (W3C) or `X-Trace-Id` header continues the
+caller's trace, and the trace id is echoed in the `X-Trace-Id` response
+header. Finished spans are batched on a background thread. They go to an
+OTLP/HTTP collector (JSON encoding) or to a local NDJSON file, chosen by
+TRACE_EXPORTER.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from backend.config import on_reload, settings
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# OTLP span kinds and status codes
+_KINDS = {"internal": 1, "server": 2, "client": 3}
+_STATUS_OK, _STATUS_ERROR = 1, 2
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end_ns or time.time_ns()) - self.start_ns) / 1e6, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# (trace_id, parent span_id) continued from an inbound request header
+_remote_parent: ContextVar[Optional[Tuple[str, Optional[str]]]] = ContextVar("remote_parent", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    if span is not None:
+        return span.trace_id
+    remote = _remote_parent.get()
+    return remote[0] if remote else None
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", require_parent: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Open a span as a child of the current one (or of the inbound request).
+
+    With `require_parent`, nothing is recorded outside a trace, so database
+    queries from background jobs do not each become a one-span trace.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        remote = _remote_parent.get()
+        if remote is None and require_parent:
+            yield None
+            return
+        trace_id, parent_id = remote if remote else (new_trace_id(), None)
+
+    span = Span(name, trace_id, parent_id, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_error(exc)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if _processor is not None:
+            _processor.on_end(span)
+
+
+def parse_trace_headers(headers: Dict[str, str]) -> Optional[Tuple[str, Optional[str]]]:
+    """(trace_id, parent span_id) from a W3C traceparent or an X-Trace-Id header."""
+    match = _TRACEPARENT.match(headers.get("traceparent", "").strip().lower())
+    if match:
+        return match.group(1), match.group(2)
+    trace_id = headers.get("x-trace-id", "").strip().lower().replace("-", "")
+    if _TRACE_ID.match(trace_id):
+        return trace_id, None
+    return None
+
+
+class TraceContextMiddleware:
+    """ASGI middleware: continue or start a trace per request and echo its id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        remote = parse_trace_headers(headers) or (new_trace_id(), None)
+        token = _remote_parent.set(remote)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", remote[0].encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _remote_parent.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+class FileSpanExporter:
+    """Appends one JSON span per line. Meant for local runs and tests."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+class OTLPHttpExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        import httpx
+
+        self._client = httpx.Client(timeout=timeout)
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": _KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "status": {"code": _STATUS_ERROR, "message": span.error} if span.error else {"code": _STATUS_OK},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        self._client.post(self.url, json=self.encode(spans))
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class BatchSpanProcessor:
+    """Collects finished spans and exports them in batches from a background thread.
+
+    Like the log sink, a full buffer drops spans instead of blocking the request.
+    """
+
+    def __init__(self, exporter, max_queue: int = 4096, batch_size: int = 256, interval: float = 1.0):
+        self.exporter = exporter
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._buffer: Deque[Any] = deque()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        if len(self._buffer) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            # A down collector must not take the API with it.
+            pass
+
+    def _drain(self) -> None:
+        batch: List[Span] = []
+        while True:
+            try:
+                item = self._buffer.popleft()
+            except IndexError:
+                break
+            if isinstance(item, threading.Event):
+                if batch:
+                    self._export(batch)
+                    batch = []
+                item.set()
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._export(batch)
+                batch = []
+        if batch:
+            self._export(batch)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._drain()
+
+    def force_flush(self, timeout: float = 5.0) -> None:
+        """Export everything finished so far."""
+        if self._thread is None:
+            self._drain()
+            return
+        marker = threading.Event()
+        self._buffer.append(marker)
+        self._wake.set()
+        marker.wait(timeout)
+
+
+def _build_processor() -> Optional[BatchSpanProcessor]:
+    if settings.TRACE_EXPORTER == "otlp":
+        return BatchSpanProcessor(OTLPHttpExporter(settings.OTLP_ENDPOINT, settings.TRACE_SERVICE_NAME))
+    if settings.TRACE_EXPORTER == "file":
+        return BatchSpanProcessor(FileSpanExporter(settings.TRACE_FILE_PATH))
+    return None
+
+
+_processor: Optional[BatchSpanProcessor] = _build_processor()
+
+
+def set_processor(processor: Optional[BatchSpanProcessor]) -> Optional[BatchSpanProcessor]:
+    """Swap the span processor (tests, benchmarks). Returns the previous one."""
+    global _processor
+    previous, _processor = _processor, processor
+    return previous
+
+
+@on_reload
+def _apply_settings() -> None:
+    previous = set_processor(_build_processor())
+    if previous is not None:
+        previous.force_flush()
+
+
+def flush_spans() -> None:
+    if _processor is not None:
+        _processor.force_flush()
@@ -1,6 +1,7 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { DashboardLayout } from "@/components/layout/DashboardLayout";
 import { StatCard } from "@/components/dashboard/StatCard";
+import { Button } from "@/components/ui/button";
 import { api } from "@/services/api";
 import { useRestaurant } from "@/restaurant-context";
 import {
@@ -23,32 +24,56 @@ import {
 
 const Calls = () => {
   const [calls, setCalls] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [stats, setStats] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Bumped when the restaurant changes, so a page requested for the
+  // previous one is never appended to the new list
+  const listRequest = useRef(0);
   const [isDetailOpen, setIsDetailOpen] = useState(false);
   const [selectedCallDetail, setSelectedCallDetail] = useState<any>(null);
   const [detailLoading, setDetailLoading] = useState(false);
   const { selectedRestaurantId } = useRestaurant();
 
   useEffect(() => {
+    const request = ++listRequest.current;
     const fetchData = async () => {
       try {
         setLoading(true);
-        const [callsData, statsData] = await Promise.all([
+        const [callsPage, statsData] = await Promise.all([
           api.getCalls("today", selectedRestaurantId),
           api.getStats(selectedRestaurantId)
         ]);
-        setCalls(callsData);
+        if (request !== listRequest.current) return;
+        setCalls(callsPage.items);
+        setNextCursor(callsPage.nextCursor);
         setStats(statsData);
       } catch (error) {
         console.error("Error fetching calls:", error);
       } finally {
-        setLoading(false);
+        if (request === listRequest.current) setLoading(false);
       }
     };
     fetchData();
   }, [selectedRestaurantId]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const request = listRequest.current;
+    try {
+      setLoadingMore(true);
+      const page = await api.getCalls("today", selectedRestaurantId, undefined, undefined, nextCursor);
+      if (request !== listRequest.current) return;
+      setCalls((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading more calls:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleOpenCallDetail = async (callId: string) => {
     try {
       setIsDetailOpen(true);
@@ -207,6 +232,13 @@ const Calls = () => {
               </tbody>
             </table>
           </div>
+          {!loading && nextCursor && (
+            <div className="flex justify-center p-4 border-t border-border">
+              <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load more"}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
 
@@ -33,10 +33,10 @@ const Index = () => {
         setLoading(true);
         const [statsData, ordersData] = await Promise.all([
           api.getStats(selectedRestaurantId),
-          api.getOrders("today", selectedRestaurantId)
+          api.getOrders("today", selectedRestaurantId, undefined, undefined, undefined, null, 3)
         ]);
         setStats(statsData);
-        setRecentOrders(ordersData.slice(0, 3));
+        setRecentOrders(ordersData.items);
       } catch (error) {
         console.error("Error fetching dashboard data:", error);
       } finally {
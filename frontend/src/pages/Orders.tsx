@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { DashboardLayout } from "@/components/layout/DashboardLayout";
 import { StatCard } from "@/components/dashboard/StatCard";
 import { Button } from "@/components/ui/button";
@@ -32,25 +32,30 @@ const Orders = () => {
   const [customRange, setCustomRange] = useState<DateRange | undefined>();
   const [searchQuery, setSearchQuery] = useState("");
   const [orders, setOrders] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [stats, setStats] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Bumped on every filter change, so a page requested for the previous
+  // filters is never appended to the new list
+  const listRequest = useRef(0);
   const { selectedRestaurantId } = useRestaurant();
 
+  const customStart =
+    filter === "custom" && customRange?.from
+      ? customRange.from.toISOString()
+      : undefined;
+  const customEnd =
+    filter === "custom" && customRange?.to
+      ? customRange.to.toISOString()
+      : undefined;
+
   useEffect(() => {
+    const request = ++listRequest.current;
     const fetchData = async () => {
       try {
         setLoading(true);
-
-        const customStart =
-          filter === "custom" && customRange?.from
-            ? customRange.from.toISOString()
-            : undefined;
-        const customEnd =
-          filter === "custom" && customRange?.to
-            ? customRange.to.toISOString()
-            : undefined;
-
-        const [ordersData, statsData] = await Promise.all([
+        const [ordersPage, statsData] = await Promise.all([
           api.getOrders(
             filter,
             selectedRestaurantId,
@@ -60,16 +65,41 @@ const Orders = () => {
           ),
           api.getStats(selectedRestaurantId)
         ]);
-        setOrders(ordersData);
+        if (request !== listRequest.current) return;
+        setOrders(ordersPage.items);
+        setNextCursor(ordersPage.nextCursor);
         setStats(statsData);
       } catch (error) {
         console.error("Error fetching orders:", error);
       } finally {
-        setLoading(false);
+        if (request === listRequest.current) setLoading(false);
       }
     };
     fetchData();
-  }, [filter, statusFilter, customRange?.from, customRange?.to, selectedRestaurantId]);
+  }, [filter, statusFilter, customStart, customEnd, selectedRestaurantId]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const request = listRequest.current;
+    try {
+      setLoadingMore(true);
+      const page = await api.getOrders(
+        filter,
+        selectedRestaurantId,
+        statusFilter,
+        customStart,
+        customEnd,
+        nextCursor
+      );
+      if (request !== listRequest.current) return;
+      setOrders((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading more orders:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   const filteredOrders = (orders || []).filter(
     (order) =>
@@ -279,6 +309,13 @@ const Orders = () => {
               </tbody>
             </table>
           </div>
+          {!loading && nextCursor && (
+            <div className="flex justify-center p-4 border-t border-border">
+              <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load more"}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </DashboardLayout>
@@ -3,61 +3,85 @@ const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8001";
 const getSelectedRestaurantId = () =>
   localStorage.getItem("selected_restaurant_id") || "demo_restaurant";
 
+// Rows per page of the order and call lists. Later pages load on demand.
+const PAGE_SIZE = 50;
+
+// Columns the order and call lists show, so a page does not carry whole
+// call transcripts
+const ORDER_LIST_FIELDS = "order_id,customer_name,phone,items,total,status,created_at";
+const CALL_LIST_FIELDS = "id,type,created_at,phone,duration,outcome,transfer_reason";
+
+export type Page<T = any> = { items: T[]; nextCursor: string | null };
+
+// /orders and /calls return one {items, next_cursor} page at a time. Pass
+// nextCursor back to load the page after it.
+const fetchPage = async (path: string, params: URLSearchParams, error: string): Promise<Page> => {
+  const response = await fetch(`${API_URL}${path}?${params.toString()}`, {
+    headers: {
+      "ngrok-skip-browser-warning": "true"
+    }
+  });
+  if (!response.ok) throw new Error(error);
+  const page = await response.json();
+  return { items: page.items, nextCursor: page.next_cursor };
+};
+
 export const api = {
   getOrders: async (
     range: string = "today",
     restaurantId: string = getSelectedRestaurantId(),
     status?: string,
     startDate?: string,
-    endDate?: string
-  ) => {
+    endDate?: string,
+    cursor?: string | null,
+    limit: number = PAGE_SIZE
+  ): Promise<Page> => {
     const params = new URLSearchParams({
       range,
       restaurant_id: restaurantId,
+      fields: ORDER_LIST_FIELDS,
+      limit: String(limit),
     });
 
     if (status && status !== "all") params.set("status", status);
     if (startDate) params.set("start_date", startDate);
     if (endDate) params.set("end_date", endDate);
+    if (cursor) params.set("cursor", cursor);
 
-    const response = await fetch(`${API_URL}/orders?${params.toString()}`, {
-      headers: {
-        "ngrok-skip-browser-warning": "true"
-      }
-    });
-    if (!response.ok) throw new Error("Failed to fetch orders");
-    const data = await response.json();
-    return data.map((order: any) => ({
-      ...order,
-      id: order.order_id,
-      items: Array.isArray(order.items)
-        ? order.items.map((i: any) => `${i.quantity}x ${i.name || i.item_id}`).join(", ")
-        : order.items,
-      eta: order.status === "confirmed" ? "30 min" : "N/A"
-    }));
+    const page = await fetchPage("/orders", params, "Failed to fetch orders");
+    return {
+      ...page,
+      items: page.items.map((order: any) => ({
+        ...order,
+        id: order.order_id,
+        items: Array.isArray(order.items)
+          ? order.items.map((i: any) => `${i.quantity}x ${i.name || i.item_id}`).join(", ")
+          : order.items,
+        eta: order.status === "confirmed" ? "30 min" : "N/A"
+      })),
+    };
   },
 
   getCalls: async (
     range: string = "today",
     restaurantId: string = getSelectedRestaurantId(),
     startDate?: string,
-    endDate?: string
-  ) => {
+    endDate?: string,
+    cursor?: string | null,
+    limit: number = PAGE_SIZE
+  ): Promise<Page> => {
     const params = new URLSearchParams({
       range,
       restaurant_id: restaurantId,
+      fields: CALL_LIST_FIELDS,
+      limit: String(limit),
     });
 
     if (startDate) params.set("start_date", startDate);
     if (endDate) params.set("end_date", endDate);
+    if (cursor) params.set("cursor", cursor);
 
-    const response = await fetch(`${API_URL}/calls?${params.toString()}`, {
-      headers: {
-        "ngrok-skip-browser-warning": "true"
-      }
-    });
-    if (!response.ok) throw new Error("Failed to fetch calls");
-    return response.json();
+    return fetchPage("/calls", params, "Failed to fetch calls");
   },
 
   getCallDetail: async (
@@ -8,6 +8,7 @@ create table public.menu_items (
     name text not null,
     category text not null,
     price numeric not null,
+    description text,
     availability boolean default true,
     modifiers jsonb default '[]'::jsonb,
     created_at timestamp with time zone default timezone('utc'::text, now())
@@ -48,11 +49,145 @@ create table public.faqs (
     created_at timestamp with time zone default timezone('utc'::text, now())
 );
 
+-- Restaurants Table
+-- Per-location settings. Null columns fall back to the backend's global
+-- defaults (TAX_RATE, BASE_ETA_MINUTES, ETA_MAX_LOAD_MINUTES,
+-- DEFAULT_TIMEZONE). The backend caches these per restaurant; after
+-- editing a row directly, POST to
+-- /restaurants/{restaurant_id}/settings/changed (e.g. from a Database Webhook
+-- on this table) so running workers drop their cached copy.
+create table public.restaurants (
+    restaurant_id text primary key,
+    name text,
+    tax_rate numeric check (tax_rate >= 0 and tax_rate <= 1),
+    base_eta_minutes integer check (base_eta_minutes >= 0),
+    eta_max_load_minutes integer check (eta_max_load_minutes >= 0),
+    timezone text, -- IANA zone, e.g. 'America/New_York'; "today" on the dashboards starts at its midnight
+    updated_at timestamp with time zone default timezone('utc'::text, now())
+);
+
+-- Stats Rollups Table
+-- Hourly and daily aggregates per restaurant, maintained by the triggers below
+-- so the dashboard's /stats endpoint never scans raw orders or call logs.
+create table public.stats_rollups (
+    restaurant_id text not null,
+    granularity text not null, -- 'hour' or 'day'
+    bucket_start timestamp with time zone not null,
+    calls integer not null default 0,
+    handoffs integer not null default 0,
+    timed_calls integer not null default 0, -- calls that reported a duration
+    call_duration_seconds numeric not null default 0,
+    orders integer not null default 0,
+    confirmed_orders integer not null default 0,
+    revenue numeric not null default 0,
+    primary key (restaurant_id, granularity, bucket_start)
+);
+
+-- Add deltas to the hour and day buckets containing `ts`
+create or replace function public.bump_stats_rollup(
+    p_restaurant_id text,
+    p_ts timestamp with time zone,
+    p_calls integer default 0,
+    p_handoffs integer default 0,
+    p_timed_calls integer default 0,
+    p_call_duration_seconds numeric default 0,
+    p_orders integer default 0,
+    p_confirmed_orders integer default 0,
+    p_revenue numeric default 0
+) returns void language plpgsql as $$
+declare
+    g text;
+begin
+    foreach g in array array['hour', 'day'] loop
+        insert into public.stats_rollups as r (
+            restaurant_id, granularity, bucket_start, calls, handoffs, timed_calls,
+            call_duration_seconds, orders, confirmed_orders, revenue
+        ) values (
+            p_restaurant_id, g, date_trunc(g, p_ts at time zone 'utc') at time zone 'utc',
+            p_calls, p_handoffs, p_timed_calls, p_call_duration_seconds,
+            p_orders, p_confirmed_orders, p_revenue
+        )
+        on conflict (restaurant_id, granularity, bucket_start) do update set
+            calls = r.calls + excluded.calls,
+            handoffs = r.handoffs + excluded.handoffs,
+            timed_calls = r.timed_calls + excluded.timed_calls,
+            call_duration_seconds = r.call_duration_seconds + excluded.call_duration_seconds,
+            orders = r.orders + excluded.orders,
+            confirmed_orders = r.confirmed_orders + excluded.confirmed_orders,
+            revenue = r.revenue + excluded.revenue;
+    end loop;
+end;
+$$;
+
+-- Call durations arrive as seconds ("154") or clock strings ("2:34", "1:02:03")
+create or replace function public.duration_to_seconds(value text)
+returns numeric language sql immutable as $$
+    select case
+        when value ~ '^\d+(\.\d+)?$' then value::numeric
+        when value ~ '^\d+(:\d{1,2}){1,2}$' then (
+            select sum(part::numeric * power(60, array_length(parts, 1) - idx))
+            from unnest(parts) with ordinality as t(part, idx)
+        )
+        else null
+    end
+    from (select string_to_array(value, ':') as parts) p;
+$$;
+
+create or replace function public.rollup_orders() returns trigger language plpgsql as $$
+begin
+    -- Take back the old row's contribution, then add the new one. Status
+    -- changes (draft -> confirmed) and total edits become small deltas.
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.bump_stats_rollup(
+            old.restaurant_id, old.created_at,
+            p_orders => -1,
+            p_confirmed_orders => case when old.status = 'confirmed' then -1 else 0 end,
+            p_revenue => case when old.status = 'confirmed' then -coalesce(old.total, 0) else 0 end
+        );
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.bump_stats_rollup(
+            new.restaurant_id, new.created_at,
+            p_orders => 1,
+            p_confirmed_orders => case when new.status = 'confirmed' then 1 else 0 end,
+            p_revenue => case when new.status = 'confirmed' then coalesce(new.total, 0) else 0 end
+        );
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function public.rollup_call_logs() returns trigger language plpgsql as $$
+declare
+    duration numeric := public.duration_to_seconds(new.data->>'duration');
+begin
+    perform public.bump_stats_rollup(
+        new.restaurant_id, new.created_at,
+        p_calls => 1,
+        p_handoffs => case when new.type = 'handoff' then 1 else 0 end,
+        p_timed_calls => case when duration is null then 0 else 1 end,
+        p_call_duration_seconds => coalesce(duration, 0)
+    );
+    return null;
+end;
+$$;
+
+create trigger trg_rollup_orders
+after insert or update of status, total, restaurant_id or delete on public.orders
+for each row execute function public.rollup_orders();
+
+create trigger trg_rollup_call_logs
+after insert on public.call_logs
+for each row execute function public.rollup_call_logs();
+
 -- Create indexes for performance
 create index idx_menu_restaurant on public.menu_items(restaurant_id);
 create index idx_orders_restaurant on public.orders(restaurant_id);
 create index idx_orders_status on public.orders(status);
 create index idx_calls_restaurant on public.call_logs(restaurant_id);
+-- Keyset pagination on the dashboards: newest first within a restaurant
+create index idx_orders_restaurant_created on public.orders(restaurant_id, created_at desc, order_id desc);
+create index idx_calls_restaurant_created on public.call_logs(restaurant_id, created_at desc, id desc);
 
 -- --- SECURITY & RLS ---
 
@@ -61,6 +196,8 @@ alter table public.menu_items enable row level security;
 alter table public.orders enable row level security;
 alter table public.call_logs enable row level security;
 alter table public.faqs enable row level security;
+alter table public.restaurants enable row level security;
+alter table public.stats_rollups enable row level security;
 
 -- 2. Create Policies
 
@@ -87,3 +224,30 @@ using (true);
 -- If you want the frontend to read orders, you might need a policy like:
 -- create policy "Allow public read to orders" on public.orders for select using (true);
 -- But usually, order history is private.
+
+-- --- UPGRADING AN EXISTING DATABASE ---
+-- alter table public.menu_items add column if not exists description text;
+-- Then create public.restaurants as above and enable RLS on it.
+-- alter table public.restaurants add column if not exists timezone text;
+
+-- --- ONE-OFF BACKFILL ---
+-- Run once after adding stats_rollups to an existing database; new rows are
+-- rolled up by the triggers from then on.
+-- insert into public.stats_rollups (restaurant_id, granularity, bucket_start, orders, confirmed_orders, revenue)
+-- select restaurant_id, g, date_trunc(g, created_at at time zone 'utc') at time zone 'utc',
+--        count(*), count(*) filter (where status = 'confirmed'),
+--        coalesce(sum(total) filter (where status = 'confirmed'), 0)
+-- from public.orders, unnest(array['hour', 'day']) as g
+-- group by 1, 2, 3
+-- on conflict (restaurant_id, granularity, bucket_start) do update set
+--     orders = excluded.orders, confirmed_orders = excluded.confirmed_orders, revenue = excluded.revenue;
+-- insert into public.stats_rollups (restaurant_id, granularity, bucket_start, calls, handoffs, timed_calls, call_duration_seconds)
+-- select restaurant_id, g, date_trunc(g, created_at at time zone 'utc') at time zone 'utc',
+--        count(*), count(*) filter (where type = 'handoff'),
+--        count(public.duration_to_seconds(data->>'duration')),
+--        coalesce(sum(public.duration_to_seconds(data->>'duration')), 0)
+-- from public.call_logs, unnest(array['hour', 'day']) as g
+-- group by 1, 2, 3
+-- on conflict (restaurant_id, granularity, bucket_start) do update set
+--     calls = excluded.calls, handoffs = excluded.handoffs,
+--     timed_calls = excluded.timed_calls, call_duration_seconds = excluded.call_duration_seconds;